@@ -0,0 +1,111 @@
+"""
+Throughput benchmark of the confirmation emails against a local SMTP server.
+
+Starts an aiosmtpd server that accepts and discards every message, then sends the same number
+of confirmation emails two ways and reports messages per second:
+
+* "fastmail": what ``send_email`` used to do, a new ``FastMail`` per message, which loads the
+  template again and opens, logs in to and quits a new SMTP session for every email;
+* "pooled": ``MailSender`` with its workers running, as started in ``main.lifespan``.
+
+The local server has no TLS and no network latency, so real SMTP providers widen the gap.
+Requires ``aiosmtpd`` (a development dependency).
+
+Usage (from the ``app`` directory)::
+
+    python -m benchmarks.bench_email --messages 500 --concurrency 50
+"""
+import argparse
+import asyncio
+import socket
+import time
+
+from aiosmtpd.controller import Controller
+from fastapi_mail import FastMail, MessageSchema, MessageType
+
+from src.services.email import MailSender, conf
+
+HOST = "127.0.0.1"
+
+
+class Sink:
+    """
+    aiosmtpd handler counting the messages it receives.
+    """
+
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+async def send_fastmail(config, index: int) -> None:
+    message = MessageSchema(subject="Confirm your email ", recipients=[f"user{index}@example.com"],
+                            template_body={"host": "http://bench/", "username": f"user{index}", "token": "token"},
+                            subtype=MessageType.html)
+    await FastMail(config).send_message(message, template_name="email_template.html")
+
+
+async def run(send, messages: int, concurrency: int) -> float:
+    """
+    Calls ``send(index)`` for ``messages`` indexes from ``concurrency`` tasks, as signup background tasks do.
+
+    :return: The elapsed time, in seconds.
+    :rtype: float
+    """
+    remaining = iter(range(messages))
+
+    async def worker():
+        for index in remaining:
+            await send(index)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started
+
+
+async def bench(messages: int, concurrency: int, pool_size: int) -> None:
+    sink = Sink()
+    with socket.socket() as probe:
+        probe.bind((HOST, 0))
+        port = probe.getsockname()[1]
+    controller = Controller(sink, hostname=HOST, port=port)
+    controller.start()
+    config = conf.model_copy(update={"MAIL_SERVER": HOST, "MAIL_PORT": port,
+                                     "MAIL_SSL_TLS": False, "MAIL_STARTTLS": False, "USE_CREDENTIALS": False})
+    try:
+        elapsed = await run(lambda index: send_fastmail(config, index), messages, concurrency)
+        baseline = messages / elapsed
+        print(f"{'sender':>9} {'messages/s':>11} {'speedup':>8}")
+        print(f"{'fastmail':>9} {baseline:>11.0f} {1:>7.1f}x")
+
+        sender = MailSender(config, pool_size=pool_size)
+        await sender.start()
+
+        async def send_pooled(index: int) -> None:
+            html = sender.render("email_template.html", host="http://bench/", username=f"user{index}", token="token")
+            await sender.send(sender.build(f"user{index}@example.com", "Confirm your email ", html))
+
+        started = time.perf_counter()
+        await run(send_pooled, messages, concurrency)
+        await sender.close()
+        rate = messages / (time.perf_counter() - started)
+        print(f"{'pooled':>9} {rate:>11.0f} {rate / baseline:>7.1f}x")
+        print(f"server received {sink.received} of {2 * messages} messages")
+    finally:
+        controller.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500, help="emails sent by each sender")
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent signups handing emails over")
+    parser.add_argument("--pool-size", type=int, default=2, help="MailSender workers (SMTP connections)")
+    args = parser.parse_args()
+    asyncio.run(bench(args.messages, args.concurrency, args.pool_size))
+
+
+if __name__ == "__main__":
+    main()
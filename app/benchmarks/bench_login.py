@@ -0,0 +1,104 @@
+"""
+Latency benchmark for ``POST /api/auth/login`` under concurrent load.
+
+Compares bcrypt running inline on the event loop ("before") with bcrypt running in the
+hashing executor ("after"). While the logins run, a probe requests ``GET /`` in a loop, so
+the report also shows how long unrelated requests stall behind password hashing.
+
+Usage (from the ``app`` directory)::
+
+    python -m benchmarks.bench_login --requests 64 --concurrency 16
+    HASH_EXECUTOR=process HASH_WORKERS=4 python -m benchmarks.bench_login
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from main import app
+from src.services.hashing import hashing_executor, hash_password
+from benchmarks.common import seed, use_database, percentile
+
+PASSWORD = "benchpass"
+
+
+async def run_load(requests: int, concurrency: int) -> tuple[list[float], list[float], int]:
+    """
+    Sends ``requests`` logins from ``concurrency`` clients while probing ``GET /``.
+
+    :return: Tuple of (login latencies, probe latencies, failed logins).
+    :rtype: tuple[list[float], list[float], int]
+    """
+    logins, probes = [], []
+    failed = 0
+    remaining = requests
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker():
+            nonlocal remaining, failed
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                response = await client.post("/api/auth/login",
+                                             data={"username": "bench@example.com", "password": PASSWORD})
+                if response.status_code == 200:
+                    logins.append(time.perf_counter() - started)
+                else:
+                    failed += 1
+
+        async def probe():
+            while remaining > 0:
+                started = time.perf_counter()
+                await client.get("/")
+                probes.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(probe(), *(worker() for _ in range(concurrency)))
+    return logins, probes, failed
+
+
+async def bench(mode: str, url: str, args) -> None:
+    await seed(url, password=hash_password(PASSWORD))
+    engine = use_database(url)
+    run = hashing_executor.run
+    if mode == "before":
+        async def inline(func, *func_args):
+            return func(*func_args)
+        hashing_executor.run = inline
+    await hashing_executor.start()
+    try:
+        started = time.perf_counter()
+        logins, probes, failed = await run_load(args.requests, args.concurrency)
+        elapsed = time.perf_counter() - started
+    finally:
+        hashing_executor.run = run
+        await hashing_executor.close()
+        await engine.dispose()
+    print(f"{mode:>6}: {len(logins) / elapsed:6.1f} logins/s  "
+          f"login p50 {percentile(logins, 50) * 1000:7.1f} ms  p99 {percentile(logins, 99) * 1000:7.1f} ms  "
+          f"probe p99 {percentile(probes, 99) * 1000:7.1f} ms  failed {failed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="async database URL (default: temporary SQLite file)")
+    parser.add_argument("--mode", choices=["before", "after", "both"], default="both")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        modes = ["after", "before"] if args.mode == "both" else [args.mode]
+        print(f"POST /api/auth/login  requests={args.requests}  concurrency={args.concurrency}  "
+              f"executor={hashing_executor.kind}x{hashing_executor.workers}")
+        for mode in modes:
+            asyncio.run(bench(mode, url, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Microbenchmark of the response serialization of contact pages.
+
+Serializes the same in-memory contacts three ways and reports the time per page and per row:
+
+* "fastapi": what a route with ``response_model=List[ContactResponse]`` does, validating every row
+  into ``ContactResponse``, converting it to JSON-compatible data and rendering a ``JSONResponse``;
+* "pydantic": validating with a ``TypeAdapter`` and dumping JSON in one pydantic-core call, as the
+  contact list cache does when ``FAST_JSON_RESPONSES`` is disabled;
+* "fast": ``src.services.fast_json``, encoding the rows directly with orjson.
+
+No database is involved, so the numbers are the serialization cost alone.
+
+Usage (from the ``app`` directory)::
+
+    python -m benchmarks.bench_serialization --sizes 1 10 100 1000
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import date, datetime
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import TypeAdapter
+
+from src.database.models import Contact
+from src.schemas import ContactResponse
+from src.services import fast_json
+
+FIELD = create_response_field(name="response", type_=List[ContactResponse])
+ADAPTER = TypeAdapter(List[ContactResponse])
+
+
+def make_contacts(size: int) -> list[Contact]:
+    """
+    Builds ``size`` transient contacts as the repository would load them.
+    """
+    return [Contact(id=i, name=f"name{i}", surname=f"surname{i}", email=f"contact{i}@example.com",
+                    phone="tel:+380-50-123-4567", birthday=date(1990, 1 + i % 12, 1 + i % 28), address="bench",
+                    created_at=datetime(2024, 5, 1, 12, 0, 0, 123456), updated_at=datetime(2024, 5, 2, 12, 0))
+            for i in range(size)]
+
+
+async def encode_fastapi(contacts: list[Contact]) -> bytes:
+    content = await serialize_response(field=FIELD, response_content=contacts)
+    return JSONResponse(content).body
+
+
+async def encode_pydantic(contacts: list[Contact]) -> bytes:
+    return ADAPTER.dump_json(ADAPTER.validate_python(contacts, from_attributes=True))
+
+
+async def encode_fast(contacts: list[Contact]) -> bytes:
+    return fast_json.dumps(contacts)
+
+
+ENCODERS = {"fastapi": encode_fastapi, "pydantic": encode_pydantic, "fast": encode_fast}
+
+
+async def measure(encode, contacts: list[Contact], budget: float) -> float:
+    """
+    Runs ``encode`` repeatedly for about ``budget`` seconds.
+
+    :return: The mean time per call, in seconds.
+    :rtype: float
+    """
+    await encode(contacts)
+    calls, started = 0, time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < budget:
+        await encode(contacts)
+        calls += 1
+    return elapsed / calls
+
+
+async def bench(sizes: list[int], budget: float) -> None:
+    print(f"{'rows':>6} {'encoder':>9} {'per page':>12} {'per row':>10} {'speedup':>8}")
+    for size in sizes:
+        contacts = make_contacts(size)
+        outputs = {name: json.loads(await encode(contacts)) for name, encode in ENCODERS.items()}
+        assert outputs["fast"] == outputs["fastapi"] == outputs["pydantic"], "encoders disagree"
+        baseline = None
+        for name, encode in ENCODERS.items():
+            seconds = await measure(encode, contacts, budget)
+            baseline = baseline or seconds
+            print(f"{size:>6} {name:>9} {seconds * 1e6:>9.1f} us {seconds * 1e6 / size:>7.2f} us "
+                  f"{baseline / seconds:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000], help="page sizes to measure")
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds spent on each encoder and page size")
+    args = parser.parse_args()
+    asyncio.run(bench(args.sizes, args.budget))
+
+
+if __name__ == "__main__":
+    main()
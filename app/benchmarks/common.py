@@ -0,0 +1,89 @@
+"""
+Helpers shared by the benchmark scripts: seeding a throwaway database and wiring the app to it.
+"""
+import statistics
+from datetime import date
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
+
+from main import app
+from src.database.db import get_db
+from src.database.models import Base, Contact, User
+from src.services.auth import auth_service
+from src.services.rate_limit import rate_limiter
+
+
+def disable_rate_limits() -> None:
+    """
+    Overrides the rate limiter dependency of the app with a no-op so the benchmark is not throttled.
+    """
+    async def no_limit():
+        return None
+
+    app.dependency_overrides[rate_limiter] = no_limit
+
+
+async def seed(url: str, contacts: int = 0, password: str = "x") -> int:
+    """
+    Recreates the schema and inserts one confirmed user owning ``contacts`` contacts.
+
+    :param url: Async database URL to seed.
+    :type url: str
+    :param contacts: Number of contacts to insert.
+    :type contacts: int
+    :param password: Value stored in the user's password column (pass a bcrypt hash for login benchmarks).
+    :type password: str
+    :return: The id of the seeded user.
+    :rtype: int
+    """
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        result = await conn.execute(insert(User).values(username="bench", email="bench@example.com",
+                                                        password=password, confirmed=True).returning(User.id))
+        user_id = result.scalar_one()
+        if contacts:
+            rows = [dict(name=f"name{i}", surname=f"surname{i}", email=f"contact{i}@example.com",
+                         phone="+380999999999", birthday=date(1990, 1 + i % 12, 1 + i % 28),
+                         address="bench", user_id=user_id) for i in range(contacts)]
+            await conn.execute(insert(Contact), rows)
+    await engine.dispose()
+    return user_id
+
+
+def use_database(url: str, user_id: int | None = None) -> AsyncEngine:
+    """
+    Points ``get_db`` at ``url`` and, if ``user_id`` is given, authenticates every request as that user.
+
+    :return: The engine backing the overridden sessions; dispose it when the run is over.
+    :rtype: AsyncEngine
+    """
+    engine = create_async_engine(url)
+    BenchSession = async_sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+    async def override_get_db():
+        db = BenchSession()
+        try:
+            yield db
+        finally:
+            await db.close()
+
+    async def override_current_user():
+        return User(id=user_id, email="bench@example.com", username="bench")
+
+    app.dependency_overrides[get_db] = override_get_db
+    if user_id is not None:
+        app.dependency_overrides[auth_service.get_current_user] = override_current_user
+    disable_rate_limits()
+    return engine
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """
+    Returns the ``pct`` percentile (0-100) of ``samples``.
+    """
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method="inclusive")[int(pct) - 1]
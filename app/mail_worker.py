@@ -0,0 +1,42 @@
+import os
+import signal
+import socket
+import asyncio
+import logging
+
+import redis.asyncio as redis
+
+from src.conf.config import settings
+from src.services.email import mail_sender
+from src.services.mail_queue import MailWorker
+
+logger = logging.getLogger("mail_worker")
+
+
+async def run():
+    """
+    Runs a mail queue consumer until SIGINT or SIGTERM.
+
+    The worker connects to the Redis server of the application, starts the pooled mail sender and processes the
+    outbound mail queue. On shutdown it finishes the batch in progress, sends what the mail sender still holds and
+    closes its connections. Start as many workers as needed; each joins the consumer group under its own name.
+    """
+    r = redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0, encoding="utf-8",
+                    decode_responses=True)
+    await mail_sender.start()
+    worker = MailWorker(r, mail_sender, name=f"{socket.gethostname()}-{os.getpid()}")
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, worker.stop)
+    logger.info("Mail worker %s started", worker.name)
+    try:
+        await worker.run()
+    finally:
+        await mail_sender.close()
+        await r.close(True)
+        logger.info("Mail worker %s stopped", worker.name)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(run())
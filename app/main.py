@@ -3,17 +3,28 @@ import signal
 import uvicorn
 import logging
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from contextlib import asynccontextmanager
 
 import uvicorn.logging
 import redis.asyncio as redis
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy.exc import SQLAlchemyError
 
-from fastapi_limiter import FastAPILimiter
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 from src.conf.config import settings
-from src.database.db import engine
+from src.database.db import engine, SessionLocal
+from src.repository import contacts as repository_contacts
 from src.routes import contacts, auth, users
+from src.services.avatars import avatar_resolver, avatar_uploader
+from src.services.cache import contact_list_cache, user_cache
+from src.services.email import mail_sender
+from src.services.etag import collection_versions
+from src.services.hashing import hashing_executor
+from src.services.mail_queue import mail_queue
+from src.services.metrics import PrometheusMiddleware, track_queries
+from src.services.rate_limit import rate_limiter
 
 logger = logging.getLogger(uvicorn.logging.__name__)
 
@@ -26,10 +37,11 @@ async def lifespan(_):
     This is an asynchronous context manager that manages the lifespan of the application.
 
     During the startup phase, it initializes the logger, establishes a connection to the Redis server, 
-    and initializes the FastAPILimiter.
+    and initializes the rate limiter, the user cache, the contact list cache, the contacts collection versions, the password hashing executor, the mail sender, the mail queue, the avatar uploader and the default avatar resolver.
+    It also logs the contact filter attributes that have no covering per-user index.
 
     During the shutdown phase, it disposes the engine, closes the Redis connection, 
-    and closes the FastAPILimiter. It also logs the shutdown message.
+    and closes the rate limiter, the user cache, the contact list cache, the contacts collection versions, the password hashing executor, the mail sender, sending the emails still queued in process, the mail queue, the avatar uploader and the default avatar resolver. It also logs the shutdown message.
 
     :param _: This parameter is not used in the function.
     :type _: Any
@@ -45,17 +57,53 @@ async def lifespan(_):
                           db=0, encoding="utf-8",
                           decode_responses=True
                           )
-    await FastAPILimiter.init(r)
+    await rate_limiter.init(r)
+    await user_cache.init(r)
+    await contact_list_cache.init(r)
+    await collection_versions.init(r)
+    await hashing_executor.start()
+    await mail_sender.start()
+    await mail_queue.init(r)
+    await avatar_uploader.start()
+    await avatar_resolver.start()
+    await report_filter_indexes()
     yield
     #shutdown logic goes here    
-    engine.dispose()
+    await engine.dispose()
     await r.close(True)
-    await FastAPILimiter.close()
+    await rate_limiter.close()
+    await user_cache.close()
+    await contact_list_cache.close()
+    await collection_versions.close()
+    await hashing_executor.close()
+    await mail_sender.close()
+    await mail_queue.close()
+    await avatar_uploader.close()
+    await avatar_resolver.close()
     logger.info("Good bye, Mr. Anderson")
 
 
+async def report_filter_indexes():
+    """
+    Logs the parse_filter attributes of contacts that are not covered by a (user_id, attribute) index.
+
+    The check is advisory: database errors are logged and do not prevent the application from starting.
+    """
+    try:
+        async with SessionLocal() as db:
+            uncovered = await repository_contacts.get_uncovered_filter_attributes(db)
+    except SQLAlchemyError as err:
+        logger.warning("Skipped contact filter index check: %s", err)
+        return
+    if uncovered:
+        logger.warning("Contact filters without a (user_id, attribute) index: %s", ", ".join(uncovered))
+
+
 app = FastAPI(lifespan=lifespan)
 
+track_queries(engine)
+app.add_middleware(PrometheusMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -68,9 +116,24 @@ app.include_router(contacts.router, prefix='/api')
 app.include_router(auth.router, prefix='/api')
 app.include_router(users.router, prefix='/api')
 
+if settings.avatar_storage == "local":
+    app.mount(settings.avatar_url_prefix, StaticFiles(directory=settings.avatar_dir, check_dir=False), name="avatars")
+
 @app.get("/")
 def read_root():
     return {"message": "Wake up!"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """
+    Exposes the metrics of this worker in the Prometheus text format: request counts, in-flight requests, latency,
+    database queries and time per route template, and the connection pool.
+
+    :return: The metrics scrape.
+    :rtype: Response
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
     
 
 if __name__ == '__main__':
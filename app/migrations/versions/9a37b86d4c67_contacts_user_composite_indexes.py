@@ -0,0 +1,30 @@
+"""'Contacts per-user composite indexes'
+
+Revision ID: 9a37b86d4c67
+Revises: eeee9cf8be5d
+Create Date: 2024-06-04 09:41:07.552918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a37b86d4c67'
+down_revision: Union[str, None] = 'eeee9cf8be5d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contacts_user_id_surname_name', 'contacts', ['user_id', 'surname', 'name'], unique=False)
+    op.create_index('ix_contacts_user_id_email', 'contacts', ['user_id', 'email'], unique=False)
+    op.create_index('ix_contacts_user_id_id', 'contacts', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id_id', table_name='contacts')
+    op.drop_index('ix_contacts_user_id_email', table_name='contacts')
+    op.drop_index('ix_contacts_user_id_surname_name', table_name='contacts')
@@ -0,0 +1,29 @@
+"""'Contacts search vector index'
+
+Revision ID: e6e213a2795f
+Revises: 9a37b86d4c67
+Create Date: 2024-06-05 14:22:31.904127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6e213a2795f'
+down_revision: Union[str, None] = '9a37b86d4c67'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX ix_contacts_search_vector ON contacts USING gin "
+        "(to_tsvector('simple', lower(name || ' ' || surname || ' ' || email || ' ' || phone || ' ' || coalesce(address, ''))))"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_search_vector', table_name='contacts')
@@ -0,0 +1,28 @@
+"""'Birthday month/day index'
+
+Revision ID: eeee9cf8be5d
+Revises: 8a85b1da2217
+Create Date: 2024-06-03 10:12:45.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'eeee9cf8be5d'
+down_revision: Union[str, None] = '8a85b1da2217'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contacts_user_id_birthday_md', 'contacts',
+                    ['user_id', sa.text('(EXTRACT(month FROM birthday) * 100 + EXTRACT(day FROM birthday))')],
+                    unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id_birthday_md', table_name='contacts')
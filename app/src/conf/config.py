@@ -6,6 +6,12 @@ env_file = Path(__file__).parent.parent.parent.parent / ".env"
 
 class Settings(BaseSettings):
     sqlalchemy_database_url: str
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    server_timing: bool = False
     secret_key: str
     algorithm: str
     mail_username: str
@@ -22,6 +28,51 @@ class Settings(BaseSettings):
     cloudinary_name: str
     cloudinary_api_key: str
     cloudinary_api_secret: str
+    rate_limiter_algorithm: str = "sliding_window"
+    rate_limiter_timeout: float = 0.05
+    rate_limiter_cooldown: float = 5
+    rate_limiter_export_weight: int = 3
+    rate_limiter_bulk_weight: int = 5
+    user_cache_size: int = 1024
+    user_cache_ttl: int = 300
+    user_cache_local_ttl: int = 5
+    token_cache_size: int = 4096
+    contact_list_cache_ttl: int = 60
+    mail_pool_size: int = 2
+    mail_batch_size: int = 50
+    mail_idle_timeout: float = 30
+    mail_queue_size: int = 10000
+    mail_max_attempts: int = 5
+    mail_retry_backoff: float = 30
+    mail_claim_idle: float = 60
+    mail_dedupe_ttl: int = 604800
+    avatar_storage: str = "cloudinary"
+    avatar_dir: str = "avatars"
+    avatar_url_prefix: str = "/avatars"
+    avatar_size: int = 250
+    avatar_max_bytes: int = 5242880
+    avatar_workers: int = 4
+    avatar_queue_size: int = 16
+    avatar_retry_after: int = 2
+    avatar_resolver: str = "gravatar"
+    gravatar_base_url: str = "https://www.gravatar.com/avatar/"
+    gravatar_check: bool = False
+    gravatar_timeout: float = 2
+    gravatar_cache_size: int = 4096
+    gravatar_cache_ttl: int = 86400
+    hash_executor: str = "thread"
+    hash_workers: int = 0
+    hash_queue_size: int = 64
+    hash_retry_after: int = 1
+    birthday_window_days: int = 7
+    batch_get_max_ids: int = 100
+    bulk_import_batch_size: int = 1000
+    bulk_import_max_rows: int = 50000
+    bulk_change_max_ids: int = 10000
+    export_batch_size: int = 1000
+    fast_json_responses: bool = False
+    changes_page_size: int = 500
+    changes_horizon_seconds: int = 5
 
     model_config = ConfigDict(extra='ignore', env_file=env_file if env_file.exists() else None, env_file_encoding = "utf-8")
 
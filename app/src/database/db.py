@@ -1,36 +1,45 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from src.conf.config import settings
+from src.database.pool import InstrumentedPool, pool_metrics
 
 
 SQLALCHEMY_DATABASE_URL = settings.sqlalchemy_database_url
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_async_engine(SQLALCHEMY_DATABASE_URL,
+                             poolclass=InstrumentedPool,
+                             pool_size=settings.db_pool_size,
+                             max_overflow=settings.db_max_overflow,
+                             pool_timeout=settings.db_pool_timeout,
+                             pool_recycle=settings.db_pool_recycle,
+                             pool_pre_ping=settings.db_pool_pre_ping)
+pool_metrics.register(engine)
 
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects keep their loaded state after commit: the ORM reads generated columns back with INSERT ... RETURNING, so
+# nothing needs to be refreshed or lazily reloaded while the response is serialized.
+SessionLocal = async_sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 
 # Dependency
-def get_db():
+async def get_db():
     """
-    Generator function that yields a new SQLAlchemy SessionLocal instance.
+    Asynchronous generator function that yields a new SQLAlchemy AsyncSession instance.
 
-    This function is a dependency for FastAPI routes. It creates a new SQLAlchemy session, yields it for use in the route, and ensures the session is closed after the route has finished processing.
+    This function is a dependency for FastAPI routes. It creates a new SQLAlchemy async session, yields it for use in the route, and ensures the session is closed after the route has finished processing.
 
     Yields:
-        Session: SQLAlchemy session.
+        AsyncSession: SQLAlchemy async session.
 
     Example:
         >>> from fastapi import Depends
         >>> from .database import get_db
-        >>> 
+        >>>
         >>> @app.get("/items/")
-        >>> async def read_items(db: Session = Depends(get_db)):
-        >>>     items = db.query(Item).all()
+        >>> async def read_items(db: AsyncSession = Depends(get_db)):
+        >>>     items = (await db.execute(select(Item))).scalars().all()
         >>>     return items
     """
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
@@ -2,7 +2,8 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.sql.schema import ForeignKey
 from sqlalchemy.sql.sqltypes import DateTime
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, Date, Boolean, func
+from sqlalchemy import Column, Integer, String, Date, Boolean, Index, func, literal_column
+from sqlalchemy.dialects.postgresql import to_tsvector
 
 
 Base = declarative_base()
@@ -10,6 +11,12 @@ Base = declarative_base()
 
 class Contact(Base):
     __tablename__ = "contacts"
+    __table_args__ = (
+        Index("ix_contacts_user_id_surname_name", "user_id", "surname", "name"),
+        Index("ix_contacts_user_id_email", "user_id", "email"),
+        Index("ix_contacts_user_id_id", "user_id", "id"),
+        Index("ix_contacts_user_id_updated_at", "user_id", "updated_at", "id"),
+    )
     id = Column(Integer, primary_key=True)
     name = Column(String(50), nullable=False, index=True)
     surname = Column(String(80), nullable=False, index=True)
@@ -23,6 +30,41 @@ class Contact(Base):
     user = relationship("User", backref="contacts")
 
 
+# Birthday as a sortable month/day number (e.g. 1231 for December 31st), independent of the year.
+# The literal keeps the expression identical to the one in the index, so Postgres can match them.
+birthday_md = func.extract("month", Contact.birthday) * literal_column("100") + func.extract("day", Contact.birthday)
+
+Index("ix_contacts_user_id_birthday_md", Contact.user_id, birthday_md)
+
+# Lower-cased text searched by the contacts search endpoint, and its full-text vector. Built from immutable
+# functions only, so the same expression backs the GIN index below. The 'simple' configuration keeps names
+# and emails as they are instead of stemming them.
+search_document = func.lower(
+    Contact.name + literal_column("' '") + Contact.surname + literal_column("' '") + Contact.email
+    + literal_column("' '") + Contact.phone + literal_column("' '") + func.coalesce(Contact.address, literal_column("''"))
+)
+search_vector = to_tsvector(literal_column("'simple'"), search_document)
+
+# An expression-only index does not find its table by itself, so it is attached explicitly.
+Contact.__table__.append_constraint(
+    Index("ix_contacts_search_vector", search_vector, postgresql_using="gin").ddl_if(dialect="postgresql")
+)
+
+
+class ContactTombstone(Base):
+    """
+    Records a deleted contact so that delta sync clients learn about the deletion.
+    """
+    __tablename__ = "contact_tombstones"
+    __table_args__ = (
+        Index("ix_contact_tombstones_user_id_deleted_at", "user_id", "deleted_at", "contact_id"),
+    )
+    id = Column(Integer, primary_key=True)
+    contact_id = Column(Integer, nullable=False)
+    user_id = Column("user_id", ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    deleted_at = Column("deleted_at", DateTime, default=func.now(), nullable=False)
+
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True)
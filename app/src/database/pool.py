@@ -0,0 +1,123 @@
+import time
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolMetrics:
+    """
+    Counters and gauges describing the connection pool of the application engine.
+
+    Counters (checkouts, connects, invalidations, timeouts) are fed by SQLAlchemy pool events, wait times by
+    InstrumentedPool, and gauges (checked out, overflow, idle) are read from the pool when a snapshot is taken.
+    A worker process has its own pool, so every worker reports its own numbers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.engine: AsyncEngine | None = None
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Zeroes the counters.
+        """
+        with self._lock:
+            self.checkouts = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def register(self, engine: AsyncEngine) -> None:
+        """
+        Subscribes to the pool events of an engine and reads its gauges from now on.
+
+        :param engine: The application engine.
+        :type engine: AsyncEngine
+        """
+        self.engine = engine
+        event.listen(engine.sync_engine, "checkout", self._on_checkout)
+        event.listen(engine.sync_engine, "connect", self._on_connect)
+        event.listen(engine.sync_engine, "invalidate", self._on_invalidate)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def observe_wait(self, seconds: float, timed_out: bool = False) -> None:
+        """
+        Records how long a checkout waited for a connection.
+
+        :param seconds: The time spent in the pool, including opening a new connection if one was needed.
+        :type seconds: float
+        :param timed_out: Whether the checkout gave up after the pool timeout.
+        :type timed_out: bool
+        """
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        """
+        Returns the current pool metrics.
+
+        :return: Pool configuration, gauges and counters. Gauges are omitted if no engine is registered
+            or its pool is not a queue pool.
+        :rtype: dict
+        """
+        with self._lock:
+            metrics = {
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+            }
+        pool = self.engine.pool if self.engine is not None else None
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            metrics.update(
+                size=pool.size(),
+                max_overflow=pool._max_overflow,
+                checked_out=pool.checkedout(),
+                overflow=max(pool.overflow(), 0),
+                idle=pool.checkedin(),
+            )
+        return metrics
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    The default asyncio queue pool, timing how long every checkout waits for a connection.
+
+    SQLAlchemy has no event for the start of a checkout, so the wait is measured around the pool's internal
+    _do_get and reported to pool_metrics.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.observe_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.observe_wait(time.perf_counter() - started)
+        return connection
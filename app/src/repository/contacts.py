@@ -1,42 +1,131 @@
-from typing import List
-from sqlalchemy import func, and_
-from sqlalchemy.orm import Session
-from src.database.models import Contact, User
-from datetime import datetime, timedelta
+import re
+import json
+import base64
+import binascii
+from typing import AsyncIterator, List, Tuple
+from sqlalchemy import and_, or_, case, delete, false, func, inspect, literal_column, select, true, tuple_, union_all, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert, to_tsquery
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.models import Contact, ContactTombstone, User, birthday_md, search_document, search_vector
+from datetime import date, datetime, timedelta
 from src.schemas import ContactBase, ContactUpdate, ContactResponse
+from src.services.etag import collection_versions
 
 
-async def get_contacts(filter: str | None, skip: int, limit: int, user: User, db: Session) -> List[Contact]:
+async def get_contacts(filter: str | None, skip: int, limit: int, user: User, db: AsyncSession,
+                       cursor: str | None = None) -> List[Contact]:
     """
     Asynchronous function that retrieves a list of contacts for a specific user from the database.
 
     This function queries the database for contacts associated with a specific user. It supports pagination and filtering.
+    When a cursor is given, keyset pagination is used instead of skip: contacts are ordered by id and only those after
+    the cursor position are returned, so every page costs the same regardless of its depth.
 
     Args:
         filter (str | None): A string representing the filter criteria. If None, no filtering is applied.
-        skip (int): The number of records to skip from the start. Used for pagination.
+        skip (int): The number of records to skip from the start. Used for pagination. Ignored when a cursor is given.
         limit (int): The maximum number of records to return. Used for pagination.
         user (User): The user object for which contacts are to be retrieved.
-        db (Session): The SQLAlchemy session object.
+        db (AsyncSession): The SQLAlchemy async session object.
+        cursor (str | None): An opaque cursor returned by encode_cursor, or an empty string for the first page. If None, skip is used.
 
     Returns:
         List[Contact]: A list of Contact objects that match the query.
 
+    Raises:
+        ValueError: If the cursor is malformed.
+
     Example:
         >>> from fastapi import Depends
         >>> from .database import get_db
         >>> 
         >>> @app.get("/contacts/")
-        >>> async def read_contacts(filter: str = None, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+        >>> async def read_contacts(filter: str = None, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
         >>>     contacts = await get_contacts(filter, skip, limit, current_user, db)
         >>>     return contacts
     """
-    query = db.query(Contact).filter(Contact.user_id == user.id)
-    filters = parse_filter(filter)
-    for attr, value in filters.items():
-        query = query.filter(getattr(Contact, attr) == value)
-    query = query.offset(skip).limit(limit)
-    return query.all()
+    query = select(Contact).filter(Contact.user_id == user.id)
+    query = query.filter(*filter_conditions(filter))
+    if cursor is None:
+        query = query.offset(skip)
+    else:
+        if cursor:
+            query = query.filter(Contact.id > decode_cursor(cursor))
+        query = query.order_by(Contact.id)
+    query = query.limit(limit)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def stream_contacts(filter: str | None, user: User, db: AsyncSession,
+                          batch_size: int = 1000) -> AsyncIterator[List[Contact]]:
+    """
+    Asynchronous generator that streams all contacts of a user matching a filter, ordered by id.
+
+    The query runs with a server-side cursor (yield_per), so only one batch of rows is held in memory at a time no
+    matter how large the address book is. The session must stay open until the generator is exhausted.
+
+    Args:
+        filter (str | None): A string representing the filter criteria, as accepted by get_contacts.
+        user (User): The user object whose contacts are streamed.
+        db (AsyncSession): The SQLAlchemy async session object.
+        batch_size (int, optional): The number of rows fetched from the cursor at a time. Defaults to 1000.
+
+    Yields:
+        List[Contact]: Consecutive batches of up to batch_size Contact objects.
+
+    Example:
+        >>> async for contacts in stream_contacts("surname::Brown", current_user, db):
+        >>>     print(len(contacts))
+    """
+    query = select(Contact).filter(Contact.user_id == user.id)
+    query = query.filter(*filter_conditions(filter))
+    query = query.order_by(Contact.id).execution_options(yield_per=batch_size)
+    result = await db.stream_scalars(query)
+    async for contacts in result.partitions():
+        yield contacts
+
+
+def encode_cursor(contact: Contact) -> str:
+    """
+    Function to build an opaque pagination cursor pointing right after the given contact.
+
+    Args:
+        contact (Contact): The last contact of the current page.
+
+    Returns:
+        str: A URL-safe cursor to pass to get_contacts for the next page.
+
+    Example:
+        >>> encode_cursor(Contact(id=42))
+        >>> 'eyJpZCI6IDQyfQ'
+    """
+    raw = json.dumps({"id": contact.id}).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Function to decode a cursor built by encode_cursor back into the contact id it points after.
+
+    Args:
+        cursor (str): The opaque cursor.
+
+    Returns:
+        int: The id of the last contact of the previous page.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)["id"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError) as err:
+        raise ValueError("Invalid cursor") from err
+    if not isinstance(position, int):
+        raise ValueError("Invalid cursor")
+    return position
 
 
 # name::Alan|surname::Brown
@@ -67,7 +156,181 @@ def parse_filter(filter: str | None) -> dict:
     return {}
 
 
-async def get_contact(contact_id: int, user: User, db: Session) -> Contact:
+FILTER_ATTRIBUTES = tuple(column.name for column in Contact.__table__.columns if column.name != "user_id")
+
+
+def filter_conditions(filter: str | None) -> list:
+    """
+    Function to turn a filter string into SQLAlchemy conditions on the Contact columns.
+
+    Values are converted to the Python type of their column (int, date or datetime; ISO 8601 for dates), since asyncpg
+    rejects strings bound against non-text columns. Aware datetimes are converted to naive server time, as stored.
+
+    Args:
+        filter (str | None): A string representing the filter criteria, as accepted by parse_filter.
+
+    Returns:
+        list: SQLAlchemy conditions to pass to where().
+
+    Raises:
+        ValueError: If the filter is malformed, names an unknown attribute, or has a value of the wrong type.
+
+    Example:
+        >>> filter_conditions("id::5|surname::Brown")
+        >>> [Contact.id == 5, Contact.surname == 'Brown']
+    """
+    conditions = []
+    for attr, value in parse_filter(filter).items():
+        if attr not in FILTER_ATTRIBUTES:
+            raise ValueError(f"Unknown filter attribute: {attr}")
+        column = Contact.__table__.c[attr]
+        python_type = column.type.python_type
+        if python_type is int:
+            value = int(value)
+        elif python_type in (date, datetime):
+            value = python_type.fromisoformat(value)
+            if isinstance(value, datetime) and value.tzinfo is not None:
+                value = value.astimezone().replace(tzinfo=None)
+        conditions.append(getattr(Contact, attr) == value)
+    return conditions
+RESPONSE_COLUMNS = tuple(Contact.__table__.c[field] for field in ContactResponse.model_fields)
+
+
+async def get_uncovered_filter_attributes(db: AsyncSession) -> List[str]:
+    """
+    Asynchronous function that reports which filterable Contact attributes lack a covering per-user index.
+
+    Every contacts query starts with user_id = ?, so a filter on an attribute is only served well by an index whose
+    leading columns are (user_id, attribute). This function inspects the indexes that actually exist in the database,
+    so it also catches migrations that have not been applied.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async session object.
+
+    Returns:
+        List[str]: The names of the attributes accepted by parse_filter that have no (user_id, attribute) index.
+
+    Example:
+        >>> await get_uncovered_filter_attributes(db)
+        >>> ['phone', 'birthday', 'created_at', 'updated_at', 'address']
+    """
+    indexes = await db.run_sync(lambda session: inspect(session.connection()).get_indexes(Contact.__tablename__))
+    covered = {tuple(index["column_names"][:2]) for index in indexes}
+    return [attr for attr in FILTER_ATTRIBUTES if ("user_id", attr) not in covered]
+
+
+def encode_sync_cursor(changed_at: datetime, contact_id: int) -> str:
+    """
+    Function to build an opaque delta sync cursor pointing right after a change.
+
+    Args:
+        changed_at (datetime): The time of the change.
+        contact_id (int): The id of the changed or deleted contact.
+
+    Returns:
+        str: A URL-safe cursor to pass to get_changes.
+
+    Example:
+        >>> encode_sync_cursor(datetime(2024, 6, 1, 12, 0), 42)
+        >>> 'eyJ0IjogIjIwMjQtMDYtMDFUMTI6MDA6MDAiLCAiaWQiOiA0Mn0'
+    """
+    raw = json.dumps({"t": changed_at.isoformat(), "id": contact_id}).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_sync_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Function to decode a cursor built by encode_sync_cursor.
+
+    Args:
+        cursor (str): The opaque cursor.
+
+    Returns:
+        Tuple[datetime, int]: The time and contact id of the last change already delivered.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        position = datetime.fromisoformat(raw["t"]), raw["id"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError) as err:
+        raise ValueError("Invalid cursor") from err
+    if not isinstance(position[1], int):
+        raise ValueError("Invalid cursor")
+    return position
+
+
+async def get_changes(since: datetime | None, cursor: str | None, limit: int, user: User, db: AsyncSession,
+                      horizon: int = 5) -> Tuple[List[Contact], List[int], str, bool]:
+    """
+    Asynchronous function that returns the contacts a user created, updated or deleted after a point in time.
+
+    Created and updated contacts are read by (updated_at, id) and deletions by (deleted_at, contact_id), each by keyset
+    from its (user_id, ...) index, and merged in that order, so a sync costs O(changes) rather than O(address book).
+    Pass the returned cursor to the next call.
+
+    A change is timestamped when its transaction starts but only becomes visible when it commits, so a slow writer can
+    commit a change older than changes already delivered. Unless more pages follow, the returned cursor is therefore
+    held back to the database time minus horizon seconds; changes from the last horizon seconds are delivered again by
+    the next call, and clients must apply them idempotently.
+
+    Args:
+        since (datetime | None): Return changes made after this time, taken as server time when naive. If None, every contact is returned. Ignored when a cursor is given.
+        cursor (str | None): The cursor returned by the previous call.
+        limit (int): The maximum number of changes to return.
+        user (User): The user object whose changes are to be retrieved.
+        db (AsyncSession): The SQLAlchemy async session object.
+        horizon (int, optional): Seconds a commit may lag behind its timestamp. Defaults to 5.
+
+    Returns:
+        Tuple[List[Contact], List[int], str, bool]: The created or updated contacts, the ids of deleted contacts, the cursor of the next call, and whether more changes are waiting.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+
+    Example:
+        >>> updated, deleted, cursor, has_more = await get_changes(None, None, 500, current_user, db)
+        >>> updated, deleted, cursor, has_more = await get_changes(None, cursor, 500, current_user, db)
+    """
+    if since is not None and since.tzinfo is not None:
+        # updated_at is naive server time, which aware and naive datetimes cannot be compared with.
+        since = since.astimezone().replace(tzinfo=None)
+    start = decode_sync_cursor(cursor) if cursor else (since or datetime.min, 0)
+    # updated_at stores now() without a time zone, which Postgres spells LOCALTIMESTAMP when read back.
+    postgres = db.get_bind().dialect.name == "postgresql"
+    now = await db.scalar(select(func.localtimestamp() if postgres else func.now()))
+    updated = select(Contact.updated_at.label("changed_at"), Contact.id.label("contact_id"),
+                     false().label("deleted")).filter(Contact.user_id == user.id)
+    deleted = select(ContactTombstone.deleted_at.label("changed_at"), ContactTombstone.contact_id.label("contact_id"),
+                     true().label("deleted")).filter(ContactTombstone.user_id == user.id)
+    if cursor or since:
+        # SQLite stores CURRENT_TIMESTAMP as text without fractional seconds, so both sides are normalised there.
+        at = (lambda value: value) if postgres else func.datetime
+        updated = updated.filter(tuple_(at(Contact.updated_at), Contact.id) > tuple_(at(start[0]), start[1]))
+        deleted = deleted.filter(tuple_(at(ContactTombstone.deleted_at), ContactTombstone.contact_id)
+                                 > tuple_(at(start[0]), start[1]))
+    branches = [select(branch.order_by("changed_at", "contact_id").limit(limit + 1).subquery())
+                for branch in (updated, deleted)]
+    changes = union_all(*branches).subquery()
+    result = await db.execute(select(changes).order_by(changes.c.changed_at, changes.c.contact_id).limit(limit + 1))
+    rows = result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    position = (rows[-1].changed_at, rows[-1].contact_id) if rows else start
+    if not has_more:
+        position = min(position, (now - timedelta(seconds=horizon), 0))
+    ids = [row.contact_id for row in rows if not row.deleted]
+    contacts = []
+    if ids:
+        result = await db.execute(select(Contact).filter(Contact.user_id == user.id, Contact.id.in_(ids))
+                                  .order_by(Contact.updated_at, Contact.id))
+        contacts = result.scalars().all()
+    removed = [row.contact_id for row in rows if row.deleted]
+    return contacts, removed, encode_sync_cursor(*position), has_more
+
+
+async def get_contact(contact_id: int, user: User, db: AsyncSession) -> Contact:
     """
     Asynchronous function that retrieves a specific contact for a user from the database.
 
@@ -76,7 +339,7 @@ async def get_contact(contact_id: int, user: User, db: Session) -> Contact:
     Args:
         contact_id (int): The ID of the contact to retrieve.
         user (User): The user object for which the contact is to be retrieved.
-        db (Session): The SQLAlchemy session object.
+        db (AsyncSession): The SQLAlchemy async session object.
 
     Returns:
         Contact: The Contact object that matches the query.
@@ -86,60 +349,159 @@ async def get_contact(contact_id: int, user: User, db: Session) -> Contact:
         >>> from .database import get_db
         >>> 
         >>> @app.get("/contacts/{contact_id}")
-        >>> async def read_contact(contact_id: int, db: Session = Depends(get_db)):
+        >>> async def read_contact(contact_id: int, db: AsyncSession = Depends(get_db)):
         >>>     contact = await get_contact(contact_id, current_user, db)
         >>>     return contact
     """
-    return db.query(Contact).filter(Contact.user_id == user.id).filter(Contact.id == contact_id).first()
+    query = select(Contact).filter(Contact.user_id == user.id).filter(Contact.id == contact_id)
+    result = await db.execute(query)
+    return result.scalars().first()
 
 
-async def get_contacts_by_birthdays(skip: int, limit: int, user: User, db: Session) -> Contact:
+async def get_contacts_by_ids(contact_ids: List[int], user: User, db: AsyncSession) -> Tuple[List[Contact], List[int]]:
     """
-    Asynchronous function that retrieves contacts for a user from the database whose birthdays are within the next week.
+    Asynchronous function that retrieves many contacts of a user by id with a single query.
 
-    This function queries the database for contacts associated with a user. It filters contacts whose birthdays are within the next 7 days from today.
+    Duplicate ids are looked up once. Ids that do not exist or belong to another user are reported as missing.
+
+    Args:
+        contact_ids (List[int]): The IDs of the contacts to retrieve.
+        user (User): The user object for which the contacts are to be retrieved.
+        db (AsyncSession): The SQLAlchemy async session object.
+
+    Returns:
+        Tuple[List[Contact], List[int]]: The found contacts and the missing IDs, both in the order of contact_ids.
+
+    Example:
+        >>> from fastapi import Depends
+        >>> from .database import get_db
+        >>> 
+        >>> @app.post("/contacts/batch-get")
+        >>> async def batch_get(body: ContactBatchGet, db: AsyncSession = Depends(get_db)):
+        >>>     found, missing = await get_contacts_by_ids(body.ids, current_user, db)
+        >>>     return {"found": found, "missing": missing}
+    """
+    contact_ids = list(dict.fromkeys(contact_ids))
+    query = select(Contact).filter(Contact.user_id == user.id).filter(Contact.id.in_(contact_ids))
+    result = await db.execute(query)
+    contacts = {contact.id: contact for contact in result.scalars().all()}
+    found = [contacts[contact_id] for contact_id in contact_ids if contact_id in contacts]
+    missing = [contact_id for contact_id in contact_ids if contact_id not in contacts]
+    return found, missing
+
+
+def birthday_window(days: int, today: date | None = None) -> tuple[int, int, bool]:
+    """
+    Function to compute the month/day bounds of a birthday window that starts today.
+
+    Month/day values are encoded as month * 100 + day, matching birthday_md in the models, so a window is a plain
+    range of integers. A window that crosses the end of the year wraps around and is returned as two open ranges.
+
+    Args:
+        days (int): The length of the window in days, today included.
+        today (date | None): The first day of the window. Defaults to the current date.
+
+    Returns:
+        tuple[int, int, bool]: The first and last month/day values of the window, and whether it wraps past December 31st.
+
+    Example:
+        >>> birthday_window(7, date(2024, 12, 28))
+        >>> (1228, 103, True)
+    """
+    today = today or date.today()
+    end = today + timedelta(days=days - 1)
+    return today.month * 100 + today.day, end.month * 100 + end.day, end.year != today.year
+
+
+async def get_contacts_by_birthdays(skip: int, limit: int, user: User, db: AsyncSession, days: int = 7) -> List[Contact]:
+    """
+    Asynchronous function that retrieves contacts for a user from the database whose birthdays are within the next days.
+
+    This function queries the database for contacts associated with a user. It filters contacts whose birthdays are within the given number of days from today, handling windows that cross a month or year end, and orders them by upcoming birthday.
+    The filter compares birthday_md against a range, so it is served by the (user_id, birthday_md) expression index.
 
     Args:
         skip (int): The number of records to skip from the start. Used for pagination.
         limit (int): The maximum number of records to return. Used for pagination.
         user (User): The user object for which contacts are to be retrieved.
-        db (Session): The SQLAlchemy session object.
+        db (AsyncSession): The SQLAlchemy async session object.
+        days (int): The length of the window in days, today included. Defaults to 7.
 
     Returns:
-        Contact: The Contact objects that match the query.
+        List[Contact]: The Contact objects that match the query.
 
     Example:
         >>> from fastapi import Depends
         >>> from .database import get_db
         >>> 
         >>> @app.get("/contacts/birthdays")
-        >>> async def read_contacts_by_birthdays(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-        >>>     contacts = await get_contacts_by_birthdays(skip, limit, current_user, db)
+        >>> async def read_contacts_by_birthdays(skip: int = 0, limit: int = 100, days: int = 7, db: AsyncSession = Depends(get_db)):
+        >>>     contacts = await get_contacts_by_birthdays(skip, limit, current_user, db, days)
         >>>     return contacts
     """
-    from_date = datetime.today()
-    to_date = datetime.today() + timedelta(days=7)
-    query = db.query(Contact).filter(Contact.user_id == user.id)
-    query = query.filter(
-        and_(
-            func.extract("month", Contact.birthday) == func.extract("month", from_date),
-            func.extract("day", Contact.birthday) >= func.extract("day", from_date),
-            func.extract("day", Contact.birthday) < func.extract("day", to_date)
-        )
-    )
-    return query.all()
+    query = select(Contact).filter(Contact.user_id == user.id)
+    start, end, wraps = birthday_window(min(days, 366))
+    if wraps:
+        if days < 366:
+            query = query.filter(or_(birthday_md >= start, birthday_md <= end))
+        query = query.order_by(case((birthday_md >= start, 0), else_=1))
+    else:
+        query = query.filter(and_(birthday_md >= start, birthday_md <= end))
+    query = query.order_by(birthday_md, Contact.id).offset(skip).limit(limit)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def search_contacts(q: str, limit: int, user: User, db: AsyncSession) -> List[Contact]:
+    """
+    Asynchronous function that searches a user's contacts by name, surname, email, phone and address.
+
+    Every word of the query must match, and the last word may be incomplete, so it can back type-ahead inputs. On
+    Postgres every word is a prefix match against search_vector, served by the GIN index, and results are ranked with
+    ts_rank. Other databases (SQLite in tests) fall back to case-insensitive substring matching on search_document,
+    ranking contacts whose name or surname starts with the first word first.
 
+    Args:
+        q (str): The search query.
+        limit (int): The maximum number of records to return.
+        user (User): The user object whose contacts are searched.
+        db (AsyncSession): The SQLAlchemy async session object.
+
+    Returns:
+        List[Contact]: The matching Contact objects, best matches first.
 
-async def create_contact(body: ContactBase, user: User, db: Session) -> Contact:
+    Example:
+        >>> contacts = await search_contacts("ala bro", 20, current_user, db)
+    """
+    terms = re.findall(r"\w+", q.lower())
+    if not terms:
+        return []
+    query = select(Contact).filter(Contact.user_id == user.id)
+    if db.get_bind().dialect.name == "postgresql":
+        ts_query = to_tsquery(literal_column("'simple'"), " & ".join(f"{term}:*" for term in terms))
+        query = query.filter(search_vector.bool_op("@@")(ts_query))
+        query = query.order_by(func.ts_rank(search_vector, ts_query).desc())
+    else:
+        for term in terms:
+            query = query.filter(search_document.contains(term, autoescape=True))
+        prefix = or_(func.lower(Contact.name).startswith(terms[0], autoescape=True),
+                     func.lower(Contact.surname).startswith(terms[0], autoescape=True))
+        query = query.order_by(case((prefix, 0), else_=1))
+    query = query.order_by(Contact.surname, Contact.name, Contact.id).limit(limit)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def create_contact(body: ContactBase, user: User, db: AsyncSession) -> Contact:
     """
     Asynchronous function that creates a new contact for a user in the database.
 
-    This function takes a ContactBase object, a User object, and a SQLAlchemy session as input. It creates a new Contact object, adds it to the session, commits the session, refreshes the contact object, and returns it.
+    This function takes a ContactBase object, a User object, and a SQLAlchemy session as input. It creates a new Contact object, adds it to the session, commits the session, bumps the user's collection version, and returns it. The id and timestamps are read back by the INSERT itself (RETURNING), so the contact is not refreshed.
 
     Args:
         body (ContactBase): The ContactBase object containing the details of the contact to be created.
         user (User): The User object for which the contact is to be created.
-        db (Session): The SQLAlchemy session object.
+        db (AsyncSession): The SQLAlchemy async session object.
 
     Returns:
         Contact: The newly created Contact object.
@@ -149,7 +511,7 @@ async def create_contact(body: ContactBase, user: User, db: Session) -> Contact:
         >>> from .database import get_db
         >>> 
         >>> @app.post("/contacts/")
-        >>> async def create_new_contact(body: ContactBase, db: Session = Depends(get_db)):
+        >>> async def create_new_contact(body: ContactBase, db: AsyncSession = Depends(get_db)):
         >>>     contact = await create_contact(body, current_user, db)
         >>>     return contact
     """
@@ -160,24 +522,62 @@ async def create_contact(body: ContactBase, user: User, db: Session) -> Contact:
         phone=body.phone, 
         birthday=body.birthday, 
         address=body.address,
-        user=user
+        user_id=user.id
         )
     db.add(contact)
-    db.commit()
-    db.refresh(contact)
+    await db.commit()
+    await collection_versions.bump(user.id)
     return contact
 
 
-async def remove_contact(contact_id: int, user: User, db: Session) -> Contact | None:
+async def create_contacts(contacts: List[Tuple[int, ContactBase]], user: User, db: AsyncSession,
+                          batch_size: int = 1000) -> Tuple[int, List[dict]]:
+    """
+    Asynchronous function that creates many contacts for a user in batches.
+
+    Each batch is a single multi-row INSERT ... ON CONFLICT (email) DO NOTHING RETURNING email, so one round-trip
+    inserts up to batch_size rows, and rows whose email is already taken are skipped and reported instead of aborting
+    the import. Everything is committed once at the end, then the user's collection version is bumped.
+
+    Args:
+        contacts (List[Tuple[int, ContactBase]]): The contacts to create, each with its index in the upload.
+        user (User): The User object for which the contacts are to be created.
+        db (AsyncSession): The SQLAlchemy async session object.
+        batch_size (int, optional): The number of rows per INSERT statement. Defaults to 1000.
+
+    Returns:
+        Tuple[int, List[dict]]: The number of created contacts, and an error for every skipped row.
+
+    Example:
+        >>> created, errors = await create_contacts([(0, body)], current_user, db)
+    """
+    insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    created, errors = 0, []
+    for start in range(0, len(contacts), batch_size):
+        batch = contacts[start:start + batch_size]
+        rows = [dict(body.model_dump(), user_id=user.id) for _, body in batch]
+        stmt = insert(Contact).values(rows).on_conflict_do_nothing(index_elements=[Contact.email])
+        result = await db.execute(stmt.returning(Contact.email))
+        inserted = set(result.scalars().all())
+        created += len(inserted)
+        errors.extend({"index": index, "detail": "Email already exists"}
+                      for index, body in batch if body.email not in inserted)
+    await db.commit()
+    if created:
+        await collection_versions.bump(user.id)
+    return created, errors
+
+
+async def remove_contact(contact_id: int, user: User, db: AsyncSession) -> Contact | None:
     """
     Asynchronous function that removes a specific contact for a user from the database.
 
-    This function queries the database for a specific contact associated with a user. If the contact exists, it deletes the contact from the database and commits the changes.
+    This function queries the database for a specific contact associated with a user. If the contact exists, it deletes the contact from the database, records a tombstone for delta sync clients, commits the changes, and bumps the user's collection version.
 
     Args:
         contact_id (int): The ID of the contact to be removed.
         user (User): The user object for which the contact is to be removed.
-        db (Session): The SQLAlchemy session object.
+        db (AsyncSession): The SQLAlchemy async session object.
 
     Returns:
         Contact | None: The removed Contact object if it exists, otherwise None.
@@ -187,50 +587,165 @@ async def remove_contact(contact_id: int, user: User, db: Session) -> Contact |
         >>> from .database import get_db
         >>> 
         >>> @app.delete("/contacts/{contact_id}")
-        >>> async def delete_contact(contact_id: int, db: Session = Depends(get_db)):
+        >>> async def delete_contact(contact_id: int, db: AsyncSession = Depends(get_db)):
         >>>     contact = await remove_contact(contact_id, current_user, db)
         >>>     return contact
     """
-    contact = db.query(Contact).filter(Contact.user_id == user.id).filter(Contact.id == contact_id).first()
+    contact = await get_contact(contact_id, user, db)
     if contact:
-        db.delete(contact)
-        db.commit()
+        await db.delete(contact)
+        db.add(ContactTombstone(contact_id=contact.id, user_id=user.id))
+        await db.commit()
+        await collection_versions.bump(user.id)
     return contact
 
 
-async def update_contact(contact_id: int, body: ContactUpdate, user: User, db: Session) -> Contact | None:
+async def update_contact(contact_id: int, body: ContactUpdate, user: User, db: AsyncSession) -> Contact | None:
     """
     Asynchronous function that updates a specific contact for a user in the database.
 
-    This function queries the database for a specific contact associated with a user. If the contact exists, it updates the contact's details with the provided information and commits the changes.
+    This function runs a single UPDATE ... RETURNING statement that sets only the fields the client sent (see changed_values) and the update time of the contact associated with the user, commits the changes, and bumps the user's collection version. If no field was sent, the contact is returned unchanged.
 
     Args:
         contact_id (int): The ID of the contact to be updated.
         body (ContactUpdate): The ContactUpdate object containing the updated details of the contact.
         user (User): The user object for which the contact is to be updated.
-        db (Session): The SQLAlchemy session object.
+        db (AsyncSession): The SQLAlchemy async session object.
 
     Returns:
-        Contact | None: The updated Contact object if it exists, otherwise None.
+        Contact | None: The updated contact, built from the returned row and not attached to the session, if it exists, otherwise None.
 
     Example:
         >>> from fastapi import Depends
         >>> from .database import get_db
         >>> 
         >>> @app.put("/contacts/{contact_id}")
-        >>> async def update_existing_contact(contact_id: int, body: ContactUpdate, db: Session = Depends(get_db)):
+        >>> async def update_existing_contact(contact_id: int, body: ContactUpdate, db: AsyncSession = Depends(get_db)):
         >>>     contact = await update_contact(contact_id, body, current_user, db)
         >>>     return contact
     """
-    contact = db.query(Contact).filter(Contact.user_id == user.id).filter(Contact.id == contact_id).first()
-    if contact:
-        contact.name=body.name or contact.name, 
-        contact.surname=body.surname or contact.surname, 
-        contact.email=body.email or contact.email, 
-        contact.phone=body.phone or contact.phone, 
-        contact.birthday=body.birthday or contact.birthday, 
-        contact.address=body.address or contact.address
-        contact.updated_at = func.now() if body.is_dirty else contact.updated_at
-        db.add(contact)
-        db.commit()
-    return contact
+    values = changed_values(body)
+    if not values:
+        return await get_contact(contact_id, user, db)
+    stmt = (update(Contact).where(Contact.user_id == user.id, Contact.id == contact_id)
+            .values(**values, updated_at=func.now()).returning(*Contact.__table__.c)
+            .execution_options(synchronize_session=False))
+    result = await db.execute(stmt)
+    row = result.mappings().first()
+    await db.commit()
+    if row is None:
+        return None
+    await collection_versions.bump(user.id)
+    return Contact(**row)
+
+
+def changed_values(body: ContactUpdate) -> dict:
+    """
+    Function to pick the columns an update should set: the fields the client sent.
+
+    Fields left out of the request are not touched. An explicit null is applied only to nullable columns (address),
+    so that it clears the value; for required columns it is ignored.
+
+    Args:
+        body (ContactUpdate): The ContactUpdate object as parsed from the request.
+
+    Returns:
+        dict: The new values by column name.
+
+    Example:
+        >>> changed_values(ContactUpdate(surname="Brown", address=None))
+        >>> {'surname': 'Brown', 'address': None}
+    """
+    return {field: value for field, value in body.model_dump(exclude_unset=True).items()
+            if value is not None or Contact.__table__.c[field].nullable}
+
+
+def selection(user: User, contact_ids: List[int] | None = None, filter: str | None = None) -> list:
+    """
+    Function to build the WHERE conditions selecting a user's contacts by id, by filter, or both.
+
+    Args:
+        user (User): The user whose contacts are selected.
+        contact_ids (List[int] | None): The IDs of the contacts. If None, ids do not restrict the selection.
+        filter (str | None): A string representing the filter criteria, as accepted by get_contacts.
+
+    Returns:
+        list: SQLAlchemy conditions to pass to where().
+    """
+    conditions = [Contact.user_id == user.id]
+    if contact_ids is not None:
+        conditions.append(Contact.id.in_(contact_ids))
+    conditions.extend(filter_conditions(filter))
+    return conditions
+
+
+async def update_contacts(body: ContactUpdate, user: User, db: AsyncSession, contact_ids: List[int] | None = None,
+                          filter: str | None = None, returning: bool = False) -> Tuple[int, List[dict] | None]:
+    """
+    Asynchronous function that applies the same changes to many contacts of a user with one UPDATE statement.
+
+    Only the fields the client sent are set, as in update_contact. The update, the commit and the collection version
+    bump happen once for the whole selection.
+
+    Args:
+        body (ContactUpdate): The changes to apply.
+        user (User): The user whose contacts are updated.
+        db (AsyncSession): The SQLAlchemy async session object.
+        contact_ids (List[int] | None): The IDs of the contacts to update. Defaults to None.
+        filter (str | None): A string representing the filter criteria, as accepted by get_contacts. Defaults to None.
+        returning (bool): Whether to return the updated contacts, read with UPDATE ... RETURNING. Defaults to False.
+
+    Returns:
+        Tuple[int, List[dict] | None]: The number of updated contacts, and their ContactResponse fields if returning is set.
+
+    Example:
+        >>> count, _ = await update_contacts(ContactUpdate(address="Kyiv"), current_user, db, filter="surname::Brown")
+    """
+    values = changed_values(body)
+    stmt = (update(Contact).where(*selection(user, contact_ids, filter)).values(**values, updated_at=func.now())
+            .execution_options(synchronize_session=False))
+    contacts = None
+    if returning:
+        result = await db.execute(stmt.returning(*RESPONSE_COLUMNS))
+        contacts = [dict(row) for row in result.mappings().all()]
+        count = len(contacts)
+    else:
+        result = await db.execute(stmt)
+        count = result.rowcount
+    await db.commit()
+    if count:
+        await collection_versions.bump(user.id)
+    return count, contacts
+
+
+async def remove_contacts(user: User, db: AsyncSession, contact_ids: List[int] | None = None,
+                          filter: str | None = None, returning: bool = False) -> Tuple[int, List[dict] | None]:
+    """
+    Asynchronous function that removes many contacts of a user with one DELETE statement.
+
+    The ids of the deleted contacts are read with DELETE ... RETURNING to record their tombstones for delta sync
+    clients in the same transaction. The commit and the collection version bump happen once for the whole selection.
+
+    Args:
+        user (User): The user whose contacts are removed.
+        db (AsyncSession): The SQLAlchemy async session object.
+        contact_ids (List[int] | None): The IDs of the contacts to remove. Defaults to None.
+        filter (str | None): A string representing the filter criteria, as accepted by get_contacts. Defaults to None.
+        returning (bool): Whether to return the removed contacts. Defaults to False.
+
+    Returns:
+        Tuple[int, List[dict] | None]: The number of removed contacts, and their ContactResponse fields if returning is set.
+
+    Example:
+        >>> count, _ = await remove_contacts(current_user, db, contact_ids=[1, 2, 3])
+    """
+    stmt = delete(Contact).where(*selection(user, contact_ids, filter)).execution_options(synchronize_session=False)
+    result = await db.execute(stmt.returning(*RESPONSE_COLUMNS) if returning else stmt.returning(Contact.id))
+    rows = result.mappings().all()
+    if rows:
+        tombstones = [{"contact_id": row["id"], "user_id": user.id} for row in rows]
+        await db.execute(ContactTombstone.__table__.insert(), tombstones)
+    await db.commit()
+    if rows:
+        await collection_versions.bump(user.id)
+    return len(rows), [dict(row) for row in rows] if returning else None
@@ -1,82 +1,101 @@
-from libgravatar import Gravatar
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import User
 from src.schemas import UserModel
+from src.services.cache import user_cache
 
-async def get_user_by_email(email: str, db: Session) -> User:
+async def get_user_by_email(email: str, db: AsyncSession) -> User:
     """
     Fetch a user from the database by their email.
 
     Args:
         email (str): The email of the user to fetch.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         User: The user object if found, else None.
     """
-    return db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).filter(User.email == email))
+    return result.scalars().first()
 
-async def create_user(body: UserModel, db: Session) -> User:
+async def create_user(body: UserModel, db: AsyncSession) -> User:
     """
-    Create a new user in the database.
+    Create a new user in the database, without an avatar. The default avatar is set afterwards by
+    set_default_avatar, outside of the signup transaction.
 
     Args:
         body (UserModel): The user data.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         User: The created user object.
     """
-    avatar = None
-    try:
-        g = Gravatar(body.email)
-        avatar = g.get_image()
-    except Exception as e:
-        print(e)
-    new_user = User(**body.model_dump(), avatar=avatar)
+    new_user = User(**body.model_dump())
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
     return new_user
 
-async def confirmed_email(email: str, db: Session) -> None:
+async def confirmed_email(email: str, db: AsyncSession) -> None:
     """
-    Confirm the email of a user.
+    Confirm the email of a user and drop it from the user cache.
 
     Args:
         email (str): The email of the user to confirm.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
     """
     user = await get_user_by_email(email, db)
     user.confirmed = True
-    db.commit()
+    await db.commit()
+    await user_cache.invalidate(email)
 
-async def update_token(user: User, token: str | None, db: Session) -> None:
+async def update_token(user: User, token: str | None, db: AsyncSession) -> None:
     """
-    Update the refresh token of a user.
+    Update the refresh token of a user and drop it from the user cache.
 
     Args:
         user (User): The user object.
         token (str | None): The new refresh token.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
     """
+    email = user.email
     user.refresh_token = token
-    db.commit()
+    await db.commit()
+    await user_cache.invalidate(email)
 
-async def update_avatar(email, url: str, db: Session) -> User:
+async def update_avatar(email, url: str, db: AsyncSession) -> User:
     """
-    Update the avatar of a user.
+    Update the avatar of a user and drop it from the user cache.
 
     Args:
         email (str): The email of the user.
         url (str): The new avatar URL.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         User: The updated user object.
     """
     user = await get_user_by_email(email, db)
     user.avatar = url
-    db.commit()
+    await db.commit()
+    await user_cache.invalidate(email)
     return user
+
+async def set_default_avatar(email: str, url: str, db: AsyncSession) -> bool:
+    """
+    Set the avatar of a user who has none yet and drop the user from the user cache.
+
+    Args:
+        email (str): The email of the user.
+        url (str): The default avatar URL.
+        db (AsyncSession): The database session.
+
+    Returns:
+        bool: True if the avatar was set, False if the user is gone or already has an avatar.
+    """
+    result = await db.execute(update(User).where(User.email == email, User.avatar.is_(None)).values(avatar=url))
+    await db.commit()
+    if not result.rowcount:
+        return False
+    await user_cache.invalidate(email)
+    return True
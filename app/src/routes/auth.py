@@ -1,56 +1,61 @@
 from typing import List
 from src.services.email import send_email
+from src.services.mail_queue import mail_queue
 from fastapi import APIRouter, HTTPException, Depends, status, Security, BackgroundTasks, Request
 from fastapi.security import OAuth2PasswordRequestForm, HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from src.database.db import get_db
 from src.schemas import UserModel, UserResponse, TokenModel, RequestEmail
 from src.repository import users as repository_users
 from src.services.auth import auth_service
+from src.services.avatars import assign_default_avatar
 
 router = APIRouter(prefix='/auth', tags=["auth"])
 security = HTTPBearer()
 
 
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def signup(body: UserModel, background_tasks: BackgroundTasks, request: Request, db: Session = Depends(get_db)):
+async def signup(body: UserModel, background_tasks: BackgroundTasks, request: Request, db: AsyncSession = Depends(get_db)):
     """
     Asynchronous endpoint that handles user signup.
 
-    This function takes a UserModel object, BackgroundTasks object, Request object, and a SQLAlchemy session as input. It checks if a user with the provided email already exists. If not, it creates a new User object, adds it to the session, commits the session, and sends a confirmation email to the new user.
+    This function takes a UserModel object, BackgroundTasks object, Request object, and a SQLAlchemy session as input. It checks if a user with the provided email already exists. If not, it creates a new User object, adds it to the session, commits the session, and queues a confirmation email to the new user for the mail worker, sending it in a background task if the mail queue is unavailable. The default avatar is resolved in a background task after the response.
 
     Args:
         body (UserModel): The UserModel object containing the details of the user to be created.
-        background_tasks (BackgroundTasks): The BackgroundTasks object for adding tasks to be performed in the background.
+        background_tasks (BackgroundTasks): The BackgroundTasks object used to resolve the default avatar, and to send the email when the mail queue is unavailable.
         request (Request): The Request object containing details about the client's request.
-        db (Session): The SQLAlchemy session object.
+        db (AsyncSession): The SQLAlchemy async session object.
 
     Returns:
         dict: A dictionary containing the newly created User object and a success message.
 
     Raises:
-        HTTPException: An HTTPException is raised with a 409 status code if a user with the provided email already exists.
+        HTTPException: An HTTPException is raised with a 409 status code if a user with the provided email already exists, or with a 503 status code if the password hashing queue is saturated.
 
     Example:
         >>> from fastapi import Depends, BackgroundTasks
         >>> from .database import get_db
         >>> 
         >>> @app.post("/signup")
-        >>> async def signup_endpoint(body: UserModel, background_tasks: BackgroundTasks, request: Request, db: Session = Depends(get_db)):
+        >>> async def signup_endpoint(body: UserModel, background_tasks: BackgroundTasks, request: Request, db: AsyncSession = Depends(get_db)):
         >>>     return await signup(body, background_tasks, request, db)
     """
     exist_user = await repository_users.get_user_by_email(body.email, db)
     if exist_user:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Account already exists")
-    body.password = auth_service.get_password_hash(body.password)
+    body.password = await auth_service.get_password_hash(body.password)
     new_user = await repository_users.create_user(body, db)
-    background_tasks.add_task(send_email, new_user.email, new_user.username, request.base_url)
+    background_tasks.add_task(assign_default_avatar, new_user.email,
+                              async_sessionmaker(bind=db.bind, expire_on_commit=False))
+    if not await mail_queue.enqueue_confirmation(new_user.email, new_user.username, request.base_url):
+        background_tasks.add_task(send_email, new_user.email, new_user.username, request.base_url)
     return {"user": new_user, "detail": "User successfully created. Check your email for confirmation."}
 
 
 @router.get('/confirmed_email/{token}')
-async def confirmed_email(token: str, db: Session = Depends(get_db)):
+async def confirmed_email(token: str, db: AsyncSession = Depends(get_db)):
     """
     Asynchronous endpoint that confirms a user's email.
 
@@ -58,7 +63,7 @@ async def confirmed_email(token: str, db: Session = Depends(get_db)):
 
     Args:
         token (str): The token associated with the user's email.
-        db (Session): The SQLAlchemy session object.
+        db (AsyncSession): The SQLAlchemy async session object.
 
     Returns:
         dict: A dictionary containing a success message.
@@ -71,7 +76,7 @@ async def confirmed_email(token: str, db: Session = Depends(get_db)):
         >>> from .database import get_db
         >>> 
         >>> @app.get("/confirmed_email/{token}")
-        >>> async def confirm_user_email(token: str, db: Session = Depends(get_db)):
+        >>> async def confirm_user_email(token: str, db: AsyncSession = Depends(get_db)):
         >>>     return await confirmed_email(token, db)
     """
     email = await auth_service.get_email_from_token(token)
@@ -86,17 +91,17 @@ async def confirmed_email(token: str, db: Session = Depends(get_db)):
 
 @router.post('/request_email')
 async def request_email(body: RequestEmail, background_tasks: BackgroundTasks, request: Request,
-                        db: Session = Depends(get_db)):
+                        db: AsyncSession = Depends(get_db)):
     """
     Asynchronous endpoint that handles email confirmation requests.
 
-    This function takes a RequestEmail object, BackgroundTasks object, Request object, and a SQLAlchemy session as input. It checks if a user with the provided email already exists and if their email is confirmed. If the user exists and their email is not confirmed, it sends a confirmation email to the user.
+    This function takes a RequestEmail object, BackgroundTasks object, Request object, and a SQLAlchemy session as input. It checks if a user with the provided email already exists and if their email is confirmed. If the user exists and their email is not confirmed, it queues a confirmation email to the user for the mail worker, sending it in a background task if the mail queue is unavailable.
 
     Args:
         body (RequestEmail): The RequestEmail object containing the email of the user requesting confirmation.
-        background_tasks (BackgroundTasks): The BackgroundTasks object for adding tasks to be performed in the background.
+        background_tasks (BackgroundTasks): The BackgroundTasks object used to send the email when the mail queue is unavailable.
         request (Request): The Request object containing details about the client's request.
-        db (Session): The SQLAlchemy session object.
+        db (AsyncSession): The SQLAlchemy async session object.
 
     Returns:
         dict: A dictionary containing a success message.
@@ -106,19 +111,19 @@ async def request_email(body: RequestEmail, background_tasks: BackgroundTasks, r
         >>> from .database import get_db
         >>> 
         >>> @app.post("/request_email")
-        >>> async def request_email_endpoint(body: RequestEmail, background_tasks: BackgroundTasks, request: Request, db: Session = Depends(get_db)):
+        >>> async def request_email_endpoint(body: RequestEmail, background_tasks: BackgroundTasks, request: Request, db: AsyncSession = Depends(get_db)):
         >>>     return await request_email(body, background_tasks, request, db)
     """
     user = await repository_users.get_user_by_email(body.email, db)
     if user.confirmed:
         return {"message": "Your email is already confirmed"}
-    if user:
+    if user and not await mail_queue.enqueue_confirmation(user.email, user.username, request.base_url):
         background_tasks.add_task(send_email, user.email, user.username, request.base_url)
     return {"message": "Check your email for confirmation."}
 
 
 @router.post("/login", response_model=TokenModel)
-async def login(body: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(body: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     """
     Asynchronous endpoint that handles user login.
 
@@ -126,20 +131,20 @@ async def login(body: OAuth2PasswordRequestForm = Depends(), db: Session = Depen
 
     Args:
         body (OAuth2PasswordRequestForm): The OAuth2PasswordRequestForm object containing the user's email and password.
-        db (Session): The SQLAlchemy session object.
+        db (AsyncSession): The SQLAlchemy async session object.
 
     Returns:
         dict: A dictionary containing the access and refresh tokens, and the token type.
 
     Raises:
-        HTTPException: An HTTPException is raised with a 401 status code if a user with the provided email does not exist, if their email is not confirmed, or if the provided password is incorrect.
+        HTTPException: An HTTPException is raised with a 401 status code if a user with the provided email does not exist, if their email is not confirmed, or if the provided password is incorrect, or with a 503 status code if the password hashing queue is saturated.
 
     Example:
         >>> from fastapi import Depends
         >>> from .database import get_db
         >>> 
         >>> @app.post("/login")
-        >>> async def login_endpoint(body: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+        >>> async def login_endpoint(body: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
         >>>     return await login(body, db)
     """
     user = await repository_users.get_user_by_email(body.username, db)
@@ -147,7 +152,7 @@ async def login(body: OAuth2PasswordRequestForm = Depends(), db: Session = Depen
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email")
     if not user.confirmed:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not confirmed")
-    if not auth_service.verify_password(body.password, user.password):
+    if not await auth_service.verify_password(body.password, user.password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password")
     # Generate JWT
     access_token = await auth_service.create_access_token(data={"sub": user.email})
@@ -157,7 +162,7 @@ async def login(body: OAuth2PasswordRequestForm = Depends(), db: Session = Depen
 
 
 @router.get('/refresh_token', response_model=TokenModel)
-async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(security), db: Session = Depends(get_db)):
+async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(security), db: AsyncSession = Depends(get_db)):
     """
     Asynchronous endpoint that handles access token refresh.
 
@@ -165,7 +170,7 @@ async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(sec
 
     Args:
         credentials (HTTPAuthorizationCredentials): The HTTPAuthorizationCredentials object containing the refresh token.
-        db (Session): The SQLAlchemy session object.
+        db (AsyncSession): The SQLAlchemy async session object.
 
     Returns:
         dict: A dictionary containing the new access and refresh tokens, and the token type.
@@ -178,7 +183,7 @@ async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(sec
         >>> from .database import get_db
         >>> 
         >>> @app.get("/refresh_token")
-        >>> async def refresh_token_endpoint(credentials: HTTPAuthorizationCredentials = Security(security), db: Session = Depends(get_db)):
+        >>> async def refresh_token_endpoint(credentials: HTTPAuthorizationCredentials = Security(security), db: AsyncSession = Depends(get_db)):
         >>>     return await refresh_token(credentials, db)
     """
     token = credentials.credentials
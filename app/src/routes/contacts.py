@@ -1,67 +1,305 @@
-from typing import List
-from sqlalchemy.orm import Session
-from fastapi_limiter.depends import RateLimiter
+from datetime import datetime
+from typing import Annotated, List, Literal
+from pydantic import TypeAdapter
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.db import get_db
 from src.database.models import User
 from src.repository import contacts as repository_contacts
 from src.services.auth import auth_service
-from fastapi import APIRouter, HTTPException, Depends, status
-from src.schemas import ContactBase, ContactUpdate, ContactResponse
+from fastapi import APIRouter, HTTPException, Depends, status, Header, Request, Response, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from src.schemas import (ContactBase, ContactUpdate, ContactResponse, ContactChanges, ContactBatchGet, ContactBatch,
+                         ContactSelection, ContactBulkUpdate, ContactBulkResult, BulkImportResponse)
+from src.services import contacts_export, contacts_import, fast_json
+from src.services.cache import contact_list_cache
+from src.services import rate_limit
+from src.services.rate_limit import rate_limiter
+from src.services.etag import collection_versions, collection_etag, contact_etag, etag_matches
 from src.conf.config import settings
 
 
-router = APIRouter(prefix='/contacts', tags=["contacts"])
-rl_times = settings.rate_limiter_times
-rl_seconds = settings.rate_limiter_seconds
+router = APIRouter(prefix='/contacts', tags=["contacts"], dependencies=[Depends(rate_limiter)])
+contact_list = TypeAdapter(List[ContactResponse])
 
 
-@router.get("/", response_model=List[ContactResponse], description='No more than 10 requests per minute',
-            dependencies=[Depends(RateLimiter(times=rl_times, seconds=rl_seconds))])
-async def read_contacts(filter: str = None, skip: int = 0, limit: int = 100, db: Session = Depends(get_db),
+@router.get("/", response_model=List[ContactResponse], description=rate_limiter.describe())
+async def read_contacts(response: Response, filter: str = None, skip: int = 0, limit: int = 100, cursor: str = None,
+                        if_none_match: Annotated[str | None, Header()] = None,
+                        db: AsyncSession = Depends(get_db),
                         current_user: User = Depends(auth_service.get_current_user)):
     """
     Asynchronous endpoint that retrieves a list of contacts for the current user from the database.
 
     This function takes a filter string, skip and limit integers for pagination, a SQLAlchemy session, and the current user as input. It queries the database for contacts associated with the current user, applies the filter if provided, and returns a paginated list of contacts.
 
+    Passing a cursor (an empty one for the first page) switches to keyset pagination: contacts are ordered by id, skip is ignored, and when the page is full the cursor of the next page is returned in the X-Next-Cursor response header.
+
+    The response carries an ETag built from the user's collection version and the query parameters. When If-None-Match matches it, 304 Not Modified is returned without loading any contacts.
+
+    When Redis is available, pages are cached already serialized under the same collection version, so repeated requests skip both the query and the serialization until the user's contacts change.
+
     Args:
+        response (Response): The outgoing response, used to set the X-Next-Cursor and ETag headers.
         filter (str, optional): A string representing the filter criteria. If None, no filtering is applied. Defaults to None.
         skip (int, optional): The number of records to skip from the start. Used for pagination. Defaults to 0.
         limit (int, optional): The maximum number of records to return. Used for pagination. Defaults to 100.
-        db (Session): The SQLAlchemy session object.
+        cursor (str, optional): An opaque cursor from a previous X-Next-Cursor header. Defaults to None.
+        if_none_match (str, optional): The If-None-Match request header. Defaults to None.
+        db (AsyncSession): The SQLAlchemy async session object.
         current_user (User): The User object for which contacts are to be retrieved.
 
     Returns:
-        List[ContactResponse]: A list of ContactResponse objects that match the query.
+        List[ContactResponse] | Response: A list of ContactResponse objects that match the query, the same list serialized to JSON, or an empty 304 response.
+
+    Raises:
+        HTTPException: An HTTPException is raised with a 400 status code if the filter or the cursor is malformed.
 
     Example:
         >>> from fastapi import Depends
         >>> from .database import get_db
         >>> 
         >>> @app.get("/contacts/")
-        >>> async def read_contacts_endpoint(filter: str = None, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-        >>>     return await read_contacts(filter, skip, limit, db, current_user)
+        >>> async def read_contacts_endpoint(response: Response, filter: str = None, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
+        >>>     return await read_contacts(response, filter, skip, limit, None, None, db, current_user)
+    """
+    _check_filter(filter)
+    if cursor:
+        try:
+            repository_contacts.decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    params = (filter, skip, limit, cursor)
+    version = await collection_versions.get(current_user.id)
+    if version is not None:
+        etag = collection_etag(version, *params)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        cached = await contact_list_cache.get(current_user.id, version, *params)
+        if cached is not None:
+            body, next_cursor = cached
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+            return _json_response(body.encode(), response)
+    contacts = await repository_contacts.get_contacts(filter, skip, limit, current_user, db, cursor)
+    next_cursor = None
+    if cursor is not None and contacts and len(contacts) == limit:
+        next_cursor = repository_contacts.encode_cursor(contacts[-1])
+        response.headers["X-Next-Cursor"] = next_cursor
+    if version is None or not contact_list_cache.enabled:
+        return _respond(contacts, response)
+    body = _encode_page(contacts)
+    await contact_list_cache.set(current_user.id, version, params, body, next_cursor)
+    return _json_response(body.encode(), response)
+
+
+def _encode_page(contacts) -> str:
     """
-    contacts = await repository_contacts.get_contacts(filter, skip, limit, current_user, db)
-    return contacts
+    Serializes a page of contacts to JSON for the list cache.
 
+    Args:
+        contacts (List[Contact]): The contacts of the page.
 
-@router.get("/{contact_id}", response_model=ContactResponse, description='No more than 10 requests per minute',
-            dependencies=[Depends(RateLimiter(times=rl_times, seconds=rl_seconds))])
-async def read_contact(contact_id: int, db: Session = Depends(get_db),
-                        current_user: User = Depends(auth_service.get_current_user)):
+    Returns:
+        str: The JSON array of contacts.
+    """
+    if settings.fast_json_responses:
+        return fast_json.dumps(contacts).decode()
+    return contact_list.dump_json(contact_list.validate_python(contacts, from_attributes=True)).decode()
+
+
+def _json_response(content, response: Response = None, status_code: int = status.HTTP_200_OK) -> Response:
+    """
+    Builds a FastJSONResponse, keeping the headers set on the injected response.
+
+    Args:
+        content: JSON bytes, or contacts and JSON-compatible data to encode with fast_json.dumps.
+        response (Response, optional): The injected response, whose headers (ETag, X-Next-Cursor) are copied. Defaults to None.
+        status_code (int, optional): The status code of the response. Defaults to 200.
+
+    Returns:
+        Response: The JSON response.
+    """
+    headers = {}
+    if response is not None:
+        headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    return fast_json.FastJSONResponse(content, status_code=status_code, headers=headers)
+
+
+def _respond(content, response: Response = None, status_code: int = status.HTTP_200_OK):
+    """
+    Returns the content of a contact route, encoded directly with fast_json if FAST_JSON_RESPONSES is enabled.
+
+    When it is disabled the content is returned unchanged, and FastAPI validates and serializes it against the
+    response model of the route.
+
+    Args:
+        content: Contacts, or JSON-compatible data containing contacts.
+        response (Response, optional): The injected response, whose headers are copied. Defaults to None.
+        status_code (int, optional): The status code of the route. Defaults to 200.
+
+    Returns:
+        Any: The content, or the JSON response.
+    """
+    if not settings.fast_json_responses:
+        return content
+    return _json_response(content, response, status_code)
+
+
+def _check_filter(filter: str | None) -> None:
+    """
+    Rejects filters that parse_filter cannot parse, that name unknown attributes, or whose values do not convert to
+    the type of their column.
+
+    Args:
+        filter (str, optional): A string representing the filter criteria.
+
+    Raises:
+        HTTPException: An HTTPException is raised with a 400 status code if the filter is malformed.
+    """
+    try:
+        repository_contacts.filter_conditions(filter)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid filter")
+
+
+@router.get("/search", response_model=List[ContactResponse], description=rate_limiter.describe())
+async def search_contacts(q: str = Query(min_length=1, max_length=100), limit: int = Query(20, ge=1, le=100),
+                          db: AsyncSession = Depends(get_db),
+                          current_user: User = Depends(auth_service.get_current_user)):
+    """
+    Asynchronous endpoint that searches the current user's contacts.
+
+    This function takes a query string, a limit, a SQLAlchemy session, and the current user as input. It returns the contacts whose name, surname, email, phone or address contain every term of the query, best matches first. Partial words match, so it can back type-ahead inputs.
+
+    Args:
+        q (str): The search query, from 1 to 100 characters.
+        limit (int, optional): The maximum number of records to return, from 1 to 100. Defaults to 20.
+        db (AsyncSession): The SQLAlchemy async session object.
+        current_user (User): The User object whose contacts are searched.
+
+    Returns:
+        List[ContactResponse]: A list of ContactResponse objects that match the query.
+
+    Example:
+        >>> from fastapi import Depends
+        >>> from .database import get_db
+        >>> 
+        >>> @app.get("/contacts/search")
+        >>> async def search_contacts_endpoint(q: str, limit: int = 20, db: AsyncSession = Depends(get_db)):
+        >>>     return await search_contacts(q, limit, db, current_user)
+    """
+    return _respond(await repository_contacts.search_contacts(q, limit, current_user, db))
+
+
+@router.get("/changes", response_model=ContactChanges, description=rate_limiter.describe())
+async def read_changes(since: datetime = None, cursor: str = None,
+                       limit: int = Query(settings.changes_page_size, ge=1, le=5000),
+                       db: AsyncSession = Depends(get_db),
+                       current_user: User = Depends(auth_service.get_current_user)):
+    """
+    Asynchronous endpoint that returns the contacts the current user created, updated or deleted since the last sync.
+
+    This function takes a starting time or the cursor of a previous call, a page size, a SQLAlchemy session, and the current user as input. The first sync passes since (or nothing, to receive every contact); every later call passes the cursor of the previous response, and calls again right away while has_more is true. Created and updated contacts are returned in full, deleted contacts by id. The most recent changes may be returned twice, so clients must apply them idempotently.
+
+    Args:
+        since (datetime, optional): Return changes made after this time. Ignored when a cursor is given. Defaults to None.
+        cursor (str, optional): The cursor returned by the previous call. Defaults to None.
+        limit (int, optional): The maximum number of changes to return, from 1 to 5000. Defaults to settings.changes_page_size.
+        db (AsyncSession): The SQLAlchemy async session object.
+        current_user (User): The User object whose changes are to be retrieved.
+
+    Returns:
+        ContactChanges: The updated contacts, the ids of deleted contacts, the cursor of the next call, and whether more changes are waiting.
+
+    Raises:
+        HTTPException: An HTTPException is raised with a 400 status code if the cursor is malformed.
+
+    Example:
+        >>> from fastapi import Depends
+        >>> from .database import get_db
+        >>> 
+        >>> @app.get("/contacts/changes")
+        >>> async def read_changes_endpoint(cursor: str = None, limit: int = 500, db: AsyncSession = Depends(get_db)):
+        >>>     return await read_changes(None, cursor, limit, db, current_user)
+    """
+    try:
+        updated, deleted, next_cursor, has_more = await repository_contacts.get_changes(
+            since, cursor, limit, current_user, db, settings.changes_horizon_seconds)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return _respond({"updated": updated, "deleted": deleted, "cursor": next_cursor, "has_more": has_more})
+
+
+@router.get("/export", response_class=StreamingResponse,
+            description=rate_limiter.describe(settings.rate_limiter_export_weight),
+            responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}})
+@rate_limit.weight(settings.rate_limiter_export_weight)
+async def export_contacts(format: Literal["ndjson", "csv"] = "ndjson", filter: str = None,
+                          db: AsyncSession = Depends(get_db),
+                          current_user: User = Depends(auth_service.get_current_user)):
+    """
+    Asynchronous endpoint that streams all contacts of the current user as NDJSON or CSV.
+
+    This function takes an export format, a filter string, a SQLAlchemy session, and the current user as input. It streams every contact associated with the current user that matches the filter, ordered by id, as a file download. Rows are read from a server-side cursor in batches of settings.export_batch_size and written out as they arrive, so memory use does not grow with the size of the address book.
+
+    The request session from get_db is closed once the endpoint returns, before the body is streamed, so the stream reads through its own session bound to the same engine.
+
+    Args:
+        format (str, optional): "ndjson" (one JSON object per line) or "csv" (with a header row). Defaults to "ndjson".
+        filter (str, optional): A string representing the filter criteria, as accepted by read_contacts. Defaults to None.
+        db (AsyncSession): The SQLAlchemy async session object.
+        current_user (User): The User object whose contacts are to be exported.
+
+    Returns:
+        StreamingResponse: The exported contacts as an attachment.
+
+    Raises:
+        HTTPException: An HTTPException is raised with a 400 status code if the filter is malformed.
+
+    Example:
+        >>> from fastapi import Depends
+        >>> from .database import get_db
+        >>> 
+        >>> @app.get("/contacts/export")
+        >>> async def export_contacts_endpoint(format: str = "ndjson", filter: str = None, db: AsyncSession = Depends(get_db)):
+        >>>     return await export_contacts(format, filter, db, current_user)
+    """
+    _check_filter(filter)
+    bind = db.bind
+
+    async def content():
+        async with AsyncSession(bind=bind) as session:
+            partitions = repository_contacts.stream_contacts(filter, current_user, session, settings.export_batch_size)
+            async for chunk in contacts_export.encode(format, partitions):
+                yield chunk
+
+    return StreamingResponse(content(), media_type=contacts_export.MEDIA_TYPES[format],
+                             headers={"Content-Disposition": f'attachment; filename="contacts.{format}"'})
+
+
+@router.get("/{contact_id}", response_model=ContactResponse, description=rate_limiter.describe())
+async def read_contact(contact_id: int, response: Response, if_none_match: Annotated[str | None, Header()] = None,
+                       db: AsyncSession = Depends(get_db),
+                       current_user: User = Depends(auth_service.get_current_user)):
     """
     Asynchronous endpoint that retrieves a specific contact for the current user from the database.
 
     This function takes a contact ID, a SQLAlchemy session, and the current user as input. It queries the database for a Contact object whose ID matches the provided contact ID and is associated with the current user. If the contact exists, it returns the contact. Otherwise, it raises an HTTPException.
 
+    The response carries an ETag built from the contact's id and update time. When If-None-Match matches it, 304 Not Modified is returned without serializing the contact.
+
     Args:
         contact_id (int): The ID of the contact to retrieve.
-        db (Session): The SQLAlchemy session object.
+        response (Response): The outgoing response, used to set the ETag header.
+        if_none_match (str, optional): The If-None-Match request header. Defaults to None.
+        db (AsyncSession): The SQLAlchemy async session object.
         current_user (User): The User object for which the contact is to be retrieved.
 
     Returns:
-        ContactResponse: The ContactResponse object that matches the query, if it exists. Otherwise, None.
+        ContactResponse | Response: The ContactResponse object that matches the query, or an empty 304 response.
 
     Raises:
         HTTPException: An HTTPException is raised with a 404 status code if a contact with the provided ID does not exist.
@@ -71,28 +309,34 @@ async def read_contact(contact_id: int, db: Session = Depends(get_db),
         >>> from .database import get_db
         >>> 
         >>> @app.get("/contacts/{contact_id}")
-        >>> async def read_contact_endpoint(contact_id: int, db: Session = Depends(get_db)):
-        >>>     return await read_contact(contact_id, db, current_user)
+        >>> async def read_contact_endpoint(contact_id: int, response: Response, db: AsyncSession = Depends(get_db)):
+        >>>     return await read_contact(contact_id, response, None, db, current_user)
     """
     contact = await repository_contacts.get_contact(contact_id, current_user, db)
     if contact is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
-    return contact
-
-
-@router.get("/birthdays/", response_model=List[ContactResponse], description='No more than 10 requests per minute',
-            dependencies=[Depends(RateLimiter(times=rl_times, seconds=rl_seconds))])
-async def retrieve_birthdays(skip: int = 0, limit: int = 20, db: Session = Depends(get_db),
-                        current_user: User = Depends(auth_service.get_current_user)):
+    etag = contact_etag(contact)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return _respond(contact, response)
+
+
+@router.get("/birthdays/", response_model=List[ContactResponse], description=rate_limiter.describe())
+async def retrieve_birthdays(skip: int = 0, limit: int = 20,
+                             days: int = Query(settings.birthday_window_days, ge=1, le=366),
+                             db: AsyncSession = Depends(get_db),
+                             current_user: User = Depends(auth_service.get_current_user)):
     """
-    Asynchronous endpoint that retrieves a list of contacts for the current user from the database whose birthdays are within the next week.
+    Asynchronous endpoint that retrieves a list of contacts for the current user from the database whose birthdays are within the next days.
 
-    This function takes skip and limit integers for pagination, a SQLAlchemy session, and the current user as input. It queries the database for contacts associated with the current user whose birthdays are within the next week, and returns a paginated list of contacts.
+    This function takes skip and limit integers for pagination, the window length in days, a SQLAlchemy session, and the current user as input. It queries the database for contacts associated with the current user whose birthdays are within the window, and returns a paginated list of contacts ordered by upcoming birthday.
 
     Args:
         skip (int, optional): The number of records to skip from the start. Used for pagination. Defaults to 0.
         limit (int, optional): The maximum number of records to return. Used for pagination. Defaults to 20.
-        db (Session): The SQLAlchemy session object.
+        days (int, optional): The length of the window in days, today included, from 1 to 366. Defaults to settings.birthday_window_days.
+        db (AsyncSession): The SQLAlchemy async session object.
         current_user (User): The User object for which contacts are to be retrieved.
 
     Returns:
@@ -103,16 +347,15 @@ async def retrieve_birthdays(skip: int = 0, limit: int = 20, db: Session = Depen
         >>> from .database import get_db
         >>> 
         >>> @app.get("/birthdays/")
-        >>> async def retrieve_birthdays_endpoint(skip: int = 0, limit: int = 20, db: Session = Depends(get_db)):
-        >>>     return await retrieve_birthdays(skip, limit, db, current_user)
+        >>> async def retrieve_birthdays_endpoint(skip: int = 0, limit: int = 20, days: int = 7, db: AsyncSession = Depends(get_db)):
+        >>>     return await retrieve_birthdays(skip, limit, days, db, current_user)
     """
-    contacts = await repository_contacts.get_contacts_by_birthdays(skip, limit, current_user, db)
-    return contacts
+    contacts = await repository_contacts.get_contacts_by_birthdays(skip, limit, current_user, db, days)
+    return _respond(contacts)
 
 
-@router.post("/", response_model=ContactResponse, status_code=status.HTTP_201_CREATED, description='No more than 10 requests per minute',
-            dependencies=[Depends(RateLimiter(times=rl_times, seconds=rl_seconds))])
-async def create_contact(body: ContactBase, db: Session = Depends(get_db),
+@router.post("/", response_model=ContactResponse, status_code=status.HTTP_201_CREATED, description=rate_limiter.describe())
+async def create_contact(body: ContactBase, db: AsyncSession = Depends(get_db),
                         current_user: User = Depends(auth_service.get_current_user)):
     """
     Asynchronous endpoint that creates a new contact for the current user in the database.
@@ -121,7 +364,7 @@ async def create_contact(body: ContactBase, db: Session = Depends(get_db),
 
     Args:
         body (ContactBase): The ContactBase object containing the details of the contact to be created.
-        db (Session): The SQLAlchemy session object.
+        db (AsyncSession): The SQLAlchemy async session object.
         current_user (User): The User object for which the contact is to be created.
 
     Returns:
@@ -132,16 +375,180 @@ async def create_contact(body: ContactBase, db: Session = Depends(get_db),
         >>> from .database import get_db
         >>> 
         >>> @app.post("/contacts/")
-        >>> async def create_contact_endpoint(body: ContactBase, db: Session = Depends(get_db)):
+        >>> async def create_contact_endpoint(body: ContactBase, db: AsyncSession = Depends(get_db)):
         >>>     return await create_contact(body, db, current_user)
     """
-    return await repository_contacts.create_contact(body, current_user, db)
+    return _respond(await repository_contacts.create_contact(body, current_user, db), status_code=status.HTTP_201_CREATED)
+
+
+
+@router.post("/bulk", response_model=BulkImportResponse,
+             description=rate_limiter.describe(settings.rate_limiter_bulk_weight),
+             openapi_extra={"requestBody": {"required": True, "content": {
+                 "application/json": {"schema": {"type": "array", "items": ContactBase.model_json_schema()}},
+                 "application/x-ndjson": {"schema": {"type": "string"}},
+                 "text/csv": {"schema": {"type": "string"}},
+                 "multipart/form-data": {"schema": {"type": "object", "properties": {
+                     "file": {"type": "string", "format": "binary"}}}},
+             }}})
+@rate_limit.weight(settings.rate_limiter_bulk_weight)
+async def bulk_create_contacts(request: Request, db: AsyncSession = Depends(get_db),
+                               current_user: User = Depends(auth_service.get_current_user)):
+    """
+    Asynchronous endpoint that imports many contacts for the current user in one request.
 
+    This function takes the request, a SQLAlchemy session, and the current user as input. The request body is a JSON array, NDJSON or CSV (with a header row of ContactBase field names), sent either as the raw body with the matching Content-Type or as a "file" field of a multipart upload. Parsing and validating every row with ContactBase is CPU-bound, so it runs in the threadpool to keep the event loop responsive; valid rows are inserted in batches of settings.bulk_import_batch_size, and invalid rows or rows whose email already exists are reported by their index in the upload instead of failing the import.
 
+    Args:
+        request (Request): The incoming request carrying the upload.
+        db (AsyncSession): The SQLAlchemy async session object.
+        current_user (User): The User object for which the contacts are to be created.
 
-@router.patch("/{contact_id}", response_model=ContactResponse, description='No more than 10 requests per minute',
-            dependencies=[Depends(RateLimiter(times=rl_times, seconds=rl_seconds))])
-async def update_contact(body: ContactUpdate, contact_id: int, db: Session = Depends(get_db),
+    Returns:
+        BulkImportResponse: The number of created contacts and the errors of the rejected rows.
+
+    Raises:
+        HTTPException: An HTTPException is raised with a 415 status code if the format is not supported, with a 400 status code if the upload cannot be parsed, and with a 413 status code if it has more than settings.bulk_import_max_rows rows.
+
+    Example:
+        >>> from fastapi import Depends
+        >>> from .database import get_db
+        >>> 
+        >>> @app.post("/contacts/bulk")
+        >>> async def bulk_create_contacts_endpoint(request: Request, db: AsyncSession = Depends(get_db)):
+        >>>     return await bulk_create_contacts(request, db, current_user)
+    """
+    content_type = request.headers.get("content-type")
+    if (content_type or "").startswith("multipart/form-data"):
+        upload = (await request.form()).get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing file")
+        fmt = contacts_import.detect_format(upload.content_type, upload.filename)
+        content = await upload.read()
+    else:
+        fmt = contacts_import.detect_format(content_type)
+        content = await request.body()
+    if fmt is None:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail="Expected JSON, NDJSON or CSV")
+    try:
+        rows = await run_in_threadpool(contacts_import.read_rows, content, fmt)
+    except (ValueError, UnicodeDecodeError) as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+    if len(rows) > settings.bulk_import_max_rows:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"No more than {settings.bulk_import_max_rows} contacts per import")
+    contacts, errors = await run_in_threadpool(contacts_import.validate_rows, rows)
+    created, conflicts = await repository_contacts.create_contacts(contacts, current_user, db,
+                                                                  settings.bulk_import_batch_size)
+    return {"created": created, "errors": sorted(errors + conflicts, key=lambda error: error["index"])}
+
+
+@router.post("/batch-get", response_model=ContactBatch, description=rate_limiter.describe())
+async def batch_get_contacts(body: ContactBatchGet, db: AsyncSession = Depends(get_db),
+                             current_user: User = Depends(auth_service.get_current_user)):
+    """
+    Asynchronous endpoint that retrieves many contacts of the current user by id in one request.
+
+    This function takes a list of contact IDs, a SQLAlchemy session, and the current user as input. It loads all of them with a single query, instead of one request, rate limit check and query per contact, and returns the found contacts and the IDs that were not found, both in request order.
+
+    Args:
+        body (ContactBatchGet): The IDs of the contacts, from 1 to settings.batch_get_max_ids of them.
+        db (AsyncSession): The SQLAlchemy async session object.
+        current_user (User): The User object for which the contacts are to be retrieved.
+
+    Returns:
+        ContactBatch: The found ContactResponse objects and the missing IDs.
+
+    Example:
+        >>> from fastapi import Depends
+        >>> from .database import get_db
+        >>> 
+        >>> @app.post("/contacts/batch-get")
+        >>> async def batch_get_contacts_endpoint(body: ContactBatchGet, db: AsyncSession = Depends(get_db)):
+        >>>     return await batch_get_contacts(body, db, current_user)
+    """
+    found, missing = await repository_contacts.get_contacts_by_ids(body.ids, current_user, db)
+    return _respond({"found": found, "missing": missing})
+
+
+@router.patch("/bulk", response_model=ContactBulkResult, response_model_exclude_none=True,
+              description=rate_limiter.describe(settings.rate_limiter_bulk_weight))
+@rate_limit.weight(settings.rate_limiter_bulk_weight)
+async def bulk_update_contacts(body: ContactBulkUpdate, db: AsyncSession = Depends(get_db),
+                               current_user: User = Depends(auth_service.get_current_user)):
+    """
+    Asynchronous endpoint that applies the same changes to many contacts of the current user.
+
+    This function takes the contacts to update, selected by a list of IDs or by a filter string, the changes, a SQLAlchemy session, and the current user as input. All selected contacts are updated with a single UPDATE statement in one transaction, and the number of updated contacts is returned, with the contacts themselves if returning is set.
+
+    Args:
+        body (ContactBulkUpdate): The IDs or the filter selecting the contacts, the changes, and whether to return the updated contacts.
+        db (AsyncSession): The SQLAlchemy async session object.
+        current_user (User): The User object whose contacts are to be updated.
+
+    Returns:
+        ContactBulkResult: The number of updated contacts, and the contacts if requested.
+
+    Raises:
+        HTTPException: An HTTPException is raised with a 400 status code if the filter is malformed, with a 422 status code if the changes set no column, or with a 409 status code if the changes would give two contacts the same email.
+
+    Example:
+        >>> from fastapi import Depends
+        >>> from .database import get_db
+        >>> 
+        >>> @app.patch("/contacts/bulk")
+        >>> async def bulk_update_contacts_endpoint(body: ContactBulkUpdate, db: AsyncSession = Depends(get_db)):
+        >>>     return await bulk_update_contacts(body, db, current_user)
+    """
+    _check_filter(body.filter)
+    if not repository_contacts.changed_values(body.changes):
+        # Nulls for required columns are ignored, so such changes would only touch updated_at.
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="No changes")
+    try:
+        count, contacts = await repository_contacts.update_contacts(body.changes, current_user, db, body.ids,
+                                                                    body.filter, body.returning)
+    except IntegrityError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already exists")
+    return _respond({"count": count, "contacts": contacts} if body.returning else {"count": count})
+
+
+@router.delete("/bulk", response_model=ContactBulkResult, response_model_exclude_none=True,
+               description=rate_limiter.describe(settings.rate_limiter_bulk_weight))
+@rate_limit.weight(settings.rate_limiter_bulk_weight)
+async def bulk_remove_contacts(body: ContactSelection, db: AsyncSession = Depends(get_db),
+                               current_user: User = Depends(auth_service.get_current_user)):
+    """
+    Asynchronous endpoint that removes many contacts of the current user.
+
+    This function takes the contacts to remove, selected by a list of IDs or by a filter string, a SQLAlchemy session, and the current user as input. All selected contacts are removed with a single DELETE statement in one transaction, and the number of removed contacts is returned, with the contacts themselves if returning is set.
+
+    Args:
+        body (ContactSelection): The IDs or the filter selecting the contacts, and whether to return the removed contacts.
+        db (AsyncSession): The SQLAlchemy async session object.
+        current_user (User): The User object whose contacts are to be removed.
+
+    Returns:
+        ContactBulkResult: The number of removed contacts, and the contacts if requested.
+
+    Raises:
+        HTTPException: An HTTPException is raised with a 400 status code if the filter is malformed.
+
+    Example:
+        >>> from fastapi import Depends
+        >>> from .database import get_db
+        >>> 
+        >>> @app.delete("/contacts/bulk")
+        >>> async def bulk_remove_contacts_endpoint(body: ContactSelection, db: AsyncSession = Depends(get_db)):
+        >>>     return await bulk_remove_contacts(body, db, current_user)
+    """
+    _check_filter(body.filter)
+    count, contacts = await repository_contacts.remove_contacts(current_user, db, body.ids, body.filter, body.returning)
+    return _respond({"count": count, "contacts": contacts} if body.returning else {"count": count})
+
+
+@router.patch("/{contact_id}", response_model=ContactResponse, description=rate_limiter.describe())
+async def update_contact(body: ContactUpdate, contact_id: int, db: AsyncSession = Depends(get_db),
                         current_user: User = Depends(auth_service.get_current_user)):
     """
     Asynchronous endpoint that updates a specific contact for the current user in the database.
@@ -151,32 +558,34 @@ async def update_contact(body: ContactUpdate, contact_id: int, db: Session = Dep
     Args:
         body (ContactUpdate): The ContactUpdate object containing the updated details of the contact.
         contact_id (int): The ID of the contact to be updated.
-        db (Session): The SQLAlchemy session object.
+        db (AsyncSession): The SQLAlchemy async session object.
         current_user (User): The User object for which the contact is to be updated.
 
     Returns:
         ContactResponse: The updated ContactResponse object if it exists, otherwise None.
 
     Raises:
-        HTTPException: An HTTPException is raised with a 404 status code if a contact with the provided ID does not exist.
+        HTTPException: An HTTPException is raised with a 404 status code if a contact with the provided ID does not exist, or with a 409 status code if the new email belongs to another contact.
 
     Example:
         >>> from fastapi import Depends
         >>> from .database import get_db
         >>> 
         >>> @app.patch("/contacts/{contact_id}")
-        >>> async def update_contact_endpoint(body: ContactUpdate, contact_id: int, db: Session = Depends(get_db)):
+        >>> async def update_contact_endpoint(body: ContactUpdate, contact_id: int, db: AsyncSession = Depends(get_db)):
         >>>     return await update_contact(body, contact_id, db, current_user)
     """
-    contact = await repository_contacts.update_contact(contact_id, body, current_user, db)
+    try:
+        contact = await repository_contacts.update_contact(contact_id, body, current_user, db)
+    except IntegrityError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already exists")
     if contact is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
-    return contact
+    return _respond(contact)
 
 
-@router.delete("/{contact_id}", response_model=ContactResponse, description='No more than 10 requests per minute',
-            dependencies=[Depends(RateLimiter(times=rl_times, seconds=rl_seconds))])
-async def remove_contact(contact_id: int, db: Session = Depends(get_db),
+@router.delete("/{contact_id}", response_model=ContactResponse, description=rate_limiter.describe())
+async def remove_contact(contact_id: int, db: AsyncSession = Depends(get_db),
                         current_user: User = Depends(auth_service.get_current_user)):
     """
     Asynchronous endpoint that removes a specific contact for the current user from the database.
@@ -185,7 +594,7 @@ async def remove_contact(contact_id: int, db: Session = Depends(get_db),
 
     Args:
         contact_id (int): The ID of the contact to be removed.
-        db (Session): The SQLAlchemy session object.
+        db (AsyncSession): The SQLAlchemy async session object.
         current_user (User): The User object for which the contact is to be removed.
 
     Returns:
@@ -199,10 +608,10 @@ async def remove_contact(contact_id: int, db: Session = Depends(get_db),
         >>> from .database import get_db
         >>> 
         >>> @app.delete("/contacts/{contact_id}")
-        >>> async def remove_contact_endpoint(contact_id: int, db: Session = Depends(get_db)):
+        >>> async def remove_contact_endpoint(contact_id: int, db: AsyncSession = Depends(get_db)):
         >>>     return await remove_contact(contact_id, db, current_user)
     """
     contact = await repository_contacts.remove_contact(contact_id, current_user, db)
     if contact is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
-    return contact
+    return _respond(contact)
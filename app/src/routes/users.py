@@ -1,12 +1,11 @@
-from fastapi import APIRouter, Depends, status, UploadFile, File
-from sqlalchemy.orm import Session
-import cloudinary
-import cloudinary.uploader
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.db import get_db
 from src.database.models import User
 from src.repository import users as repository_users
 from src.services.auth import auth_service
+from src.services.avatars import avatar_uploader
 from src.conf.config import settings
 from src.schemas import UserDb
 
@@ -38,37 +37,37 @@ async def read_users_me(current_user: User = Depends(auth_service.get_current_us
 
 @router.patch('/avatar', response_model=UserDb)
 async def update_avatar_user(file: UploadFile = File(), current_user: User = Depends(auth_service.get_current_user),
-                             db: Session = Depends(get_db)):
+                             db: AsyncSession = Depends(get_db)):
     """
     Asynchronous endpoint that updates the avatar of the current user.
 
-    This function takes an uploaded file, the current user, and a SQLAlchemy session as input. It uploads the file to Cloudinary, generates a URL for the uploaded image, and updates the user's avatar in the database with the generated URL.
+    This function takes an uploaded file, the current user, and a SQLAlchemy session as input. It crops the image to a square thumbnail and stores it with the configured avatar storage (Cloudinary or the local filesystem), both off the event loop, and updates the user's avatar in the database with the resulting URL.
 
     Args:
         file (UploadFile, optional): The uploaded file containing the new avatar. Defaults to File().
         current_user (User): The User object for which the avatar is to be updated.
-        db (Session): The SQLAlchemy session object.
+        db (AsyncSession): The SQLAlchemy async session object.
 
     Returns:
         UserDb: The updated UserDb object.
 
+    Raises:
+        HTTPException: An HTTPException is raised with a 413 status code if the file is larger than AVATAR_MAX_BYTES, with a 400 status code if it is not a readable image, or with a 503 status code if the avatar upload queue is saturated.
+
     Example:
         >>> from fastapi import Depends, File, UploadFile
         >>> from .database import get_db
         >>> 
         >>> @app.patch("/avatar")
-        >>> async def update_avatar_endpoint(file: UploadFile = File(), db: Session = Depends(get_db)):
+        >>> async def update_avatar_endpoint(file: UploadFile = File(), db: AsyncSession = Depends(get_db)):
         >>>     return await update_avatar_user(file, current_user, db)
     """
-    cloudinary.config(
-        cloud_name=settings.cloudinary_name,
-        api_key=settings.cloudinary_api_key,
-        api_secret=settings.cloudinary_api_secret,
-        secure=True
-    )
-
-    r = cloudinary.uploader.upload(file.file, public_id=f'ContactsApp/{current_user.username}', overwrite=True)
-    src_url = cloudinary.CloudinaryImage(f'ContactsApp/{current_user.username}')\
-                        .build_url(width=250, height=250, crop='fill', version=r.get('version'))
+    data = await file.read(settings.avatar_max_bytes + 1)
+    if len(data) > settings.avatar_max_bytes:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Avatar file is too large")
+    try:
+        src_url = await avatar_uploader.upload(current_user.username, data)
+    except ValueError as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
     user = await repository_users.update_avatar(current_user.email, src_url, db)
     return user
@@ -1,8 +1,10 @@
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
-from pydantic import BaseModel, Field, EmailStr, PastDate
+from pydantic import BaseModel, Field, EmailStr, PastDate, model_validator
 from pydantic_extra_types.phone_numbers import PhoneNumber
 
+from src.conf.config import settings
+
 
 class ContactBase(BaseModel):
     name: str = Field(max_length=50)
@@ -41,6 +43,73 @@ class ContactUpdate(BaseModel):
         return any(self.__dict__.values())
     
 
+class ContactChanges(BaseModel):
+    updated: List[ContactResponse]
+    deleted: List[int]
+    cursor: str
+    has_more: bool
+
+
+class ContactBatchGet(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=settings.batch_get_max_ids)
+
+
+class ContactBatch(BaseModel):
+    found: List[ContactResponse]
+    missing: List[int]
+
+
+class ContactSelection(BaseModel):
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=settings.bulk_change_max_ids)
+    filter: Optional[str] = Field(None, min_length=1)
+    returning: bool = False
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        """
+        This validator checks that the contacts are selected either by ids or by filter.
+
+        :return: The validated model.
+        :rtype: ContactSelection
+        :raises ValueError: If both or neither of ids and filter are given.
+        """
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Pass either ids or filter")
+        return self
+
+
+class ContactBulkUpdate(ContactSelection):
+    changes: ContactUpdate
+
+    @model_validator(mode="after")
+    def check_changes(self):
+        """
+        This validator checks that the update sends at least one field.
+
+        :return: The validated model.
+        :rtype: ContactBulkUpdate
+        :raises ValueError: If no field is sent.
+        """
+        if not self.changes.model_fields_set:
+            raise ValueError("No changes")
+        return self
+
+
+class ContactBulkResult(BaseModel):
+    count: int
+    contacts: Optional[List[ContactResponse]] = None
+
+
+class BulkImportError(BaseModel):
+    index: int
+    detail: str
+
+
+class BulkImportResponse(BaseModel):
+    created: int
+    errors: List[BulkImportError]
+
+
 class UserModel(BaseModel):
     username: str = Field(min_length=2, max_length=16)
     email: str
@@ -52,7 +121,7 @@ class UserDb(BaseModel):
     username: str
     email: str
     created_at: datetime
-    avatar: str
+    avatar: Optional[str] = None
 
     class Config:
         from_attributes = True
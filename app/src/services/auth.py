@@ -4,27 +4,31 @@ from typing import Optional
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
 from datetime import datetime, timedelta, UTC
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.conf.config import settings
 from src.database.db import get_db
 from src.repository import users as repository_users
+from src.services.cache import token_cache, user_cache
+from src.services import hashing
+from src.services.hashing import hashing_executor, pwd_context
 
 
 class Auth:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = pwd_context
     SECRET_KEY = settings.secret_key
     ALGORITHM = settings.algorithm
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
     r = redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0)
+    user_cache = user_cache
+    token_cache = token_cache
 
-    def verify_password(self, plain_password, hashed_password):
+    async def verify_password(self, plain_password, hashed_password):
         """
-        Verifies a password against a hashed password.
+        Asynchronously verifies a password against a hashed password.
 
-        This method takes a plain text password and a hashed password as input. It verifies the plain text password against the hashed password using the password context.
+        This method takes a plain text password and a hashed password as input. It verifies the plain text password against the hashed password using the password context, in the hashing executor so that bcrypt does not block the event loop.
 
         Args:
             plain_password (str): The plain text password to verify.
@@ -33,20 +37,23 @@ class Auth:
         Returns:
             bool: True if the password is verified, False otherwise.
 
+        Raises:
+            HTTPException: 503 with a Retry-After header if the hashing queue is saturated.
+
         Example:
             >>> auth = Auth()
             >>> plain_password = "my_password"
-            >>> hashed_password = auth.get_password_hash(plain_password)
-            >>> auth.verify_password(plain_password, hashed_password)
+            >>> hashed_password = await auth.get_password_hash(plain_password)
+            >>> await auth.verify_password(plain_password, hashed_password)
             True
         """
-        return self.pwd_context.verify(plain_password, hashed_password)
+        return await hashing_executor.run(hashing.verify_password, plain_password, hashed_password)
 
-    def get_password_hash(self, password: str):
+    async def get_password_hash(self, password: str):
         """
-        Generates a hashed password.
+        Asynchronously generates a hashed password.
 
-        This method takes a plain text password as input and returns a hashed version of the password using the password context.
+        This method takes a plain text password as input and returns a hashed version of the password using the password context, in the hashing executor so that bcrypt does not block the event loop.
 
         Args:
             password (str): The plain text password to hash.
@@ -54,13 +61,16 @@ class Auth:
         Returns:
             str: The hashed password.
 
+        Raises:
+            HTTPException: 503 with a Retry-After header if the hashing queue is saturated.
+
         Example:
             >>> auth = Auth()
             >>> plain_password = "my_password"
-            >>> hashed_password = auth.get_password_hash(plain_password)
+            >>> hashed_password = await auth.get_password_hash(plain_password)
             >>> print(hashed_password)
         """
-        return self.pwd_context.hash(password)
+        return await hashing_executor.run(hashing.hash_password, password)
 
     # define a function to generate a new access token
     async def create_access_token(self, data: dict, expires_delta: Optional[float] = None):
@@ -134,19 +144,22 @@ class Auth:
         except JWTError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Could not validate credentials')
 
-    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
         """
         Asynchronously retrieves the current user based on the provided token.
 
         This method decodes the JWT from the provided token, checks the scope and the email in the payload.
-        If the scope is 'access_token' and the email exists, it retrieves the user from the database.
+        Verified claims are kept in the token cache until the token expires, so a token reused across requests
+        has its signature checked only once.
+        If the scope is 'access_token' and the email exists, it retrieves the user from the user cache,
+        falling back to the database on a miss and caching the result.
         If any of these checks fail, it raises a credentials exception.
 
         Parameters
         ----------
         token : str
             The token to be decoded to get the user information. This is a dependency that defaults to oauth2_scheme.
-        db : Session
+        db : AsyncSession
             The database session for retrieving the user. This is a dependency that defaults to get_db.
 
         Raises
@@ -157,7 +170,7 @@ class Auth:
         Returns
         -------
         User
-            The user retrieved from the database.
+            The user retrieved from the cache or the database.
 
         """
         credentials_exception = HTTPException(
@@ -166,21 +179,27 @@ class Auth:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-        try:
-            # Decode JWT
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            if payload['scope'] == 'access_token':
-                email = payload["sub"]
-                if email is None:
-                    raise credentials_exception
-            else:
+        payload = self.token_cache.get(token)
+        if payload is None:
+            try:
+                # Decode JWT
+                payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            except JWTError as e:
                 raise credentials_exception
-        except JWTError as e:
+            self.token_cache.set(token, payload)
+        if payload.get('scope') != 'access_token':
+            raise credentials_exception
+        email = payload.get("sub")
+        if email is None:
             raise credentials_exception
 
+        user = await self.user_cache.get(email)
+        if user is not None:
+            return user
         user = await repository_users.get_user_by_email(email, db)
         if user is None:
             raise credentials_exception
+        await self.user_cache.set(user)
         return user
     
     def create_email_token(self, data: dict):
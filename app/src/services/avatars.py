@@ -0,0 +1,316 @@
+import io
+import os
+import time
+import hashlib
+import logging
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+
+import cloudinary
+import cloudinary.uploader
+import httpx
+from libgravatar import Gravatar
+from PIL import Image, ImageOps, UnidentifiedImageError
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.conf.config import settings
+from src.repository import users as repository_users
+from src.services.executor import BoundedExecutor
+
+logger = logging.getLogger(__name__)
+
+# Images are decoded in full before thumbnailing, so refuse anything larger than this many pixels.
+MAX_PIXELS = 40_000_000
+
+
+def make_thumbnail(data: bytes, size: int = settings.avatar_size) -> bytes:
+    """
+    Crops an uploaded image to a centered square and scales it to ``size`` pixels, as Cloudinary's
+    ``crop='fill'`` does. Runs inside a pool worker.
+
+    :param data: The uploaded file.
+    :type data: bytes
+    :param size: The width and height of the thumbnail.
+    :type size: int
+    :return: The thumbnail, encoded as JPEG.
+    :rtype: bytes
+    :raises ValueError: If the data is not an image Pillow can read, or the image is too large.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width * image.height > MAX_PIXELS:
+                raise ValueError("Image is too large")
+            # JPEG can be decoded at a fraction of its size, which is much cheaper for camera photos.
+            image.draft("RGB", (size, size))
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as err:
+        raise ValueError("Invalid image") from err
+    output = io.BytesIO()
+    thumbnail.save(output, "JPEG", quality=85, optimize=True)
+    return output.getvalue()
+
+
+class LocalAvatarStorage:
+    """
+    Stores avatars as files under ``directory``, served by the application itself under ``url_prefix``.
+
+    File names are digests of the key, so they are safe whatever the username, and the URL carries a digest of the
+    content so browsers and proxies never keep a replaced avatar.
+    """
+
+    def __init__(self, directory: str = settings.avatar_dir, url_prefix: str = settings.avatar_url_prefix):
+        self.directory = Path(directory)
+        self.url_prefix = url_prefix.rstrip("/")
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def save(self, key: str, data: bytes) -> str:
+        """
+        Writes an avatar, replacing the previous one atomically. Runs inside a pool worker.
+
+        :param key: The owner of the avatar.
+        :type key: str
+        :param data: The JPEG thumbnail.
+        :type data: bytes
+        :return: The URL of the avatar.
+        :rtype: str
+        """
+        name = hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + ".jpg"
+        path = self.directory / name
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix=".tmp", delete=False) as temporary:
+            temporary.write(data)
+        os.chmod(temporary.name, 0o644)
+        os.replace(temporary.name, path)
+        version = hashlib.blake2b(data, digest_size=6).hexdigest()
+        return f"{self.url_prefix}/{name}?v={version}"
+
+
+class CloudinaryAvatarStorage:
+    """
+    Stores avatars in Cloudinary under ``ContactsApp/<key>``. The SDK is configured once, when the storage is created.
+    """
+
+    def __init__(self, size: int = settings.avatar_size):
+        self.size = size
+        cloudinary.config(
+            cloud_name=settings.cloudinary_name,
+            api_key=settings.cloudinary_api_key,
+            api_secret=settings.cloudinary_api_secret,
+            secure=True
+        )
+
+    def save(self, key: str, data: bytes) -> str:
+        """
+        Uploads an avatar with the blocking Cloudinary SDK. Runs inside a pool worker.
+
+        :param key: The owner of the avatar.
+        :type key: str
+        :param data: The JPEG thumbnail.
+        :type data: bytes
+        :return: The URL of the avatar.
+        :rtype: str
+        """
+        public_id = f'ContactsApp/{key}'
+        r = cloudinary.uploader.upload(data, public_id=public_id, overwrite=True)
+        return cloudinary.CloudinaryImage(public_id).build_url(width=self.size, height=self.size, crop='fill',
+                                                               version=r.get('version'))
+
+
+STORAGES = {"local": LocalAvatarStorage, "cloudinary": CloudinaryAvatarStorage}
+
+
+def process_avatar(storage, key: str, data: bytes, size: int) -> str:
+    """
+    Thumbnails and stores an avatar in one pool job.
+
+    :return: The URL of the avatar.
+    :rtype: str
+    """
+    return storage.save(key, make_thumbnail(data, size))
+
+
+class AvatarUploader:
+    """
+    Thumbnails uploaded avatars and hands them to the storage backend selected by ``AVATAR_STORAGE``.
+
+    Decoding, resizing and the blocking backend calls run in a bounded thread pool, never on the event loop, and
+    fail fast with 503 and a Retry-After of ``retry_after`` seconds when ``workers + queue_size`` uploads are already
+    in flight. The backend is created once in ``main.lifespan``; a backend is any object with
+    ``save(key, data) -> url``.
+    """
+
+    def __init__(self, backend: str = settings.avatar_storage, size: int = settings.avatar_size,
+                 workers: int = settings.avatar_workers, queue_size: int = settings.avatar_queue_size,
+                 retry_after: int = settings.avatar_retry_after):
+        if backend not in STORAGES:
+            raise ValueError(f"Unknown avatar storage: {backend}")
+        self.backend = backend
+        self.size = size
+        self.storage = None
+        self.executor = BoundedExecutor("thread", workers, queue_size, retry_after)
+
+    async def start(self, storage=None) -> None:
+        """
+        Creates the storage backend and the worker pool. Called during application startup.
+
+        :param storage: A backend to use instead of the configured one.
+        """
+        self.storage = storage or self.storage or STORAGES[self.backend]()
+        await self.executor.start()
+
+    async def close(self) -> None:
+        """
+        Shuts the worker pool down. Called during application shutdown.
+        """
+        await self.executor.close()
+
+    async def upload(self, key: str, data: bytes) -> str:
+        """
+        Thumbnails and stores an avatar.
+
+        :param key: The owner of the avatar.
+        :type key: str
+        :param data: The uploaded file.
+        :type data: bytes
+        :return: The URL of the avatar.
+        :rtype: str
+        :raises ValueError: If the data is not a readable image.
+        :raises HTTPException: 503 with Retry-After if the pool is saturated.
+        """
+        await self.start()
+        return await self.executor.run(process_avatar, self.storage, key, data, self.size)
+
+
+avatar_uploader = AvatarUploader()
+
+
+def gravatar_hash(email: str) -> str:
+    """
+    Returns the Gravatar hash of an email address.
+
+    :param email: The email address.
+    :type email: str
+    :return: The hex digest Gravatar identifies the address by.
+    :rtype: str
+    """
+    return Gravatar(email).email_hash
+
+
+class NoAvatarResolver:
+    """
+    Resolver that leaves new users without an avatar.
+    """
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def resolve(self, email: str) -> str | None:
+        return None
+
+
+class GravatarResolver:
+    """
+    Resolves the default avatar of a new user to their Gravatar image URL.
+
+    Without ``check`` the URL is built locally, Gravatar serving its placeholder for unknown addresses. With
+    ``check`` the image is first requested with ``d=404`` over a shared async HTTP client, within ``timeout``
+    seconds, and addresses without a Gravatar get no avatar. Answers, hashes included, are kept for ``cache_ttl``
+    seconds in an LRU of ``cache_size`` normalized addresses; failed checks are not cached, so the next signup of
+    the address asks again.
+    """
+
+    def __init__(self, base_url: str = settings.gravatar_base_url, check: bool = settings.gravatar_check,
+                 timeout: float = settings.gravatar_timeout, cache_size: int = settings.gravatar_cache_size,
+                 cache_ttl: int = settings.gravatar_cache_ttl, transport: httpx.AsyncBaseTransport | None = None):
+        self.base_url = base_url
+        self.check = check
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.transport = transport
+        self.client: httpx.AsyncClient | None = None
+        self._local: OrderedDict[str, tuple[float, str | None]] = OrderedDict()
+
+    def _remember(self, email: str, url: str | None) -> None:
+        self._local[email] = (time.monotonic() + self.cache_ttl, url)
+        self._local.move_to_end(email)
+        while len(self._local) > self.cache_size:
+            self._local.popitem(last=False)
+
+    async def start(self) -> None:
+        """
+        Creates the HTTP client used for checks. Called during application startup.
+        """
+        if self.check and self.client is None:
+            self.client = httpx.AsyncClient(timeout=self.timeout, transport=self.transport)
+
+    async def close(self) -> None:
+        """
+        Closes the HTTP client. Called during application shutdown.
+        """
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def resolve(self, email: str) -> str | None:
+        """
+        Returns the Gravatar URL of an email address.
+
+        :param email: The email address.
+        :type email: str
+        :return: The image URL, or None if the address has no Gravatar or the check failed.
+        :rtype: str | None
+        """
+        email = email.strip().lower()
+        cached = self._local.get(email)
+        if cached is not None and cached[0] > time.monotonic():
+            self._local.move_to_end(email)
+            return cached[1]
+        url = self.base_url + gravatar_hash(email)
+        if not self.check:
+            self._remember(email, url)
+            return url
+        await self.start()
+        try:
+            response = await self.client.get(url, params={"d": "404"})
+        except httpx.HTTPError as err:
+            logger.warning("Gravatar check failed: %r", err)
+            return None
+        if response.status_code not in (200, 404):
+            logger.warning("Gravatar check answered %s", response.status_code)
+            return None
+        result = url if response.status_code == 200 else None
+        self._remember(email, result)
+        return result
+
+
+RESOLVERS = {"gravatar": GravatarResolver, "none": NoAvatarResolver}
+
+avatar_resolver = RESOLVERS[settings.avatar_resolver]()
+
+
+async def assign_default_avatar(email: str, session_factory, resolver=None) -> None:
+    """
+    Resolves the default avatar of a new user and stores it, unless the user has set one meanwhile.
+
+    Runs after the signup response, in its own database session, so signup never waits on the resolver. Errors are
+    logged and leave the user without an avatar.
+
+    :param email: The email of the new user.
+    :type email: str
+    :param session_factory: Creates the session to store the avatar with, bound like the session of the request.
+    :type session_factory: async_sessionmaker
+    :param resolver: The resolver to use instead of the configured one.
+    """
+    url = await (resolver or avatar_resolver).resolve(email)
+    if url is None:
+        return
+    try:
+        async with session_factory() as db:
+            await repository_users.set_default_avatar(email, url, db)
+    except SQLAlchemyError as err:
+        logger.error("Default avatar of %s not saved: %s", email, err)
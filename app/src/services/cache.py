@@ -0,0 +1,285 @@
+import json
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime
+
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.models import User
+from src.services.metrics import CONTACT_LIST_CACHE, TOKEN_CACHE
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache:
+    """
+    Two-tier cache of authenticated user identities keyed by email.
+
+    The first tier is an in-process LRU with a per-entry TTL. The optional second tier is the
+    async Redis client created in ``main.lifespan``, which lets several workers share entries.
+    An invalidation only reaches the local tier of the worker that made it, so while Redis is
+    enabled local entries live for ``local_ttl`` seconds at most and other workers see a change
+    within that time. Secrets (password hash and refresh token) are never cached; users returned from the cache
+    are transient ``User`` objects that are not attached to any session.
+    """
+    FIELDS = ("id", "username", "email", "created_at", "avatar", "confirmed")
+    PREFIX = "user:"
+
+    def __init__(self, maxsize: int = settings.user_cache_size, ttl: int = settings.user_cache_ttl,
+                 local_ttl: int = settings.user_cache_local_ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.redis = None
+        self._local: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    async def init(self, redis) -> None:
+        """
+        Enables the Redis tier.
+
+        :param redis: The async Redis client created during application startup.
+        :type redis: redis.asyncio.Redis
+        """
+        self.redis = redis
+
+    async def close(self) -> None:
+        """
+        Disables the Redis tier and drops every locally cached entry.
+        """
+        self.redis = None
+        self._local.clear()
+
+    async def get(self, email: str) -> User | None:
+        """
+        Returns the cached user for the given email, or None on a miss.
+
+        :param email: The email of the user.
+        :type email: str
+        :return: A transient User object built from the cached fields, or None.
+        :rtype: User | None
+        """
+        entry = self._local.get(email)
+        if entry is not None:
+            expires, data = entry
+            if expires > time.monotonic():
+                self._local.move_to_end(email)
+                return self._to_user(data)
+            del self._local[email]
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(self.PREFIX + email)
+            except RedisError as err:
+                logger.warning("User cache read failed: %s", err)
+                raw = None
+            if raw:
+                data = json.loads(raw)
+                self._remember(email, data)
+                return self._to_user(data)
+        return None
+
+    async def set(self, user: User) -> None:
+        """
+        Stores the identity fields of a user in both tiers.
+
+        :param user: The user loaded from the database.
+        :type user: User
+        """
+        data = {field: getattr(user, field) for field in self.FIELDS}
+        data["created_at"] = data["created_at"].isoformat() if data["created_at"] else None
+        self._remember(user.email, data)
+        if self.redis is not None:
+            try:
+                await self.redis.set(self.PREFIX + user.email, json.dumps(data), ex=self.ttl)
+            except RedisError as err:
+                logger.warning("User cache write failed: %s", err)
+
+    async def invalidate(self, email: str) -> None:
+        """
+        Removes the user with the given email from both tiers.
+
+        :param email: The email of the user.
+        :type email: str
+        """
+        self._local.pop(email, None)
+        if self.redis is not None:
+            try:
+                await self.redis.delete(self.PREFIX + email)
+            except RedisError as err:
+                logger.warning("User cache invalidation failed: %s", err)
+
+    def _remember(self, email: str, data: dict) -> None:
+        ttl = self.ttl if self.redis is None else min(self.ttl, self.local_ttl)
+        self._local[email] = (time.monotonic() + ttl, data)
+        self._local.move_to_end(email)
+        while len(self._local) > self.maxsize:
+            self._local.popitem(last=False)
+
+    @staticmethod
+    def _to_user(data: dict) -> User:
+        data = dict(data)
+        if data["created_at"]:
+            data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return User(**data)
+
+
+user_cache = UserCache()
+
+
+class ContactListCache:
+    """
+    Redis cache of serialized contact list pages.
+
+    Keys combine the user id, the collection version from ``src.services.etag`` and a digest of the query
+    parameters, so every write to a user's contacts (which bumps the version) invalidates all of their cached pages
+    at once without deleting anything; abandoned entries expire after the TTL. The cache uses the async Redis client
+    created in ``main.lifespan`` and is disabled without it. Redis errors count as misses.
+    """
+    PREFIX = "contacts:list:"
+
+    def __init__(self, ttl: int = settings.contact_list_cache_ttl):
+        self.ttl = ttl
+        self.redis = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.redis is not None
+
+    async def init(self, redis) -> None:
+        """
+        Enables the cache.
+
+        :param redis: The async Redis client created during application startup.
+        :type redis: redis.asyncio.Redis
+        """
+        self.redis = redis
+
+    async def close(self) -> None:
+        """
+        Disables the cache.
+        """
+        self.redis = None
+
+    def key(self, user_id: int, version: int, params: tuple) -> str:
+        digest = hashlib.blake2b(repr(params).encode(), digest_size=8).hexdigest()
+        return f"{self.PREFIX}{user_id}:{version}:{digest}"
+
+    async def get(self, user_id: int, version: int, *params) -> tuple[str, str | None] | None:
+        """
+        Returns a cached page.
+
+        :param user_id: The id of the user.
+        :type user_id: int
+        :param version: The current collection version of the user.
+        :type version: int
+        :param params: The parameters that select the page (filter, skip, limit, cursor).
+        :return: The JSON body and the cursor of the next page (or None), or None on a miss.
+        :rtype: tuple[str, str | None] | None
+        """
+        if self.redis is None:
+            return None
+        try:
+            raw = await self.redis.get(self.key(user_id, version, params))
+        except RedisError as err:
+            logger.warning("Contact list cache read failed: %s", err)
+            CONTACT_LIST_CACHE.labels("error").inc()
+            return None
+        if raw is None:
+            CONTACT_LIST_CACHE.labels("miss").inc()
+            return None
+        CONTACT_LIST_CACHE.labels("hit").inc()
+        next_cursor, body = raw.split("\n", 1)
+        return body, next_cursor or None
+
+    async def set(self, user_id: int, version: int, params: tuple, body: str, next_cursor: str | None) -> None:
+        """
+        Stores a serialized page under the collection version it was read at.
+
+        :param user_id: The id of the user.
+        :type user_id: int
+        :param version: The collection version read before the contacts were loaded.
+        :type version: int
+        :param params: The parameters that select the page, as passed to get.
+        :type params: tuple
+        :param body: The JSON body of the page.
+        :type body: str
+        :param next_cursor: The cursor of the next page, or None.
+        :type next_cursor: str | None
+        """
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(self.key(user_id, version, params), f"{next_cursor or ''}\n{body}", ex=self.ttl)
+        except RedisError as err:
+            logger.warning("Contact list cache write failed: %s", err)
+
+
+contact_list_cache = ContactListCache()
+
+
+class TokenCache:
+    """
+    In-process LRU of verified JWT claims, keyed by a digest of the token.
+
+    An access token is sent with every request of its lifetime, so its signature is verified once and the decoded
+    claims are reused until the token's ``exp``. Tokens are not stored, only their digests. Every worker keeps its own
+    cache; a size of 0 disables it.
+    """
+
+    def __init__(self, maxsize: int = settings.token_cache_size):
+        self.maxsize = maxsize
+        self._local: OrderedDict[bytes, dict] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: str) -> dict | None:
+        """
+        Returns the claims of a verified token that has not expired yet.
+
+        :param token: The encoded JWT.
+        :type token: str
+        :return: The decoded claims, or None on a miss.
+        :rtype: dict | None
+        """
+        if not self.maxsize:
+            return None
+        key = self._key(token)
+        payload = self._local.get(key)
+        if payload is not None and payload["exp"] > time.time():
+            self._local.move_to_end(key)
+            TOKEN_CACHE.labels("hit").inc()
+            return payload
+        if payload is not None:
+            del self._local[key]
+        TOKEN_CACHE.labels("miss").inc()
+        return None
+
+    def set(self, token: str, payload: dict) -> None:
+        """
+        Remembers the claims of a token whose signature has just been verified. Tokens without exp are not cached.
+
+        :param token: The encoded JWT.
+        :type token: str
+        :param payload: The claims returned by jwt.decode.
+        :type payload: dict
+        """
+        if not self.maxsize or not isinstance(payload.get("exp"), (int, float)):
+            return
+        key = self._key(token)
+        self._local[key] = payload
+        self._local.move_to_end(key)
+        while len(self._local) > self.maxsize:
+            self._local.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Forgets every cached token.
+        """
+        self._local.clear()
+
+
+token_cache = TokenCache()
@@ -0,0 +1,52 @@
+import csv
+import io
+import json
+from datetime import date
+from typing import AsyncIterator, List
+
+from src.database.models import Contact
+from src.schemas import ContactResponse
+
+FIELDS = tuple(ContactResponse.model_fields)
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def to_row(contact: Contact) -> list:
+    """
+    Reads the exported fields of a contact, in ContactResponse order.
+
+    The values come straight from the database, so they are not validated again on the way out.
+
+    :param contact: The contact to export.
+    :type contact: Contact
+    :return: The field values, with dates and datetimes in ISO 8601.
+    :rtype: list
+    """
+    values = [getattr(contact, field) for field in FIELDS]
+    return [value.isoformat() if isinstance(value, date) else value for value in values]
+
+
+async def encode(fmt: str, partitions: AsyncIterator[List[Contact]]) -> AsyncIterator[str]:
+    """
+    Encodes streamed contacts as NDJSON or CSV, one chunk per partition.
+
+    :param fmt: "ndjson" or "csv".
+    :type fmt: str
+    :param partitions: Lists of contacts, as yielded by repository_contacts.stream_contacts.
+    :type partitions: AsyncIterator[List[Contact]]
+    :return: Text chunks to send to the client; for CSV the first chunk is the header row.
+    :rtype: AsyncIterator[str]
+    """
+    if fmt == "ndjson":
+        async for contacts in partitions:
+            yield "".join(json.dumps(dict(zip(FIELDS, to_row(contact)))) + "\n" for contact in contacts)
+        return
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    yield buffer.getvalue()
+    async for contacts in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(to_row(contact) for contact in contacts)
+        yield buffer.getvalue()
@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+
+from pydantic import ValidationError
+
+from src.schemas import ContactBase
+
+CONTENT_TYPES = {
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+EXTENSIONS = {".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv"}
+
+
+def detect_format(content_type: str | None, filename: str | None = None) -> str | None:
+    """
+    Detects the format of an uploaded address book.
+
+    :param content_type: The Content-Type of the request or of the uploaded file.
+    :type content_type: str | None
+    :param filename: The name of the uploaded file, used when its content type is generic.
+    :type filename: str | None
+    :return: "json", "ndjson", "csv", or None if the format is not supported.
+    :rtype: str | None
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in CONTENT_TYPES:
+        return CONTENT_TYPES[media_type]
+    if filename and "." in filename:
+        return EXTENSIONS.get(filename[filename.rindex("."):].lower())
+    return None
+
+
+def read_rows(content: bytes, fmt: str) -> list:
+    """
+    Splits an uploaded address book into raw rows.
+
+    A JSON upload is an array of objects, an NDJSON upload has one object per non-empty line, and a CSV
+    upload has a header row with ContactBase field names. Empty CSV cells become None.
+
+    :param content: The raw upload.
+    :type content: bytes
+    :param fmt: The format returned by detect_format.
+    :type fmt: str
+    :return: The rows, in upload order.
+    :rtype: list
+    :raises ValueError: If the upload cannot be decoded as a whole.
+    """
+    text = content.decode("utf-8-sig")
+    if fmt == "json":
+        rows = json.loads(text)
+        if not isinstance(rows, list):
+            raise ValueError("Expected a JSON array of contacts")
+        return rows
+    if fmt == "ndjson":
+        rows = []
+        for number, line in enumerate(text.splitlines(), start=1):
+            if line.strip():
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError as err:
+                    raise ValueError(f"Invalid JSON on line {number}: {err.msg}")
+        return rows
+    return [{key: value or None for key, value in row.items()} for row in csv.DictReader(io.StringIO(text))]
+
+
+def validate_rows(rows: list) -> tuple[list[tuple[int, ContactBase]], list[dict]]:
+    """
+    Validates raw rows with ContactBase and drops repeated emails within the upload.
+
+    :param rows: The rows returned by read_rows.
+    :type rows: list
+    :return: The valid contacts with their row index, and an error for every rejected row.
+    :rtype: tuple[list[tuple[int, ContactBase]], list[dict]]
+    """
+    contacts, errors, seen = [], [], set()
+    for index, row in enumerate(rows):
+        try:
+            body = ContactBase.model_validate(row)
+        except ValidationError as err:
+            detail = "; ".join(f"{'.'.join(map(str, e['loc'])) or 'row'}: {e['msg']}" for e in err.errors())
+            errors.append({"index": index, "detail": detail})
+            continue
+        if body.email in seen:
+            errors.append({"index": index, "detail": "Duplicate email in upload"})
+            continue
+        seen.add(body.email)
+        contacts.append((index, body))
+    return contacts, errors
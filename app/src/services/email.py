@@ -1,12 +1,20 @@
+import asyncio
+import logging
+from email.message import Message
+from email.mime.text import MIMEText
+from email.utils import formataddr, formatdate, make_msgid
 from pathlib import Path
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
+import aiosmtplib
+from fastapi_mail import ConnectionConfig
 from pydantic import EmailStr
 
 from src.services.auth import auth_service
+from src.services.metrics import MAIL
 from src.conf.config import settings
 
+logger = logging.getLogger(__name__)
+
 conf = ConnectionConfig(
     MAIL_USERNAME=settings.mail_username,
     MAIL_PASSWORD=settings.mail_password,
@@ -22,11 +30,248 @@ conf = ConnectionConfig(
 )
 
 
+class MailSender:
+    """
+    Long-lived sender of the application emails.
+
+    Messages are queued in process and delivered by ``pool_size`` workers. Each worker keeps one SMTP connection
+    open and, every time it wakes up, sends up to ``batch_size`` queued messages over it, so a burst of signups costs
+    one TLS handshake and login per worker instead of one per message. A connection idle for ``idle_timeout``
+    seconds is closed and opened again for the next message. Templates are compiled once by a single Jinja
+    environment. Until start is called (tests, scripts) send delivers the message directly over a connection of
+    its own.
+    """
+
+    def __init__(self, config: ConnectionConfig = conf, pool_size: int = settings.mail_pool_size,
+                 batch_size: int = settings.mail_batch_size, idle_timeout: float = settings.mail_idle_timeout,
+                 queue_size: int = settings.mail_queue_size):
+        self.config = config
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.idle_timeout = idle_timeout
+        self.queue_size = queue_size
+        self._environment = None
+        self._queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """
+        Starts the workers. Called during application startup.
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.queue_size)
+            self._workers = [asyncio.create_task(self._work()) for _ in range(self.pool_size)]
+
+    async def close(self, timeout: float = 10) -> None:
+        """
+        Sends what is still queued, waiting at most ``timeout`` seconds, then stops the workers and closes their
+        connections. Called during application shutdown.
+
+        :param timeout: How long to wait for the queue to drain.
+        :type timeout: float
+        """
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error("%s queued emails were not sent before shutdown", self._queue.qsize())
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._queue = None
+        self._workers = []
+
+    def render(self, template_name: str, **context) -> str:
+        """
+        Renders a template from the templates folder, compiling it on first use only.
+
+        :param template_name: The file name of the template.
+        :type template_name: str
+        :param context: The template variables.
+        :return: The rendered template.
+        :rtype: str
+        """
+        if self._environment is None:
+            self._environment = self.config.template_engine()
+        return self._environment.get_template(template_name).render(**context)
+
+    def build(self, recipient: str, subject: str, html: str) -> Message:
+        """
+        Builds an HTML email from the configured sender.
+
+        :param recipient: The recipient's email address.
+        :type recipient: str
+        :param subject: The subject line.
+        :type subject: str
+        :param html: The HTML body.
+        :type html: str
+        :return: The message, ready to be sent.
+        :rtype: Message
+        """
+        # MIMEText uses the compat32 policy, which builds and flattens an order of magnitude faster than an
+        # EmailMessage with the default policy. make_msgid gets a domain so it does not resolve the host name.
+        message = MIMEText(html, "html", "utf-8")
+        message["From"] = formataddr((self.config.MAIL_FROM_NAME or "", self.config.MAIL_FROM))
+        message["To"] = recipient
+        message["Subject"] = subject
+        message["Date"] = formatdate(localtime=True)
+        message["Message-ID"] = make_msgid(domain=self.config.MAIL_FROM.rpartition("@")[2])
+        return message
+
+    async def send(self, message: Message) -> None:
+        """
+        Queues a message for the workers, waiting for room if the queue is full, or sends it right away if the
+        workers are not running.
+
+        :param message: The message to send.
+        :type message: Message
+        """
+        if self._queue is None:
+            await self.deliver(message)
+            return
+        await self._queue.put((message, None))
+
+    async def deliver(self, message: Message) -> bool:
+        """
+        Sends a message through the workers, or over a connection of its own if they are not running, and waits
+        for the outcome.
+
+        :param message: The message to send.
+        :type message: Message
+        :return: True if the SMTP server accepted the message.
+        :rtype: bool
+        """
+        if self._queue is None:
+            smtp, (sent,) = await self._deliver(None, [message])
+            await self._disconnect(smtp)
+            return sent
+        outcome = asyncio.get_running_loop().create_future()
+        await self._queue.put((message, outcome))
+        return await outcome
+
+    async def _work(self) -> None:
+        smtp = None
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(self._queue.get(), self.idle_timeout if smtp else None)
+                except asyncio.TimeoutError:
+                    await self._disconnect(smtp)
+                    smtp = None
+                    continue
+                batch = [message]
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                try:
+                    smtp, results = await self._deliver(smtp, [message for message, _ in batch])
+                    for (_, outcome), sent in zip(batch, results):
+                        if outcome is not None and not outcome.done():
+                            outcome.set_result(sent)
+                except Exception:
+                    # The worker must outlive any single batch, or deliver() would wait forever once all are gone.
+                    logger.exception("Batch of %s emails not sent", len(batch))
+                    smtp = None
+                finally:
+                    for _, outcome in batch:
+                        if outcome is not None and not outcome.done():
+                            outcome.set_result(False)
+                        self._queue.task_done()
+        finally:
+            if smtp is not None:
+                smtp.close()
+
+    async def _deliver(self, smtp: aiosmtplib.SMTP | None,
+                       batch: list[Message]) -> tuple[aiosmtplib.SMTP | None, list[bool]]:
+        """
+        Sends messages over a connection, reconnecting once per message if the connection was lost.
+
+        :return: The connection to reuse for the next batch, or None if there is none, and whether each message
+            was sent.
+        :raises Exception: Any other error, after closing the connection.
+        """
+        results = []
+        for message in batch:
+            sent = False
+            for attempt in range(2):
+                try:
+                    if smtp is None or not smtp.is_connected:
+                        smtp = await self._connect()
+                    await smtp.send_message(message)
+                except OSError as err:
+                    # Dropped or timed out connections: aiosmtplib raises them as ConnectionError/TimeoutError.
+                    await self._disconnect(smtp)
+                    smtp = None
+                    if attempt:
+                        logger.error("Email to %s not sent: %r", message["To"], err)
+                        MAIL.labels("failed").inc()
+                    continue
+                except aiosmtplib.SMTPException as err:
+                    logger.error("Email to %s not sent: %r", message["To"], err)
+                    MAIL.labels("failed").inc()
+                except Exception:
+                    # The state of the connection is unknown, so it is not reused.
+                    if smtp is not None:
+                        smtp.close()
+                    raise
+                else:
+                    MAIL.labels("sent").inc()
+                    sent = True
+                break
+            results.append(sent)
+        return smtp, results
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        config = self.config
+        smtp = aiosmtplib.SMTP(hostname=config.MAIL_SERVER, port=config.MAIL_PORT, timeout=config.TIMEOUT,
+                               use_tls=config.MAIL_SSL_TLS, start_tls=config.MAIL_STARTTLS,
+                               validate_certs=config.VALIDATE_CERTS)
+        try:
+            await smtp.connect()
+            if config.USE_CREDENTIALS:
+                await smtp.login(config.MAIL_USERNAME, config.MAIL_PASSWORD.get_secret_value())
+        except BaseException:
+            smtp.close()
+            raise
+        return smtp
+
+    @staticmethod
+    async def _disconnect(smtp: aiosmtplib.SMTP | None) -> None:
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except (OSError, aiosmtplib.SMTPException):
+            smtp.close()
+
+
+mail_sender = MailSender()
+
+
+def confirmation_email(email: str, username: str, host: str, token: str) -> Message:
+    """
+    Builds the email asking a user to confirm their address.
+
+    :param email: The recipient's email address.
+    :type email: str
+    :param username: The username of the recipient.
+    :type username: str
+    :param host: The host URL for the confirmation link.
+    :type host: str
+    :param token: The email confirmation token.
+    :type token: str
+    :return: The message, ready to be sent.
+    :rtype: Message
+    """
+    html = mail_sender.render("email_template.html", host=host, username=username, token=token)
+    return mail_sender.build(str(email), "Confirm your email ", html)
+
+
 async def send_email(email: EmailStr, username: str, host: str):
     """
     Asynchronously sends an email to a specified recipient with a confirmation link.
 
-    This function creates an email token for the specified recipient, constructs an email message with the token and other details, and then sends the email using the FastMail service. If there are any connection errors during this process, they are caught and printed.
+    This function creates an email token for the specified recipient, builds the confirmation email and hands it to the mail sender, which delivers it over a kept-alive SMTP connection. Delivery errors are logged by the mail sender. The routes only call it when the mail queue is unavailable.
 
     :param email: The recipient's email address.
     :type email: EmailStr
@@ -35,22 +280,7 @@ async def send_email(email: EmailStr, username: str, host: str):
     :param host: The host URL for the confirmation link.
     :type host: str
 
-    :raises ConnectionErrors: If there are any issues with the connection during the email sending process.
-
     :return: None
     """
-    try:
-        token_verification = auth_service.create_email_token({"sub": email})
-        message = MessageSchema(
-            subject="Confirm your email ",
-            recipients=[email],
-            template_body={"host": host, "username": username, "token": token_verification},
-            subtype=MessageType.html
-        )
-
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="email_template.html")
-        print("Email sent")
-    except ConnectionErrors as err:
-        print(err)
-
+    token_verification = auth_service.create_email_token({"sub": email})
+    await mail_sender.send(confirmation_email(email, username, str(host), token_verification))
@@ -0,0 +1,129 @@
+import time
+import hashlib
+import logging
+
+from redis.exceptions import RedisError
+
+from src.database.models import Contact
+
+logger = logging.getLogger(__name__)
+
+
+class CollectionVersions:
+    """
+    Per-user version numbers of the contacts collection, used to build list ETags without loading any rows.
+
+    Every write to a user's contacts calls bump after committing. Versions live in the async Redis client created in
+    ``main.lifespan``, so all workers agree on them. A missing key is initialised from the clock rather than from 1,
+    so a version lost to eviction or a Redis restart can never repeat one a client still holds. Without Redis (tests,
+    single-process development) versions are kept in process. If Redis is configured but fails, get returns None and
+    callers skip conditional responses, because a stale version would make clients keep stale data.
+    """
+    PREFIX = "contacts:version:"
+
+    def __init__(self):
+        self.redis = None
+        self._local: dict[int, int] = {}
+
+    async def init(self, redis) -> None:
+        """
+        Stores versions in Redis from now on.
+
+        :param redis: The async Redis client created during application startup.
+        :type redis: redis.asyncio.Redis
+        """
+        self.redis = redis
+
+    async def close(self) -> None:
+        """
+        Stops using Redis and forgets every locally kept version.
+        """
+        self.redis = None
+        self._local.clear()
+
+    async def get(self, user_id: int) -> int | None:
+        """
+        Returns the current version of a user's contacts.
+
+        :param user_id: The id of the user.
+        :type user_id: int
+        :return: The version, or None if it cannot be read.
+        :rtype: int | None
+        """
+        if self.redis is None:
+            return self._local.setdefault(user_id, time.time_ns())
+        key = self.PREFIX + str(user_id)
+        try:
+            version = await self.redis.get(key)
+            if version is None:
+                await self.redis.set(key, time.time_ns(), nx=True)
+                version = await self.redis.get(key)
+        except RedisError as err:
+            logger.warning("Contacts version read failed: %s", err)
+            return None
+        return int(version)
+
+    async def bump(self, user_id: int) -> None:
+        """
+        Moves a user's contacts to a new version. Call it after the change is committed.
+
+        :param user_id: The id of the user.
+        :type user_id: int
+        """
+        if self.redis is None:
+            self._local[user_id] = max(self._local.get(user_id, 0) + 1, time.time_ns())
+            return
+        key = self.PREFIX + str(user_id)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                await pipe.set(key, time.time_ns(), nx=True).incr(key).execute()
+        except RedisError as err:
+            logger.error("Contacts version bump failed, list ETags of user %s may be stale: %s", user_id, err)
+
+
+collection_versions = CollectionVersions()
+
+
+def contact_etag(contact: Contact) -> str:
+    """
+    Builds the strong ETag of a single contact from its id and last update time.
+
+    :param contact: The contact.
+    :type contact: Contact
+    :return: The quoted ETag.
+    :rtype: str
+    """
+    updated_at = contact.updated_at.isoformat() if contact.updated_at else ""
+    return f'"{contact.id}-{updated_at}"'
+
+
+def collection_etag(version: int, *params) -> str:
+    """
+    Builds the strong ETag of a contacts listing from the collection version and the query parameters.
+
+    :param version: The version returned by CollectionVersions.get.
+    :type version: int
+    :param params: The parameters that select the page (filter, skip, limit, cursor).
+    :return: The quoted ETag.
+    :rtype: str
+    """
+    digest = hashlib.blake2b(repr(params).encode(), digest_size=8).hexdigest()
+    return f'"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Checks an If-None-Match header against an ETag, using the weak comparison RFC 9110 prescribes for it.
+
+    :param if_none_match: The header value, possibly a comma-separated list or "*".
+    :type if_none_match: str | None
+    :param etag: The current quoted ETag.
+    :type etag: str
+    :return: True if the client already has this representation.
+    :rtype: bool
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
@@ -0,0 +1,61 @@
+import os
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+
+
+class BoundedExecutor:
+    """
+    Runs blocking or CPU-bound functions off the event loop in a bounded thread or process pool.
+
+    At most ``workers + queue_size`` jobs are admitted at once. When that limit is reached, further
+    calls fail fast with 503 Service Unavailable and a Retry-After header of ``retry_after`` seconds,
+    instead of queueing without bound while clients time out. ``workers=0`` uses one worker per CPU.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = 0, queue_size: int = 0, retry_after: int = 1):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.retry_after = retry_after
+        self.pending = 0
+        self._pool: Executor | None = None
+
+    async def start(self) -> None:
+        """
+        Creates the worker pool. Called during application startup.
+        """
+        if self._pool is None:
+            pool_class = ThreadPoolExecutor if self.kind == "thread" else ProcessPoolExecutor
+            self._pool = pool_class(max_workers=self.workers)
+
+    async def close(self) -> None:
+        """
+        Shuts the worker pool down. Called during application shutdown.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, func, *args):
+        """
+        Runs ``func(*args)`` in the pool and awaits the result.
+
+        :param func: A module-level function (picklable for the process pool).
+        :param args: Positional arguments for ``func``.
+        :return: The result of ``func``.
+        :raises HTTPException: 503 with Retry-After if the queue is saturated.
+        """
+        if self.pending >= self.workers + self.queue_size:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Server is busy, try again later",
+                                headers={"Retry-After": str(self.retry_after)})
+        await self.start()
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, func, *args)
+        finally:
+            self.pending -= 1
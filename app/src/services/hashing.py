@@ -0,0 +1,45 @@
+from passlib.context import CryptContext
+
+from src.conf.config import settings
+from src.services.executor import BoundedExecutor
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(password: str) -> str:
+    """
+    Hashes a password with bcrypt. Runs inside a pool worker.
+
+    :param password: The plain text password.
+    :type password: str
+    :return: The bcrypt hash.
+    :rtype: str
+    """
+    return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verifies a password against a bcrypt hash. Runs inside a pool worker.
+
+    :param plain_password: The plain text password.
+    :type plain_password: str
+    :param hashed_password: The bcrypt hash to verify against.
+    :type hashed_password: str
+    :return: True if the password matches the hash.
+    :rtype: bool
+    """
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class HashingExecutor(BoundedExecutor):
+    """
+    Runs bcrypt off the event loop in the bounded pool configured by the ``HASH_*`` settings.
+    """
+
+    def __init__(self, kind: str = settings.hash_executor, workers: int = settings.hash_workers,
+                 queue_size: int = settings.hash_queue_size, retry_after: int = settings.hash_retry_after):
+        super().__init__(kind, workers, queue_size, retry_after)
+
+
+hashing_executor = HashingExecutor()
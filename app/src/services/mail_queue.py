@@ -0,0 +1,253 @@
+import json
+import time
+import asyncio
+import hashlib
+import logging
+
+from redis.exceptions import RedisError, ResponseError
+
+from src.conf.config import settings
+from src.services.auth import auth_service
+from src.services.email import MailSender, confirmation_email, mail_sender
+from src.services.metrics import MAIL_QUEUE
+
+logger = logging.getLogger(__name__)
+
+STREAM = "mail:queue"
+GROUP = "mailers"
+RETRY = "mail:retry"
+DEAD = "mail:dead"
+SENT = "mail:sent:"
+KINDS = {"confirmation"}
+
+# Moves the retries that are due from the sorted set back to the stream, atomically so that a job is never lost or
+# queued twice by two workers promoting at the same time. Takes the current time in milliseconds and a batch size.
+PROMOTE_SCRIPT = """
+local due = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1], "LIMIT", 0, tonumber(ARGV[2]))
+for _, job in ipairs(due) do
+    redis.call("ZREM", KEYS[1], job)
+    redis.call("XADD", KEYS[2], "*", "job", job)
+end
+return #due
+"""
+
+
+def dedupe_key(job: dict) -> str:
+    """
+    Builds the key that marks a job as being sent or sent, from its recipient and confirmation token.
+
+    :param job: The job.
+    :type job: dict
+    :return: The Redis key.
+    :rtype: str
+    """
+    digest = hashlib.blake2b(f"{job['recipient']}\n{job['token']}".encode(), digest_size=16).hexdigest()
+    return SENT + digest
+
+
+class MailQueue:
+    """
+    Producer side of the durable outbound mail queue.
+
+    Routes add confirmation emails to a Redis stream instead of sending them from the request, so a restart of the
+    API worker loses no mail and the response never waits on SMTP. The stream is consumed by MailWorker, started
+    with ``python mail_worker.py``. Jobs hold everything needed to build the email, including the confirmation
+    token, so a retried job sends the same link. Without Redis, or if adding the job fails, enqueue returns False
+    and the caller falls back to sending the email in process.
+    """
+
+    def __init__(self):
+        self.redis = None
+
+    async def init(self, redis) -> None:
+        """
+        Adds jobs to Redis from now on.
+
+        :param redis: The async Redis client created during application startup.
+        :type redis: redis.asyncio.Redis
+        """
+        self.redis = redis
+
+    async def close(self) -> None:
+        """
+        Stops using Redis.
+        """
+        self.redis = None
+
+    async def enqueue_confirmation(self, email: str, username: str, host: str) -> bool:
+        """
+        Queues the email asking a user to confirm their address.
+
+        :param email: The recipient's email address.
+        :type email: str
+        :param username: The username of the recipient.
+        :type username: str
+        :param host: The host URL for the confirmation link.
+        :type host: str
+        :return: True if the job was queued, False if the caller has to send the email itself.
+        :rtype: bool
+        """
+        if self.redis is None:
+            return False
+        job = {"kind": "confirmation", "recipient": str(email), "username": username, "host": str(host),
+               "token": auth_service.create_email_token({"sub": str(email)}), "attempt": 0}
+        try:
+            await self.redis.xadd(STREAM, {"job": json.dumps(job)})
+        except RedisError as err:
+            logger.warning("Mail queue unavailable, sending in process: %s", err)
+            return False
+        MAIL_QUEUE.labels("queued").inc()
+        return True
+
+
+mail_queue = MailQueue()
+
+
+class MailWorker:
+    """
+    Consumer side of the durable outbound mail queue.
+
+    Reads jobs from the stream as a member of a consumer group, so several workers share the load, and sends them
+    through a MailSender. A job is acknowledged only after it was sent, retried or dead-lettered, and entries left
+    pending for ``claim_idle`` seconds by a worker that died are claimed by another one. A failed job is retried
+    after ``backoff * 2 ** (attempt - 1)`` seconds, kept meanwhile in a sorted set by due time, and after
+    ``max_attempts`` it is pushed to the dead-letter list with its last error. Before sending, a key derived from the
+    recipient and token is set: "sending" for ``claim_idle`` seconds, then "sent" for ``dedupe_ttl`` seconds, so a
+    job queued or delivered twice is sent once.
+    """
+
+    def __init__(self, redis, sender: MailSender = mail_sender, name: str = "mailer",
+                 batch_size: int = settings.mail_batch_size, block: float = 5,
+                 max_attempts: int = settings.mail_max_attempts, backoff: float = settings.mail_retry_backoff,
+                 claim_idle: float = settings.mail_claim_idle, dedupe_ttl: int = settings.mail_dedupe_ttl):
+        self.redis = redis
+        self.sender = sender
+        self.name = name
+        self.batch_size = batch_size
+        self.block = block
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.claim_idle = claim_idle
+        self.dedupe_ttl = dedupe_ttl
+        self.promote = redis.register_script(PROMOTE_SCRIPT)
+        self.running = False
+
+    async def setup(self) -> None:
+        """
+        Creates the stream and the consumer group if they do not exist yet.
+        """
+        try:
+            await self.redis.xgroup_create(STREAM, GROUP, id="0", mkstream=True)
+        except ResponseError as err:
+            if "BUSYGROUP" not in str(err):
+                raise
+
+    async def run(self) -> None:
+        """
+        Processes jobs until stop is called. Redis and unexpected errors are logged and retried after a pause.
+        """
+        await self.setup()
+        self.running = True
+        while self.running:
+            try:
+                await self.run_once()
+            except RedisError as err:
+                logger.error("Mail worker %s lost Redis: %s", self.name, err)
+                await asyncio.sleep(self.block)
+            except Exception:
+                logger.exception("Mail worker %s failed to process a batch", self.name)
+                await asyncio.sleep(self.block)
+
+    def stop(self) -> None:
+        """
+        Makes run return once the batch in progress is processed, at most ``block`` seconds later when idle.
+        """
+        self.running = False
+
+    async def run_once(self) -> int:
+        """
+        Promotes due retries, claims abandoned entries, then waits up to ``block`` seconds for new ones and
+        processes them.
+
+        :return: The number of entries processed.
+        :rtype: int
+        """
+        await self.promote(keys=[RETRY, STREAM], args=[int(time.time() * 1000), self.batch_size])
+        # Redis 6.2 answers XAUTOCLAIM with two elements, Redis 7 adds the ids of deleted entries.
+        entries = (await self.redis.xautoclaim(STREAM, GROUP, self.name, int(self.claim_idle * 1000),
+                                               count=self.batch_size))[1]
+        if not entries:
+            streams = await self.redis.xreadgroup(GROUP, self.name, {STREAM: ">"}, count=self.batch_size,
+                                                  block=int(self.block * 1000))
+            entries = streams[0][1] if streams else []
+        entries = [(entry_id, fields) for entry_id, fields in entries if fields]
+        if entries:
+            await self.process(entries)
+        return len(entries)
+
+    async def process(self, entries: list[tuple[str, dict]]) -> None:
+        """
+        Sends a batch of stream entries concurrently, then retries or dead-letters the failures and acknowledges
+        every entry. An entry that is not a valid job is dead-lettered as is, and an error raised while building or
+        sending one email fails only that job.
+
+        :param entries: The stream entries as (id, fields) pairs.
+        :type entries: list[tuple[str, dict]]
+        """
+        jobs, malformed = [], []
+        for entry_id, fields in entries:
+            try:
+                job = json.loads(fields["job"])
+                key = dedupe_key(job)
+            except (KeyError, TypeError, ValueError) as err:
+                malformed.append({"entry": fields, "error": f"malformed job: {err!r}"})
+                continue
+            if await self.redis.set(key, "sending", nx=True, px=int(self.claim_idle * 1000)):
+                jobs.append(job)
+            else:
+                MAIL_QUEUE.labels("duplicate").inc()
+        results = await asyncio.gather(*(self.send(job) for job in jobs), return_exceptions=True)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for job in malformed:
+                logger.error("Mail queue entry dead-lettered: %s", job["error"])
+                pipe.lpush(DEAD, json.dumps(job))
+                MAIL_QUEUE.labels("dead").inc()
+            for job, error in zip(jobs, results):
+                if isinstance(error, Exception):
+                    logger.error("Email to %s failed", job["recipient"], exc_info=error)
+                    error = repr(error)
+                if error is None:
+                    pipe.set(dedupe_key(job), "sent", ex=self.dedupe_ttl)
+                    MAIL_QUEUE.labels("sent").inc()
+                    continue
+                pipe.delete(dedupe_key(job))
+                job = {**job, "attempt": job.get("attempt", 0) + 1, "error": error}
+                if job["attempt"] >= self.max_attempts or job.get("kind") not in KINDS:
+                    logger.error("Email to %s dead-lettered after %s attempts: %s", job["recipient"],
+                                 job["attempt"], error)
+                    pipe.lpush(DEAD, json.dumps(job))
+                    MAIL_QUEUE.labels("dead").inc()
+                else:
+                    due = time.time() + self.backoff * 2 ** (job["attempt"] - 1)
+                    pipe.zadd(RETRY, {json.dumps(job): int(due * 1000)})
+                    MAIL_QUEUE.labels("retried").inc()
+            ids = [entry_id for entry_id, _ in entries]
+            pipe.xack(STREAM, GROUP, *ids)
+            pipe.xdel(STREAM, *ids)
+            await pipe.execute()
+
+    async def send(self, job: dict) -> str | None:
+        """
+        Builds and sends the email of a job.
+
+        :param job: The job.
+        :type job: dict
+        :return: None if the email was sent, otherwise the reason it was not.
+        :rtype: str | None
+        """
+        if job.get("kind") not in KINDS:
+            return f"unknown job kind {job.get('kind')!r}"
+        message = confirmation_email(job["recipient"], job["username"], job["host"], job["token"])
+        if await self.sender.deliver(message):
+            return None
+        return "rejected or undeliverable, see the mail worker log"
@@ -0,0 +1,138 @@
+import time
+from contextvars import ContextVar
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.routing import Match
+
+from src.conf.config import settings
+from src.database.pool import PoolMetrics, pool_metrics
+
+UNMATCHED = "<unmatched>"
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route template and status code.",
+                   ["method", "route", "status"])
+IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests currently being served.", ["method", "route"])
+LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency, including streaming the body.",
+                    ["method", "route"])
+DB_QUERIES = Histogram("http_request_db_queries", "Database queries executed per HTTP request.",
+                       ["method", "route"], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250))
+DB_TIME = Histogram("http_request_db_seconds", "Time spent executing database queries per HTTP request.",
+                    ["method", "route"], buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5))
+RATE_LIMIT = Counter("rate_limiter_requests_total", "Rate limiter decisions by backend (redis or local) and result.",
+                     ["backend", "result"])
+TOKEN_CACHE = Counter("token_cache_requests_total", "Verified access token cache lookups by result.", ["result"])
+MAIL = Counter("mail_messages_total", "Emails handed to the SMTP server by result (sent or failed).", ["result"])
+MAIL_QUEUE = Counter("mail_queue_jobs_total",
+                     "Mail queue jobs by outcome (queued, sent, duplicate, retried or dead).", ["result"])
+CONTACT_LIST_CACHE = Counter("contact_list_cache_requests_total", "Contact list cache lookups by result.",
+                             ["result"])
+
+# [query count, seconds] of the request being served, shared with the cursor events of its session.
+_db_stats: ContextVar[list | None] = ContextVar("db_stats", default=None)
+
+
+def track_queries(engine: AsyncEngine) -> None:
+    """
+    Subscribes to the cursor events of an engine to count queries and their time per request.
+
+    :param engine: The application engine.
+    :type engine: AsyncEngine
+    """
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _db_stats.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += elapsed
+
+
+class PoolCollector:
+    """
+    Exposes the connection pool metrics collected by src.database.pool to Prometheus.
+    """
+
+    def __init__(self, metrics: PoolMetrics):
+        self.metrics = metrics
+
+    def collect(self):
+        """
+        Yields the pool counters and gauges. Called by the registry on every scrape.
+        """
+        snapshot = self.metrics.snapshot()
+        for name in ("checkouts", "connects", "invalidations", "timeouts", "wait_seconds"):
+            value = snapshot["wait_seconds_total" if name == "wait_seconds" else name]
+            yield CounterMetricFamily(f"db_pool_{name}", f"Connection pool {name.replace('_', ' ')}.", value=value)
+        for name in ("size", "max_overflow", "checked_out", "overflow", "idle"):
+            if name in snapshot:
+                yield GaugeMetricFamily(f"db_pool_{name}", f"Connection pool {name.replace('_', ' ')}.",
+                                        value=snapshot[name])
+
+
+REGISTRY.register(PoolCollector(pool_metrics))
+
+
+class PrometheusMiddleware:
+    """
+    ASGI middleware recording request count, in-flight requests, latency and database usage per route template.
+
+    Routes are labelled by their path template (e.g. /api/contacts/{contact_id}), so the number of series stays
+    bounded; requests that match no route share a single label. With ``server_timing`` (``SERVER_TIMING``, off by
+    default since it reveals database usage to every client) the database query count and time of every response are
+    also sent in a Server-Timing header, which can only cover the queries run before the response starts (not those
+    of a streamed body).
+    """
+
+    def __init__(self, app, server_timing: bool = settings.server_timing):
+        self.app = app
+        self.server_timing = server_timing
+
+    def route_template(self, scope) -> str:
+        """
+        Finds the path template of the route that will serve a request.
+        """
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return UNMATCHED
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method, route = scope["method"], self.route_template(scope)
+        stats = [0, 0.0]
+        token = _db_stats.set(stats)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    timing = f'db;dur={stats[1] * 1000:.1f};desc="{stats[0]} queries"'
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        IN_PROGRESS.labels(method, route).inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            LATENCY.labels(method, route).observe(time.perf_counter() - started)
+            IN_PROGRESS.labels(method, route).dec()
+            REQUESTS.labels(method, route, str(status)).inc()
+            DB_QUERIES.labels(method, route).observe(stats[0])
+            DB_TIME.labels(method, route).observe(stats[1])
+            _db_stats.reset(token)
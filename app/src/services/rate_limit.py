@@ -0,0 +1,248 @@
+import asyncio
+import math
+import time
+import logging
+
+from fastapi import Depends, HTTPException, Request, status
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.models import User
+from src.services.auth import auth_service
+from src.services.metrics import RATE_LIMIT
+
+logger = logging.getLogger(__name__)
+
+SLIDING_WINDOW = "sliding_window"
+TOKEN_BUCKET = "token_bucket"
+
+# Both scripts take the limit, the window in milliseconds and the weight of the request, read the clock of the
+# Redis server so that every worker agrees on it, and return {allowed, retry after in milliseconds}.
+SCRIPTS = {
+    SLIDING_WINDOW: """
+local limit, window, weight = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local index = math.floor(now / window)
+local data = redis.call("HMGET", KEYS[1], "window", "current", "previous")
+local current, previous = tonumber(data[2]) or 0, tonumber(data[3]) or 0
+if tonumber(data[1]) ~= index then
+    if tonumber(data[1]) == index - 1 then previous = current else previous = 0 end
+    current = 0
+end
+local elapsed = now - index * window
+if previous * (window - elapsed) / window + current + weight > limit then
+    local retry = window - elapsed
+    if current + weight <= limit and previous > 0 then
+        retry = retry - (limit - current - weight) * window / previous
+    end
+    return {0, math.max(1, math.ceil(retry))}
+end
+redis.call("HSET", KEYS[1], "window", index, "current", current + weight, "previous", previous)
+redis.call("PEXPIRE", KEYS[1], window * 2)
+return {1, 0}
+""",
+    TOKEN_BUCKET: """
+local capacity, window, weight = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local rate = capacity / window
+local data = redis.call("HMGET", KEYS[1], "tokens", "updated")
+local tokens = tonumber(data[1]) or capacity
+local updated = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+if tokens < weight then
+    return {0, math.max(1, math.ceil((weight - tokens) / rate))}
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens - weight), "updated", now)
+redis.call("PEXPIRE", KEYS[1], window)
+return {1, 0}
+""",
+}
+
+
+class LocalLimiter:
+    """
+    In-process implementation of the sliding window and token bucket scripts, used while Redis is unavailable.
+
+    Every worker keeps its own counters, so during a fallback a user may get up to one limit per worker.
+    """
+    MAX_KEYS = 10000
+
+    def __init__(self, algorithm: str, limit: int, window: int):
+        self.algorithm = algorithm
+        self.limit = limit
+        self.window = window
+        self._state: dict[str, list] = {}
+
+    def hit(self, key: str, weight: int, now: float | None = None) -> int:
+        """
+        Counts a request against a key.
+
+        :param key: The key of the caller.
+        :type key: str
+        :param weight: The cost of the request.
+        :type weight: int
+        :param now: The current time in milliseconds. Defaults to the monotonic clock.
+        :type now: float | None
+        :return: 0 if the request is allowed, otherwise the milliseconds to wait before retrying.
+        :rtype: int
+        """
+        now = time.monotonic() * 1000 if now is None else now
+        if len(self._state) >= self.MAX_KEYS and key not in self._state:
+            self._prune(now)
+        if self.algorithm == TOKEN_BUCKET:
+            return self._token_bucket(key, weight, now)
+        return self._sliding_window(key, weight, now)
+
+    def _sliding_window(self, key: str, weight: int, now: float) -> int:
+        index = int(now // self.window)
+        started, current, previous = self._state.get(key, (index, 0, 0))
+        if started != index:
+            previous, current = (current if started == index - 1 else 0), 0
+        elapsed = now - index * self.window
+        if previous * (self.window - elapsed) / self.window + current + weight > self.limit:
+            retry = self.window - elapsed
+            if current + weight <= self.limit and previous > 0:
+                retry -= (self.limit - current - weight) * self.window / previous
+            return max(1, math.ceil(retry))
+        self._state[key] = [index, current + weight, previous]
+        return 0
+
+    def _token_bucket(self, key: str, weight: int, now: float) -> int:
+        rate = self.limit / self.window
+        tokens, updated = self._state.get(key, (self.limit, now))
+        tokens = min(self.limit, tokens + max(0.0, now - updated) * rate)
+        if tokens < weight:
+            return max(1, math.ceil((weight - tokens) / rate))
+        self._state[key] = [tokens - weight, now]
+        return 0
+
+    def _prune(self, now: float) -> None:
+        if self.algorithm == TOKEN_BUCKET:
+            stale = [key for key, (_, updated) in self._state.items() if now - updated >= self.window]
+        else:
+            index = int(now // self.window)
+            stale = [key for key, (started, _, _) in self._state.items() if started < index - 1]
+        for key in stale:
+            del self._state[key]
+
+
+class RateLimiter:
+    """
+    Per-user rate limiter shared by every contacts route.
+
+    Each request costs the weight of its route (1 unless set with the weight decorator, and never more than
+    ``times``, so that every route can be called) from a single budget of ``times`` per ``seconds`` per user, using
+    a sliding window counter or a token bucket. The decision is one atomic Lua script in the async Redis client
+    created in ``main.lifespan``. If Redis answers slower than ``timeout`` or fails, the in-process LocalLimiter
+    decides instead, and Redis is left alone for ``cooldown`` seconds so that a slow Redis does not delay every
+    request.
+    """
+    PREFIX = "ratelimit:"
+
+    def __init__(self, times: int = settings.rate_limiter_times, seconds: int = settings.rate_limiter_seconds,
+                 algorithm: str = settings.rate_limiter_algorithm, timeout: float = settings.rate_limiter_timeout,
+                 cooldown: float = settings.rate_limiter_cooldown):
+        if algorithm not in SCRIPTS:
+            raise ValueError(f"Unknown rate limiter algorithm: {algorithm}")
+        self.times = times
+        self.window = seconds * 1000
+        self.algorithm = algorithm
+        self.timeout = timeout
+        self.cooldown = cooldown
+        self.redis = None
+        self.script = None
+        self.local = LocalLimiter(algorithm, times, self.window)
+        self._skip_redis_until = 0.0
+
+    async def init(self, redis) -> None:
+        """
+        Makes decisions in Redis from now on.
+
+        :param redis: The async Redis client created during application startup.
+        :type redis: redis.asyncio.Redis
+        """
+        self.redis = redis
+        self.script = redis.register_script(SCRIPTS[self.algorithm])
+        self._skip_redis_until = 0.0
+
+    async def close(self) -> None:
+        """
+        Stops using Redis and forgets the local counters.
+        """
+        self.redis = None
+        self.script = None
+        self.local = LocalLimiter(self.algorithm, self.times, self.window)
+
+    async def hit(self, key: str, weight: int = 1) -> int:
+        """
+        Counts a request against a key.
+
+        :param key: The key of the caller.
+        :type key: str
+        :param weight: The cost of the request.
+        :type weight: int
+        :return: 0 if the request is allowed, otherwise the milliseconds to wait before retrying.
+        :rtype: int
+        """
+        if self.script is not None and time.monotonic() >= self._skip_redis_until:
+            try:
+                _, retry = await asyncio.wait_for(
+                    self.script(keys=[self.PREFIX + key], args=[self.times, self.window, weight]), self.timeout)
+            except (RedisError, asyncio.TimeoutError) as err:
+                logger.warning("Rate limiter falls back to local counters for %s s: %r", self.cooldown, err)
+                self._skip_redis_until = time.monotonic() + self.cooldown
+            else:
+                RATE_LIMIT.labels("redis", "limited" if retry else "allowed").inc()
+                return int(retry)
+        retry = self.local.hit(key, weight)
+        RATE_LIMIT.labels("local", "limited" if retry else "allowed").inc()
+        return retry
+
+    def describe(self, weight: int = 1) -> str:
+        """
+        Describes the limit of a route, for its OpenAPI description.
+
+        :param weight: The weight of the route.
+        :type weight: int
+        :return: The description.
+        :rtype: str
+        """
+        budget = f"{self.times} requests per {self.window // 1000} seconds per user, shared by the contacts routes"
+        weight = min(weight, self.times)
+        if weight == 1:
+            return f"No more than {budget}"
+        return f"Counts as {weight} requests against the limit of {budget}"
+
+    async def __call__(self, request: Request, user: User = Depends(auth_service.get_current_user)) -> None:
+        """
+        Route dependency that rejects the request when the current user is over the limit.
+
+        :param request: The incoming request, whose endpoint carries the weight.
+        :type request: Request
+        :param user: The authenticated user, resolved once per request together with the route.
+        :type user: User
+        :raises HTTPException: 429 with a Retry-After header if the user is over the limit.
+        """
+        weight = min(getattr(request.scope.get("endpoint"), "rate_limit_weight", 1), self.times)
+        retry = await self.hit(f"user:{user.id}", weight)
+        if retry:
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too Many Requests",
+                                headers={"Retry-After": str(math.ceil(retry / 1000))})
+
+
+def weight(value: int):
+    """
+    Decorator setting how many requests an endpoint counts as. Apply it below the route decorator.
+
+    :param value: The weight of the endpoint.
+    :type value: int
+    """
+    def decorate(endpoint):
+        endpoint.rate_limit_weight = value
+        return endpoint
+    return decorate
+
+
+rate_limiter = RateLimiter()
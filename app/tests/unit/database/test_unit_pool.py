@@ -0,0 +1,48 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database.pool import InstrumentedPool, PoolMetrics, pool_metrics
+
+
+class TestPoolMetrics(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{Path(self.tmp.name) / 'pool.db'}",
+                                          poolclass=InstrumentedPool, pool_size=1, max_overflow=0, pool_timeout=0.01)
+        self.metrics = PoolMetrics()
+        self.metrics.register(self.engine)
+        pool_metrics.reset()
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+        self.tmp.cleanup()
+
+    def test_snapshot_without_engine(self):
+        snapshot = PoolMetrics().snapshot()
+        self.assertEqual(snapshot["checkouts"], 0)
+        self.assertNotIn("checked_out", snapshot)
+
+    async def test_checkout(self):
+        async with self.engine.connect():
+            snapshot = self.metrics.snapshot()
+            self.assertEqual(snapshot["checked_out"], 1)
+            self.assertEqual(snapshot["idle"], 0)
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot["checkouts"], 1)
+        self.assertEqual(snapshot["connects"], 1)
+        self.assertEqual(snapshot["checked_out"], 0)
+        self.assertEqual(snapshot["size"], 1)
+        self.assertGreater(pool_metrics.wait_seconds_total, 0)
+
+    async def test_timeout(self):
+        async with self.engine.connect():
+            with self.assertRaises(PoolTimeoutError):
+                async with self.engine.connect():
+                    pass
+        self.assertEqual(pool_metrics.timeouts, 1)
+        self.assertGreaterEqual(pool_metrics.wait_seconds_max, 0.01)
@@ -1,24 +1,42 @@
 import unittest
-from sqlalchemy.orm import Session
-from unittest.mock import MagicMock
+from sqlalchemy.ext.asyncio import AsyncSession
+from unittest.mock import MagicMock, patch
 from unittest import TestCase
-from datetime import datetime
+from datetime import date, datetime
 from tests.unit.test_base import TestBase
-from src.database.models import Contact, User
+from types import SimpleNamespace
+from src.database.models import Contact, ContactTombstone, User
 from src.schemas import ContactBase, ContactUpdate
+from src.services.etag import collection_versions
 from src.repository.contacts import (
+    birthday_window,
+    encode_cursor,
+    decode_cursor,
+    encode_sync_cursor,
+    decode_sync_cursor,
+    filter_conditions,
+    get_changes,
     get_contacts,
+    get_uncovered_filter_attributes,
     get_contact,
+    get_contacts_by_ids,
     get_contacts_by_birthdays,
     create_contact,
+    create_contacts,
     remove_contact,
-    update_contact
+    remove_contacts,
+    search_contacts,
+    stream_contacts,
+    update_contact,
+    update_contacts
 )
 
 class TestContacts(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
-        self.session = MagicMock(spec=Session)
+        self.session = MagicMock(spec=AsyncSession)
+        self.result = MagicMock()
+        self.session.execute.return_value = self.result
         self.user = MagicMock(spec=User)
         self.user.id = 1
         self.contacts = []
@@ -26,25 +44,172 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
             self.contacts.append(MagicMock(spec=Contact))
 
     async def test_get_contacts(self):        
-        self.session.query().filter().offset().limit().all.return_value = self.contacts
+        self.result.scalars.return_value.all.return_value = self.contacts
         result = await get_contacts(filter=None,skip=0, limit=10, user=self.user, db=self.session)
         self.assertEqual(result, self.contacts)    
 
+    async def test_get_contacts_typed_filter(self):
+        self.result.scalars.return_value.all.return_value = self.contacts
+        await get_contacts(filter="id::5|birthday::2000-01-31|created_at::2024-06-01T12:00:00|surname::Brown",
+                           skip=0, limit=10, user=self.user, db=self.session)
+        params = self.session.execute.call_args.args[0].compile().params
+        self.assertEqual((params["id_1"], params["birthday_1"], params["created_at_1"], params["surname_1"]),
+                         (5, date(2000, 1, 31), datetime(2024, 6, 1, 12, 0), "Brown"))
+
+    def test_filter_conditions(self):
+        condition, = filter_conditions("updated_at::2024-06-01T12:00:00Z")
+        self.assertIsNone(condition.right.value.tzinfo)
+        self.assertEqual(filter_conditions(None), [])
+        for filter in ("id::abc", "birthday::yesterday", "unknown::1", "name"):
+            with self.assertRaises(ValueError):
+                filter_conditions(filter)
+
+    async def test_get_contacts_cursor(self):
+        self.result.scalars.return_value.all.return_value = self.contacts
+        result = await get_contacts(filter=None, skip=0, limit=10, user=self.user, db=self.session,
+                                    cursor=encode_cursor(Contact(id=5)))
+        self.assertEqual(result, self.contacts)
+        query = str(self.session.execute.call_args.args[0])
+        self.assertIn("contacts.id >", query)
+        self.assertIn("ORDER BY contacts.id", query)
+        self.assertNotIn("OFFSET", query)
+
+    async def test_get_contacts_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            await get_contacts(filter=None, skip=0, limit=10, user=self.user, db=self.session, cursor="bad")
+
+    async def test_stream_contacts(self):
+        async def partitions():
+            yield self.contacts[:2]
+            yield self.contacts[2:]
+        self.session.stream_scalars.return_value.partitions = partitions
+        result = [batch async for batch in stream_contacts(filter="surname::Brown", user=self.user, db=self.session,
+                                                            batch_size=2)]
+        self.assertEqual(result, [self.contacts[:2], self.contacts[2:]])
+        query = self.session.stream_scalars.call_args.args[0]
+        self.assertEqual(query.get_execution_options()["yield_per"], 2)
+        self.assertIn("contacts.surname =", str(query))
+
+    def test_sync_cursor_round_trip(self):
+        self.assertEqual(decode_sync_cursor(encode_sync_cursor(datetime(2024, 6, 1, 12, 0, 0, 5), 42)),
+                         (datetime(2024, 6, 1, 12, 0, 0, 5), 42))
+        with self.assertRaises(ValueError):
+            decode_sync_cursor("bad")
+
+    async def test_get_changes(self):
+        now = datetime(2024, 6, 1, 12, 0)
+        self.session.scalar.return_value = now
+        rows = [SimpleNamespace(changed_at=datetime(2024, 6, 1, 10, 0), contact_id=1, deleted=False),
+                SimpleNamespace(changed_at=datetime(2024, 6, 1, 10, 1), contact_id=2, deleted=True),
+                SimpleNamespace(changed_at=datetime(2024, 6, 1, 11, 59, 58), contact_id=3, deleted=False)]
+        self.result.all.return_value = rows
+        self.result.scalars.return_value.all.return_value = self.contacts[:2]
+        updated, deleted, cursor, has_more = await get_changes(since=datetime(2024, 6, 1), cursor=None, limit=3,
+                                                               user=self.user, db=self.session, horizon=5)
+        self.assertEqual(updated, self.contacts[:2])
+        self.assertEqual(deleted, [2])
+        self.assertFalse(has_more)
+        self.assertEqual(decode_sync_cursor(cursor), (datetime(2024, 6, 1, 11, 59, 55), 0))
+        query = str(self.session.execute.call_args_list[0].args[0])
+        self.assertIn("UNION ALL", query)
+        self.assertIn("contact_tombstones", query)
+
+    async def test_get_changes_has_more(self):
+        self.session.scalar.return_value = datetime(2024, 6, 1, 12, 0)
+        self.result.all.return_value = [SimpleNamespace(changed_at=datetime(2024, 6, 1, 10, i), contact_id=i,
+                                                        deleted=True) for i in range(3)]
+        updated, deleted, cursor, has_more = await get_changes(since=None, cursor=None, limit=2,
+                                                               user=self.user, db=self.session)
+        self.assertEqual(updated, [])
+        self.assertEqual(deleted, [0, 1])
+        self.assertTrue(has_more)
+        self.assertEqual(decode_sync_cursor(cursor), (datetime(2024, 6, 1, 10, 1), 1))
+        self.assertEqual(self.session.execute.call_count, 1)
+
+    async def test_get_changes_aware_since(self):
+        self.session.scalar.return_value = datetime(2024, 6, 1, 12, 0)
+        self.result.all.return_value = []
+        since = datetime.fromisoformat("2999-01-01T00:00:00Z")
+        updated, deleted, cursor, has_more = await get_changes(since=since, cursor=None, limit=2,
+                                                               user=self.user, db=self.session)
+        self.assertEqual((updated, deleted, has_more), ([], [], False))
+        self.assertEqual(decode_sync_cursor(cursor), (datetime(2024, 6, 1, 11, 59, 55), 0))
+        params = self.session.execute.call_args.args[0].compile().params.values()
+        self.assertTrue(all(value.tzinfo is None for value in params if isinstance(value, datetime)))
+
+    async def test_get_changes_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            await get_changes(since=None, cursor="bad", limit=2, user=self.user, db=self.session)
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(Contact(id=42))), 42)
+
     async def test_get_contacts_by_birthdays(self):        
-        self.session.query().filter().filter().all.return_value = self.contacts
+        self.result.scalars.return_value.all.return_value = self.contacts
         result = await get_contacts_by_birthdays(skip=0, limit=10, user=self.user, db=self.session)
         self.assertEqual(result, self.contacts)
 
+    async def test_get_contacts_by_birthdays_wraps_year_end(self):
+        self.result.scalars.return_value.all.return_value = self.contacts
+        with patch('src.repository.contacts.birthday_window', return_value=(1228, 103, True)):
+            result = await get_contacts_by_birthdays(skip=5, limit=10, user=self.user, db=self.session, days=7)
+        self.assertEqual(result, self.contacts)
+        query = self.session.execute.call_args.args[0]
+        self.assertIn(" OR ", str(query))
+        self.assertEqual(query._offset, 5)
+        self.assertEqual(query._limit, 10)
+
+    def test_birthday_window(self):
+        self.assertEqual(birthday_window(7, date(2024, 5, 10)), (510, 516, False))
+
+    def test_birthday_window_month_end(self):
+        self.assertEqual(birthday_window(7, date(2024, 4, 28)), (428, 504, False))
+
+    def test_birthday_window_year_end(self):
+        self.assertEqual(birthday_window(7, date(2024, 12, 28)), (1228, 103, True))
+
+    async def test_search_contacts(self):
+        self.result.scalars.return_value.all.return_value = self.contacts
+        result = await search_contacts(q="Ala 50%", limit=20, user=self.user, db=self.session)
+        self.assertEqual(result, self.contacts)
+        query = self.session.execute.call_args.args[0]
+        self.assertEqual(str(query).count(" LIKE "), 4)
+        self.assertEqual(query._limit, 20)
+
+    async def test_search_contacts_postgres(self):
+        self.session.get_bind.return_value.dialect.name = "postgresql"
+        self.result.scalars.return_value.all.return_value = self.contacts
+        result = await search_contacts(q="Ala 50%", limit=20, user=self.user, db=self.session)
+        self.assertEqual(result, self.contacts)
+        query = self.session.execute.call_args.args[0]
+        self.assertIn("ala:* & 50:*", query.compile().params.values())
+        self.assertIn("ts_rank", str(query))
+
+    async def test_search_contacts_blank(self):
+        result = await search_contacts(q="   ", limit=20, user=self.user, db=self.session)
+        self.assertEqual(result, [])
+        self.session.execute.assert_not_called()
+
     async def test_get_contact_found(self):
-        self.session.query().filter().filter().first.return_value = self.contacts[0]
+        self.result.scalars.return_value.first.return_value = self.contacts[0]
         result = await get_contact(contact_id=1, user=self.user, db=self.session)
         self.assertEqual(result, self.contacts[0])
 
     async def test_get_contact_not_found(self):
-        self.session.query().filter().filter().first.return_value = None
+        self.result.scalars.return_value.first.return_value = None
         result = await get_contact(contact_id=1, user=self.user, db=self.session)
         self.assertIsNone(result)
 
+    async def test_get_contacts_by_ids(self):
+        contacts = [Contact(id=3), Contact(id=1)]
+        self.result.scalars.return_value.all.return_value = contacts
+        found, missing = await get_contacts_by_ids(contact_ids=[1, 2, 3, 1], user=self.user, db=self.session)
+        self.assertEqual([contact.id for contact in found], [1, 3])
+        self.assertEqual(missing, [2])
+        self.session.execute.assert_called_once()
+        query = self.session.execute.call_args.args[0]
+        self.assertEqual(query.compile().params["id_1"], [1, 2, 3])
+
     async def test_create_contact(self):
         body = ContactBase(name="test", 
                            surname="test", 
@@ -53,51 +218,134 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
                            birthday="2024-04-15",
                            address="test")
         self.session.commit.return_value = None
-        self.session.refresh.return_value = None
         user = User(id=1)
         result = await create_contact(body=body, user=user, db=self.session)
+        self.session.refresh.assert_not_called()
         self.assertEqual(result.name, body.name)
         self.assertEqual(result.surname, body.surname)        
         self.assertEqual(result.email, body.email)
         self.assertEqual(result.phone, body.phone)
         self.assertEqual(result.birthday, body.birthday)
         self.assertEqual(result.address, body.address)
-        self.assertIs(result.user, user)
+        self.assertEqual(result.user_id, user.id)
         self.assertTrue(hasattr(result, "id"))
 
+    async def test_create_contact_bumps_version(self):
+        body = ContactBase(name="test", surname="test", email="test@example.com", phone="+380999999999",
+                           birthday="2024-04-15", address="test")
+        user = User(id=7)
+        version = await collection_versions.get(user.id)
+        await create_contact(body=body, user=user, db=self.session)
+        self.assertNotEqual(await collection_versions.get(user.id), version)
+
+    async def test_remove_contact_not_found_keeps_version(self):
+        self.result.scalars.return_value.first.return_value = None
+        version = await collection_versions.get(self.user.id)
+        await remove_contact(contact_id=1, user=self.user, db=self.session)
+        self.assertEqual(await collection_versions.get(self.user.id), version)
+
+    async def test_create_contacts(self):
+        bodies = [ContactBase(name="test", surname="test", email=f"test{i}@example.com", phone="+380999999999",
+                              birthday="2024-04-15", address=None) for i in range(3)]
+        self.result.scalars.return_value.all.side_effect = [["test0@example.com", "test1@example.com"], []]
+        created, errors = await create_contacts(contacts=list(enumerate(bodies)), user=self.user, db=self.session,
+                                                batch_size=2)
+        self.assertEqual(created, 2)
+        self.assertEqual(errors, [{"index": 2, "detail": "Email already exists"}])
+        self.assertEqual(self.session.execute.call_count, 2)
+        self.assertIn("ON CONFLICT", str(self.session.execute.call_args_list[0].args[0]))
+        self.session.commit.assert_called_once()
+
     async def test_remove_contact_found(self):
         contact = self.contacts[0]
-        self.session.query().filter().filter().first.return_value = contact
+        self.result.scalars.return_value.first.return_value = contact
         result = await remove_contact(contact_id=1, user=self.user, db=self.session)
         self.assertEqual(result, contact)
+        tombstone = self.session.add.call_args.args[0]
+        self.assertIsInstance(tombstone, ContactTombstone)
+        self.assertEqual(tombstone.contact_id, contact.id)
 
     async def test_remove_contact_not_found(self):
-        self.session.query().filter().filter().first.return_value = None
+        self.result.scalars.return_value.first.return_value = None
         result = await remove_contact(contact_id=1, user=self.user, db=self.session)
         self.assertIsNone(result)
 
+    async def test_update_contacts(self):
+        self.result.rowcount = 2
+        body = ContactUpdate(address="Kyiv")
+        count, contacts = await update_contacts(body, user=self.user, db=self.session, contact_ids=[1, 2])
+        self.assertEqual((count, contacts), (2, None))
+        query = str(self.session.execute.call_args.args[0])
+        self.assertIn("address=:address", query)
+        self.assertIn("updated_at=now()", query)
+        self.assertNotIn("name=", query)
+        self.session.commit.assert_called_once()
+
+    async def test_update_contacts_returning(self):
+        self.result.mappings.return_value.all.return_value = [{"id": 1, "address": "Kyiv"}]
+        count, contacts = await update_contacts(ContactUpdate(address="Kyiv"), user=self.user, db=self.session,
+                                                filter="surname::Brown", returning=True)
+        self.assertEqual((count, contacts), (1, [{"id": 1, "address": "Kyiv"}]))
+        query = str(self.session.execute.call_args.args[0])
+        self.assertIn("contacts.surname =", query)
+        self.assertIn("RETURNING", query)
+
+    async def test_remove_contacts(self):
+        self.result.mappings.return_value.all.return_value = [{"id": 1}, {"id": 2}]
+        count, contacts = await remove_contacts(user=self.user, db=self.session, contact_ids=[1, 2, 3])
+        self.assertEqual((count, contacts), (2, None))
+        self.assertIn("DELETE FROM contacts", str(self.session.execute.call_args_list[0].args[0]))
+        statement, tombstones = self.session.execute.call_args_list[1].args
+        self.assertIn("INSERT INTO contact_tombstones", str(statement))
+        self.assertEqual(tombstones, [{"contact_id": 1, "user_id": 1}, {"contact_id": 2, "user_id": 1}])
+        self.session.commit.assert_called_once()
+
+    async def test_remove_contacts_none(self):
+        self.result.mappings.return_value.all.return_value = []
+        count, contacts = await remove_contacts(user=self.user, db=self.session, filter="name::nobody", returning=True)
+        self.assertEqual((count, contacts), (0, []))
+        self.session.execute.assert_called_once()
+
     async def test_update_contact_found(self):
-        body = ContactUpdate(name="test", 
-                           surname="test", 
-                           email="test@example.com",
-                           phone="+380999999999",
-                           birthday="2024-04-15",
-                           address="test")
-        contact = self.contacts[0]
-        self.session.query().filter().filter().first.return_value = contact        
-        self.session.commit.return_value = None
+        body = ContactUpdate(name="test", email="test@example.com", address=None)
+        row = {column.name: None for column in Contact.__table__.c}
+        row.update(id=1, name="test", email="test@example.com", updated_at=datetime(2024, 5, 1))
+        self.result.mappings.return_value.first.return_value = row
         result = await update_contact(contact_id=1, body=body, user=self.user, db=self.session)
-        self.assertEqual(result, contact)
+        self.assertIsInstance(result, Contact)
+        self.assertEqual((result.id, result.name, result.email), (1, "test", "test@example.com"))
+        self.session.execute.assert_called_once()
+        query = str(self.session.execute.call_args.args[0])
+        self.assertIn("SET name=:name, email=:email, updated_at=now(), address=:address WHERE", query)
+        self.assertNotIn("surname=", query)
+        self.assertIn("RETURNING", query)
+        self.session.commit.assert_called_once()
 
     async def test_update_contact_not_found(self):
-        body = ContactUpdate(name="test", 
-                           surname="test", 
-                           email="test@example.com",
-                           phone="+380999999999",
-                           birthday="2024-04-15",
-                           address="test")
-        self.session.query().filter().filter().first.return_value = None
-        self.session.commit.return_value = None
+        body = ContactUpdate(name="test")
+        self.result.mappings.return_value.first.return_value = None
         result = await update_contact(contact_id=1, body=body, user=self.user, db=self.session)
         self.assertIsNone(result)
-    
+
+    async def test_update_contact_nothing_sent(self):
+        contact = self.contacts[0]
+        self.result.scalars.return_value.first.return_value = contact
+        result = await update_contact(contact_id=1, body=ContactUpdate(name=None), user=self.user, db=self.session)
+        self.assertEqual(result, contact)
+        self.assertIn("SELECT", str(self.session.execute.call_args.args[0]))
+        self.session.commit.assert_not_called()
+
+    async def test_get_uncovered_filter_attributes(self):
+        self.session.run_sync.return_value = [
+            {"name": "ix_contacts_user_id_surname_name", "column_names": ["user_id", "surname", "name"]},
+            {"name": "ix_contacts_user_id_email", "column_names": ["user_id", "email"]},
+            {"name": "ix_contacts_user_id_id", "column_names": ["user_id", "id"]},
+            {"name": "ix_contacts_name", "column_names": ["name"]},
+        ]
+        result = await get_uncovered_filter_attributes(db=self.session)
+        self.assertNotIn("surname", result)
+        self.assertNotIn("email", result)
+        self.assertNotIn("id", result)
+        self.assertIn("name", result)
+        self.assertIn("phone", result)
+        self.assertNotIn("user_id", result)
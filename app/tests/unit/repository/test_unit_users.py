@@ -1,6 +1,6 @@
 import unittest
-from sqlalchemy.orm import Session
-from unittest.mock import MagicMock
+from sqlalchemy.ext.asyncio import AsyncSession
+from unittest.mock import AsyncMock, MagicMock, patch
 from unittest import TestCase
 from datetime import datetime
 from tests.unit.test_base import TestBase
@@ -11,25 +11,28 @@ from src.repository.users import (
     create_user,
     confirmed_email,
     update_token,
-    update_avatar
+    update_avatar,
+    set_default_avatar
 )
 
 class TestUsers(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
-        self.session = MagicMock(spec=Session)
+        self.session = MagicMock(spec=AsyncSession)
+        self.result = MagicMock()
+        self.session.execute.return_value = self.result
         #self.user = User(id=1)
         self.user = MagicMock(spec=User)
         self.user.id = 1
         self.user.refresh_token = "test"
 
     async def test_get_user_by_email_found(self):        
-        self.session.query().filter().first.return_value = self.user
+        self.result.scalars.return_value.first.return_value = self.user
         result = await get_user_by_email(email="test", db=self.session)
         self.assertEqual(result, self.user)    
 
     async def test_get_user_by_email_not_found(self):
-        self.session.query().filter().first.return_value = None
+        self.result.scalars.return_value.first.return_value = None
         result = await get_user_by_email(email="test", db=self.session)
         self.assertIsNone(result)
 
@@ -38,15 +41,16 @@ class TestUsers(unittest.IsolatedAsyncioTestCase):
                            password="test", 
                            email="test@example.com")
         self.session.commit.return_value = None
-        self.session.refresh.return_value = None
         result = await create_user(body=body, db=self.session)
+        self.session.refresh.assert_not_called()
         self.assertEqual(result.username, body.username)
         self.assertEqual(result.password, body.password)        
         self.assertEqual(result.email, body.email)
         self.assertTrue(hasattr(result, "id"))
+        self.assertIsNone(result.avatar)
 
     async def test_confirmed_email(self):        
-        self.session.query().filter().first.return_value = self.user 
+        self.result.scalars.return_value.first.return_value = self.user 
         self.session.commit.return_value = None       
         await confirmed_email(email="test", db=self.session)
         self.assertTrue(self.user.confirmed)    
@@ -59,7 +63,42 @@ class TestUsers(unittest.IsolatedAsyncioTestCase):
 
     async def test_update_avatar(self):        
         url = "test_url"
-        self.session.query().filter().first.return_value = self.user 
+        self.result.scalars.return_value.first.return_value = self.user 
         self.session.commit.return_value = None       
         result = await update_avatar(email="test", url=url, db=self.session)
-        self.assertEqual(result.avatar, url) 
+        self.assertEqual(result.avatar, url)
+
+    @patch('src.repository.users.user_cache', new_callable=AsyncMock)
+    async def test_update_token_invalidates_cache(self, mocked_cache):
+        self.user.email = "test@example.com"
+        await update_token(self.user, token="test_token", db=self.session)
+        mocked_cache.invalidate.assert_awaited_with("test@example.com")
+
+    @patch('src.repository.users.user_cache', new_callable=AsyncMock)
+    async def test_confirmed_email_invalidates_cache(self, mocked_cache):
+        self.result.scalars.return_value.first.return_value = self.user
+        await confirmed_email(email="test@example.com", db=self.session)
+        mocked_cache.invalidate.assert_awaited_with("test@example.com")
+
+    @patch('src.repository.users.user_cache', new_callable=AsyncMock)
+    async def test_update_avatar_invalidates_cache(self, mocked_cache):
+        self.result.scalars.return_value.first.return_value = self.user
+        await update_avatar(email="test@example.com", url="test_url", db=self.session)
+        mocked_cache.invalidate.assert_awaited_with("test@example.com")
+
+    @patch('src.repository.users.user_cache')
+    async def test_set_default_avatar(self, mocked_cache):
+        mocked_cache.invalidate = AsyncMock()
+        self.result.rowcount = 1
+        self.assertTrue(await set_default_avatar(email="test@example.com", url="test_url", db=self.session))
+        statement = str(self.session.execute.call_args.args[0])
+        self.assertIn("avatar IS NULL", statement)
+        self.session.commit.assert_called_once()
+        mocked_cache.invalidate.assert_awaited_once_with("test@example.com")
+
+    @patch('src.repository.users.user_cache')
+    async def test_set_default_avatar_already_set(self, mocked_cache):
+        mocked_cache.invalidate = AsyncMock()
+        self.result.rowcount = 0
+        self.assertFalse(await set_default_avatar(email="test@example.com", url="test_url", db=self.session))
+        mocked_cache.invalidate.assert_not_awaited()
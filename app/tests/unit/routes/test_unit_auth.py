@@ -1,13 +1,15 @@
 from typing import BinaryIO
 import unittest
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status, UploadFile, File
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from unittest.mock import MagicMock, patch
 from src.database.models import User
 from src.database.db import get_db
 from src.schemas import UserModel, UserResponse, TokenModel, RequestEmail
 from src.repository import users as repository_users
 from src.services.auth import auth_service
+from src.services.avatars import assign_default_avatar
+from src.services.email import send_email
 from src.routes.auth import (
     signup,
     confirmed_email,
@@ -19,7 +21,8 @@ from src.routes.auth import (
 class TestUsersRoutes(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
-        self.session = MagicMock(spec=Session)
+        self.session = MagicMock(spec=AsyncSession)
+        self.session.bind = MagicMock()
         self.user = MagicMock(spec=User)
         self.user.username = "test_user"
         self.user.confirmed = False
@@ -40,6 +43,23 @@ class TestUsersRoutes(unittest.IsolatedAsyncioTestCase):
         result = await signup(body=body, background_tasks=self.tasks, request=self.request, db=self.session)
         self.assertEqual(result["user"], self.user)    
         mocked_create_user.assert_called_with(body, self.session)
+        self.assertEqual([call.args[0] for call in self.tasks.add_task.call_args_list],
+                         [assign_default_avatar, send_email])
+
+    @patch('src.routes.auth.mail_queue.enqueue_confirmation')
+    @patch('src.repository.users.get_user_by_email')
+    @patch('src.repository.users.create_user')
+    async def test_signup_queues_email(self, mocked_create_user, mocked_get_user_by_email, mocked_enqueue):
+        body = UserModel(username="test", password="test", email="test@example.com")
+        mocked_get_user_by_email.return_value = None
+        mocked_create_user.return_value = self.user
+        mocked_enqueue.return_value = True
+        await signup(body=body, background_tasks=self.tasks, request=self.request, db=self.session)
+        mocked_enqueue.assert_awaited_once_with(self.user.email, self.user.username, self.request.base_url)
+        self.tasks.add_task.assert_called_once()
+        task, email, session_factory = self.tasks.add_task.call_args.args
+        self.assertEqual((task, email), (assign_default_avatar, self.user.email))
+        self.assertIs(session_factory.kw["bind"], self.session.bind)
     
     @patch('src.repository.users.get_user_by_email')
     @patch('src.repository.users.create_user')
@@ -92,4 +112,15 @@ class TestUsersRoutes(unittest.IsolatedAsyncioTestCase):
             result = await confirmed_email(token=token, db=self.session)
         self.assertEqual(context.exception.status_code, 400)   
         self.assertIsNone(result)  
-        mocked_confirmed_email.assert_not_called()  
\ No newline at end of file
+        mocked_confirmed_email.assert_not_called()  
+
+    @patch('src.routes.auth.mail_queue.enqueue_confirmation')
+    @patch('src.repository.users.get_user_by_email')
+    async def test_request_email_queues_email(self, mocked_get_user_by_email, mocked_enqueue):
+        mocked_get_user_by_email.return_value = self.user
+        mocked_enqueue.return_value = True
+        result = await request_email(body=RequestEmail(email=self.user.email), background_tasks=self.tasks,
+                                     request=self.request, db=self.session)
+        self.assertEqual(result["message"], "Check your email for confirmation.")
+        mocked_enqueue.assert_awaited_once()
+        self.tasks.add_task.assert_not_called()
@@ -1,24 +1,41 @@
+import json
 import unittest
-from sqlalchemy.orm import Session
-from unittest.mock import MagicMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession
+from unittest.mock import AsyncMock, MagicMock, patch
 from unittest import TestCase
-from datetime import datetime
+from datetime import date, datetime
 from tests.unit.test_base import TestBase
 from src.database.models import User, Contact
 from src.repository import contacts as repository_contacts
 from src.services.auth import auth_service
-from fastapi import APIRouter, HTTPException, Depends, status
-from src.schemas import ContactBase, ContactUpdate, ContactResponse
+from src.services.cache import contact_list_cache
+from src.services.etag import collection_versions
+from fastapi import APIRouter, HTTPException, Depends, status, Request, Response
+from src.schemas import ContactBase, ContactUpdate, ContactResponse, ContactBatchGet, ContactBulkUpdate, ContactSelection
+from sqlalchemy.exc import IntegrityError
 from src.conf.config import settings
 from src.routes.contacts import (
     read_contacts,
     read_contact,
     retrieve_birthdays,
+    search_contacts,
+    export_contacts,
+    read_changes,
+    batch_get_contacts,
     create_contact,
+    bulk_create_contacts,
     update_contact,
+    bulk_update_contacts,
+    bulk_remove_contacts,
     remove_contact
 )
 
+def make_request(body: bytes, content_type: str) -> Request:
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+    return Request({"type": "http", "method": "POST", "headers": [(b"content-type", content_type.encode())]}, receive)
+
+
 class TestContactRoutes(unittest.IsolatedAsyncioTestCase):
 
     @classmethod
@@ -30,7 +47,7 @@ class TestContactRoutes(unittest.IsolatedAsyncioTestCase):
         )
 
     def setUp(self):
-        self.session = MagicMock(spec=Session)
+        self.session = MagicMock(spec=AsyncSession)
         self.user = MagicMock(spec=User)
         self.user.id = 1
 
@@ -41,7 +58,7 @@ class TestContactRoutes(unittest.IsolatedAsyncioTestCase):
     @patch('src.repository.contacts.get_contacts')
     async def test_read_contacts(self, mock_func): 
         mock_func.return_value = self.contacts
-        result = await read_contacts(filter=None,skip=0, limit=10, db=self.session, current_user=self.user)
+        result = await read_contacts(response=Response(), filter=None,skip=0, limit=10, db=self.session, current_user=self.user)
         self.assertEqual(result, self.contacts)  
 
     @patch('src.repository.contacts.get_contacts')
@@ -51,23 +68,140 @@ class TestContactRoutes(unittest.IsolatedAsyncioTestCase):
         mock_auth_func.side_effect = self.credentials_exception
         result = None
         with self.assertRaises(HTTPException) as context:
-            result = await read_contacts(filter=None,skip=0, limit=10, db=self.session, current_user=mock_auth_func)
+            result = await read_contacts(response=Response(), filter=None,skip=0, limit=10, db=self.session, current_user=mock_auth_func)
         self.assertEqual(context.exception.status_code, 401)   
         self.assertIsNone(result)  
 
+    @patch('src.repository.contacts.get_contacts')
+    async def test_read_contacts_not_modified(self, mock_func):
+        mock_func.return_value = self.contacts
+        response = Response()
+        await read_contacts(response=response, filter=None, skip=0, limit=10, db=self.session, current_user=self.user)
+        etag = response.headers["ETag"]
+        mock_func.reset_mock()
+        result = await read_contacts(response=Response(), filter=None, skip=0, limit=10, if_none_match=etag, db=self.session, current_user=self.user)
+        self.assertEqual(result.status_code, 304)
+        mock_func.assert_not_called()
+        other = Response()
+        await read_contacts(response=other, filter=None, skip=10, limit=10, if_none_match=etag, db=self.session, current_user=self.user)
+        self.assertNotEqual(other.headers["ETag"], etag)
+        await collection_versions.bump(self.user.id)
+        result = await read_contacts(response=Response(), filter=None, skip=0, limit=10, if_none_match=etag, db=self.session, current_user=self.user)
+        self.assertEqual(result, self.contacts)
+
+    @patch('src.repository.contacts.get_contacts')
+    async def test_read_contacts_cached(self, mock_func):
+        mock_func.return_value = [Contact(id=1, name="test", surname="test", email="test@example.com",
+                                          phone="+380501234567", birthday=date(1990, 1, 1), address=None,
+                                          created_at=datetime(2024, 5, 1), updated_at=datetime(2024, 5, 1))]
+        store = {}
+        redis = AsyncMock()
+        redis.set.side_effect = lambda key, value, ex: store.__setitem__(key, value)
+        redis.get.side_effect = lambda key: store.get(key)
+        await contact_list_cache.init(redis)
+        try:
+            response = Response()
+            first = await read_contacts(response=response, filter=None, skip=0, limit=10, db=self.session, current_user=self.user)
+            second = await read_contacts(response=Response(), filter=None, skip=0, limit=10, db=self.session, current_user=self.user)
+            mock_func.assert_called_once()
+            self.assertEqual(second.body, first.body)
+            self.assertEqual(json.loads(second.body)[0]["email"], "test@example.com")
+            self.assertEqual(second.headers["ETag"], response.headers["ETag"])
+            await collection_versions.bump(self.user.id)
+            await read_contacts(response=Response(), filter=None, skip=0, limit=10, db=self.session, current_user=self.user)
+            self.assertEqual(mock_func.call_count, 2)
+        finally:
+            await contact_list_cache.close()
+
+    @patch('src.repository.contacts.get_contacts')
+    async def test_read_contacts_fast_json(self, mock_func):
+        mock_func.return_value = [Contact(id=1, name="test", surname="test", email="test@example.com",
+                                          phone="+380501234567", birthday=date(1990, 1, 1), address=None,
+                                          created_at=datetime(2024, 5, 1), updated_at=datetime(2024, 5, 1))]
+        response = Response()
+        with patch.object(settings, "fast_json_responses", True):
+            result = await read_contacts(response=response, filter=None, skip=0, limit=10, db=self.session, current_user=self.user)
+        self.assertEqual(json.loads(result.body)[0]["birthday"], "1990-01-01")
+        self.assertEqual(result.headers["ETag"], response.headers["ETag"])
+
+    @patch('src.repository.contacts.create_contact')
+    async def test_create_contact_fast_json(self, mock_func):
+        mock_func.return_value = Contact(id=1, name="test", surname="test", email="test@example.com",
+                                         phone="+380501234567", birthday=date(1990, 1, 1), address=None,
+                                         created_at=datetime(2024, 5, 1), updated_at=datetime(2024, 5, 1))
+        with patch.object(settings, "fast_json_responses", True):
+            result = await create_contact(body=MagicMock(spec=ContactBase), db=self.session, current_user=self.user)
+        self.assertEqual(result.status_code, 201)
+        self.assertEqual(json.loads(result.body)["id"], 1)
+
+    @patch('src.repository.contacts.get_contacts')
+    async def test_read_contacts_cursor(self, mock_func):
+        mock_func.return_value = [Contact(id=1), Contact(id=2)]
+        response = Response()
+        result = await read_contacts(response=response, filter=None, skip=0, limit=2, cursor="", db=self.session, current_user=self.user)
+        self.assertEqual(len(result), 2)
+        self.assertEqual(response.headers["X-Next-Cursor"], repository_contacts.encode_cursor(result[-1]))
+
+    @patch('src.repository.contacts.get_contacts')
+    async def test_read_contacts_cursor_last_page(self, mock_func):
+        mock_func.return_value = [Contact(id=1)]
+        response = Response()
+        await read_contacts(response=response, filter=None, skip=0, limit=2, cursor="", db=self.session, current_user=self.user)
+        self.assertNotIn("X-Next-Cursor", response.headers)
+
+    @patch('src.repository.contacts.get_contacts')
+    async def test_read_contacts_invalid_cursor(self, mock_func):
+        with self.assertRaises(HTTPException) as context:
+            await read_contacts(response=Response(), filter=None, skip=0, limit=2, cursor="bad", db=self.session, current_user=self.user)
+        self.assertEqual(context.exception.status_code, 400)
+        self.assertEqual(context.exception.detail, "Invalid cursor")
+        mock_func.assert_not_called()
+
+    @patch('src.repository.contacts.get_contacts')
+    async def test_read_contacts_invalid_filter(self, mock_func):
+        for filter in ("abc", "foo::bar", "name::a::b", "id::abc", "birthday::2000-13-01"):
+            with self.assertRaises(HTTPException) as context:
+                await read_contacts(response=Response(), filter=filter, skip=0, limit=2, cursor=None, db=self.session, current_user=self.user)
+            self.assertEqual(context.exception.status_code, 400)
+            self.assertEqual(context.exception.detail, "Invalid filter")
+        mock_func.assert_not_called()
+
     @patch('src.repository.contacts.get_contact')
     async def test_read_contact_found(self, mock_func): 
         mock_func.return_value = self.contacts[0]
-        result = await read_contact(contact_id=1, db=self.session, current_user=self.user)
+        result = await read_contact(contact_id=1, response=Response(), db=self.session, current_user=self.user)
         self.assertEqual(result, self.contacts[0])  
     
+    @patch('src.repository.contacts.get_contact')
+    async def test_read_contact_not_modified(self, mock_func):
+        mock_func.return_value = Contact(id=1, updated_at=datetime(2024, 5, 1, 12, 0))
+        response = Response()
+        await read_contact(contact_id=1, response=response, db=self.session, current_user=self.user)
+        etag = response.headers["ETag"]
+        result = await read_contact(contact_id=1, response=Response(), if_none_match=f"W/{etag}", db=self.session, current_user=self.user)
+        self.assertEqual(result.status_code, 304)
+        self.assertEqual(result.headers["ETag"], etag)
+
     @patch('src.repository.contacts.get_contact')
     async def test_read_contact_not_found(self, mock_func): 
         mock_func.return_value = None
         with self.assertRaises(HTTPException) as context:
-            result = await read_contact(contact_id=1, db=self.session, current_user=self.user)        
+            result = await read_contact(contact_id=1, response=Response(), db=self.session, current_user=self.user)        
         self.assertEqual(context.exception.status_code, 404)
     
+    @patch('src.repository.contacts.get_contacts_by_ids')
+    async def test_batch_get_contacts(self, mock_func):
+        mock_func.return_value = (self.contacts[:2], [7])
+        result = await batch_get_contacts(body=ContactBatchGet(ids=[1, 7, 2]), db=self.session, current_user=self.user)
+        self.assertEqual(result, {"found": self.contacts[:2], "missing": [7]})
+        self.assertEqual(mock_func.call_args.args[0], [1, 7, 2])
+
+    def test_batch_get_limits(self):
+        with self.assertRaises(ValueError):
+            ContactBatchGet(ids=[])
+        with self.assertRaises(ValueError):
+            ContactBatchGet(ids=list(range(settings.batch_get_max_ids + 1)))
+
     @patch('src.repository.contacts.get_contact')
     @patch('src.services.auth.Auth.get_current_user')
     async def test_read_contact_unauthorized(self, mock_func, mock_auth_func): 
@@ -75,14 +209,14 @@ class TestContactRoutes(unittest.IsolatedAsyncioTestCase):
         mock_auth_func.side_effect = self.credentials_exception
         result = None
         with self.assertRaises(HTTPException) as context:
-            result = await read_contact(contact_id=1, db=self.session, current_user=mock_auth_func)        
+            result = await read_contact(contact_id=1, response=Response(), db=self.session, current_user=mock_auth_func)        
         self.assertEqual(context.exception.status_code, 401)
         self.assertIsNone(result)
 
     @patch('src.repository.contacts.get_contacts_by_birthdays')
     async def test_retrieve_birthdays(self, mock_func): 
         mock_func.return_value = self.contacts
-        result = await retrieve_birthdays(skip=0, limit=10, db=self.session, current_user=self.user)
+        result = await retrieve_birthdays(skip=0, limit=10, days=7, db=self.session, current_user=self.user)
         self.assertEqual(result, self.contacts)
 
     @patch('src.repository.contacts.get_contacts_by_birthdays')
@@ -92,10 +226,51 @@ class TestContactRoutes(unittest.IsolatedAsyncioTestCase):
         mock_auth_func.side_effect = self.credentials_exception
         result = None
         with self.assertRaises(HTTPException) as context:
-            result = await retrieve_birthdays(skip=0, limit=10, db=self.session, current_user=mock_auth_func)
+            result = await retrieve_birthdays(skip=0, limit=10, days=7, db=self.session, current_user=mock_auth_func)
         self.assertEqual(context.exception.status_code, 401)
         self.assertIsNone(result)
     
+    @patch('src.repository.contacts.search_contacts')
+    async def test_search_contacts(self, mock_func):
+        mock_func.return_value = self.contacts
+        result = await search_contacts(q="ala", limit=20, db=self.session, current_user=self.user)
+        self.assertEqual(result, self.contacts)
+        mock_func.assert_called_with("ala", 20, self.user, self.session)
+
+    @patch('src.repository.contacts.get_changes')
+    async def test_read_changes(self, mock_func):
+        mock_func.return_value = (self.contacts, [4], "next", False)
+        result = await read_changes(since=None, cursor="prev", limit=10, db=self.session, current_user=self.user)
+        self.assertEqual(result, {"updated": self.contacts, "deleted": [4], "cursor": "next", "has_more": False})
+        self.assertEqual(mock_func.call_args.args[:3], (None, "prev", 10))
+
+    @patch('src.repository.contacts.get_changes')
+    async def test_read_changes_invalid_cursor(self, mock_func):
+        mock_func.side_effect = ValueError("Invalid cursor")
+        with self.assertRaises(HTTPException) as context:
+            await read_changes(since=None, cursor="bad", limit=10, db=self.session, current_user=self.user)
+        self.assertEqual(context.exception.status_code, 400)
+
+    @patch('src.repository.contacts.stream_contacts')
+    async def test_export_contacts(self, mock_func):
+        async def partitions(*args):
+            yield [Contact(id=1, name="a", surname="b", email="a@example.com", phone="+380999999999",
+                           birthday=datetime(2000, 1, 1).date(), address=None,
+                           created_at=datetime(2024, 1, 1), updated_at=datetime(2024, 1, 1))]
+        mock_func.side_effect = partitions
+        self.session.bind = MagicMock()
+        result = await export_contacts(format="csv", filter="name::a", db=self.session, current_user=self.user)
+        self.assertEqual(result.media_type, "text/csv")
+        body = "".join([chunk async for chunk in result.body_iterator])
+        self.assertEqual(body.splitlines()[1], "a,b,a@example.com,+380999999999,2000-01-01,,1,2024-01-01T00:00:00,2024-01-01T00:00:00")
+        self.assertEqual(mock_func.call_args.args[0], "name::a")
+
+    async def test_export_contacts_invalid_filter(self):
+        for filter in ("name", "password::x"):
+            with self.assertRaises(HTTPException) as context:
+                await export_contacts(format="ndjson", filter=filter, db=self.session, current_user=self.user)
+            self.assertEqual(context.exception.status_code, 400)
+
     @patch('src.repository.contacts.create_contact')
     async def test_create_contact(self, mock_func): 
         mock_func.return_value = self.contacts[0]
@@ -115,6 +290,35 @@ class TestContactRoutes(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(context.exception.status_code, 401)
         self.assertIsNone(result)
 
+    @patch('src.repository.contacts.create_contacts')
+    async def test_bulk_create_contacts(self, mock_func):
+        mock_func.return_value = (1, [{"index": 0, "detail": "Email already exists"}])
+        body = (b"name,surname,email,phone,birthday,address\n"
+                b"a,b,a@example.com,+380999999999,2000-01-01,\n"
+                b"a,b,b@example.com,+380999999999,2000-01-01,\n"
+                b"a,b,not-an-email,+380999999999,2000-01-01,\n")
+        result = await bulk_create_contacts(request=make_request(body, "text/csv"), db=self.session, current_user=self.user)
+        self.assertEqual(result["created"], 1)
+        self.assertEqual([error["index"] for error in result["errors"]], [0, 2])
+        contacts = mock_func.call_args.args[0]
+        self.assertEqual([index for index, _ in contacts], [0, 1])
+
+    async def test_bulk_create_contacts_unsupported_type(self):
+        with self.assertRaises(HTTPException) as context:
+            await bulk_create_contacts(request=make_request(b"x", "text/plain"), db=self.session, current_user=self.user)
+        self.assertEqual(context.exception.status_code, 415)
+
+    async def test_bulk_create_contacts_invalid_json(self):
+        with self.assertRaises(HTTPException) as context:
+            await bulk_create_contacts(request=make_request(b"{", "application/json"), db=self.session, current_user=self.user)
+        self.assertEqual(context.exception.status_code, 400)
+
+    @patch.object(settings, 'bulk_import_max_rows', 1)
+    async def test_bulk_create_contacts_too_many_rows(self):
+        with self.assertRaises(HTTPException) as context:
+            await bulk_create_contacts(request=make_request(b"[{}, {}]", "application/json"), db=self.session, current_user=self.user)
+        self.assertEqual(context.exception.status_code, 413)
+
     @patch('src.repository.contacts.update_contact')
     async def test_update_contact_found(self, mock_func): 
         mock_func.return_value = self.contacts[0]
@@ -142,6 +346,55 @@ class TestContactRoutes(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(context.exception.status_code, 401)
         self.assertIsNone(result)
 
+    @patch('src.repository.contacts.update_contacts')
+    async def test_bulk_update_contacts(self, mock_func):
+        mock_func.return_value = (2, None)
+        body = ContactBulkUpdate(ids=[1, 2], changes=ContactUpdate(address="Kyiv"))
+        result = await bulk_update_contacts(body=body, db=self.session, current_user=self.user)
+        self.assertEqual(result, {"count": 2})
+        self.assertEqual(mock_func.call_args.args[3:], ([1, 2], None, False))
+
+    @patch('src.repository.contacts.update_contacts')
+    async def test_bulk_update_contacts_errors(self, mock_func):
+        mock_func.side_effect = IntegrityError("UPDATE", {}, Exception("unique"))
+        body = ContactBulkUpdate(ids=[1, 2], changes=ContactUpdate(email="same@example.com"))
+        with self.assertRaises(HTTPException) as context:
+            await bulk_update_contacts(body=body, db=self.session, current_user=self.user)
+        self.assertEqual(context.exception.status_code, 409)
+        body = ContactBulkUpdate(filter="unknown::1", changes=ContactUpdate(address="Kyiv"))
+        with self.assertRaises(HTTPException) as context:
+            await bulk_update_contacts(body=body, db=self.session, current_user=self.user)
+        self.assertEqual(context.exception.status_code, 400)
+
+    @patch('src.repository.contacts.update_contacts')
+    async def test_bulk_update_contacts_only_ignored_nulls(self, mock_func):
+        body = ContactBulkUpdate(ids=[1], changes=ContactUpdate(name=None, phone=None))
+        with self.assertRaises(HTTPException) as context:
+            await bulk_update_contacts(body=body, db=self.session, current_user=self.user)
+        self.assertEqual(context.exception.status_code, 422)
+        mock_func.assert_not_called()
+        mock_func.return_value = (1, None)
+        body = ContactBulkUpdate(ids=[1], changes=ContactUpdate(name=None, address=None))
+        self.assertEqual(await bulk_update_contacts(body=body, db=self.session, current_user=self.user), {"count": 1})
+
+    @patch('src.repository.contacts.remove_contacts')
+    async def test_bulk_remove_contacts(self, mock_func):
+        mock_func.return_value = (1, [{"id": 1}])
+        body = ContactSelection(filter="surname::Brown", returning=True)
+        result = await bulk_remove_contacts(body=body, db=self.session, current_user=self.user)
+        self.assertEqual(result, {"count": 1, "contacts": [{"id": 1}]})
+        self.assertEqual(mock_func.call_args.args[2:], (None, "surname::Brown", True))
+
+    def test_bulk_selection(self):
+        with self.assertRaises(ValueError):
+            ContactSelection()
+        with self.assertRaises(ValueError):
+            ContactSelection(ids=[1], filter="name::test")
+        with self.assertRaises(ValueError):
+            ContactSelection(filter="")
+        with self.assertRaises(ValueError):
+            ContactBulkUpdate(ids=[1], changes=ContactUpdate())
+
     @patch('src.repository.contacts.remove_contact')
     async def test_remove_contact_found(self, mock_func): 
         mock_func.return_value = self.contacts[0]
@@ -1,10 +1,8 @@
 from typing import BinaryIO
 import unittest
-from fastapi import APIRouter, Depends, status, UploadFile, File
-from sqlalchemy.orm import Session
-from unittest.mock import MagicMock, patch
-import cloudinary
-import cloudinary.uploader
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from src.database.db import get_db
 from src.database.models import User
@@ -20,7 +18,7 @@ from src.routes.users import (
 class TestUsersRoutes(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
-        self.session = MagicMock(spec=Session)
+        self.session = MagicMock(spec=AsyncSession)
         self.user = MagicMock(spec=User)
         self.user.username = "test_user"
         self.user.email = "test@example.com"
@@ -31,18 +29,34 @@ class TestUsersRoutes(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result, self.user)    
     
     @patch('src.repository.users.update_avatar')
-    @patch('cloudinary.CloudinaryImage.build_url')    
-    @patch('cloudinary.uploader.upload')    
-    @patch('cloudinary.config')
-    async def test_update_avatar_user(self, mocked_config, mocked_upload, mocked_build_url, mocked_update_avatar): 
-        r = MagicMock()         
-        file = MagicMock(spec=UploadFile)  
-        file.file = MagicMock(BinaryIO)    
+    @patch('src.routes.users.avatar_uploader.upload')
+    async def test_update_avatar_user(self, mocked_upload, mocked_update_avatar):
+        file = MagicMock(spec=UploadFile)
+        file.read = AsyncMock(return_value=b"image")
         url = "test_url"
-        mocked_config.return_value = None        
-        mocked_upload.return_value = r
-        mocked_build_url.return_value = url   
-        mocked_update_avatar.return_value = self.user     
+        mocked_upload.return_value = url
+        mocked_update_avatar.return_value = self.user
         result = await update_avatar_user(file=file, current_user=self.user, db=self.session)
-        mocked_update_avatar.assert_called_with(self.user.email, url, self.session)   
-        self.assertEqual(result, self.user)
\ No newline at end of file
+        mocked_upload.assert_awaited_once_with(self.user.username, b"image")
+        mocked_update_avatar.assert_called_with(self.user.email, url, self.session)
+        self.assertEqual(result, self.user)
+
+    @patch('src.repository.users.update_avatar')
+    @patch('src.routes.users.avatar_uploader.upload')
+    async def test_update_avatar_user_invalid_image(self, mocked_upload, mocked_update_avatar):
+        file = MagicMock(spec=UploadFile)
+        file.read = AsyncMock(return_value=b"not an image")
+        mocked_upload.side_effect = ValueError("Invalid image")
+        with self.assertRaises(HTTPException) as context:
+            await update_avatar_user(file=file, current_user=self.user, db=self.session)
+        self.assertEqual(context.exception.status_code, 400)
+        mocked_update_avatar.assert_not_called()
+
+    @patch('src.routes.users.avatar_uploader.upload')
+    async def test_update_avatar_user_too_large(self, mocked_upload):
+        file = MagicMock(spec=UploadFile)
+        file.read = AsyncMock(return_value=b"x" * (settings.avatar_max_bytes + 1))
+        with self.assertRaises(HTTPException) as context:
+            await update_avatar_user(file=file, current_user=self.user, db=self.session)
+        self.assertEqual(context.exception.status_code, 413)
+        mocked_upload.assert_not_called()
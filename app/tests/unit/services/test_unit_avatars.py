@@ -0,0 +1,199 @@
+import io
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from PIL import Image
+
+from src.services.avatars import (AvatarUploader, CloudinaryAvatarStorage, GravatarResolver, LocalAvatarStorage,
+                                  NoAvatarResolver, assign_default_avatar, gravatar_hash, make_thumbnail)
+
+
+def make_image(width: int, height: int, image_format: str = "PNG") -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 10, 10)).save(output, image_format)
+    return output.getvalue()
+
+
+class TestMakeThumbnail(unittest.TestCase):
+
+    def test_crops_to_square(self):
+        thumbnail = Image.open(io.BytesIO(make_thumbnail(make_image(800, 400), 250)))
+        self.assertEqual(thumbnail.format, "JPEG")
+        self.assertEqual(thumbnail.size, (250, 250))
+
+    def test_jpeg_upscaled(self):
+        thumbnail = Image.open(io.BytesIO(make_thumbnail(make_image(100, 120, "JPEG"), 250)))
+        self.assertEqual(thumbnail.size, (250, 250))
+
+    def test_invalid_image(self):
+        with self.assertRaises(ValueError):
+            make_thumbnail(b"not an image", 250)
+
+    @patch('src.services.avatars.MAX_PIXELS', 100)
+    def test_too_many_pixels(self):
+        with self.assertRaises(ValueError):
+            make_thumbnail(make_image(20, 20), 250)
+
+
+class TestLocalAvatarStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.storage = LocalAvatarStorage(self.directory.name, "/avatars/")
+
+    def test_save(self):
+        url = self.storage.save("../test user", b"first")
+        path, version = url.split("?v=")
+        self.assertTrue(path.startswith("/avatars/"))
+        self.assertEqual((Path(self.directory.name) / path.removeprefix("/avatars/")).read_bytes(), b"first")
+        second = self.storage.save("../test user", b"second")
+        self.assertEqual(second.split("?v=")[0], path)
+        self.assertNotEqual(second, url)
+        self.assertEqual(len(list(Path(self.directory.name).iterdir())), 1)
+
+
+class TestCloudinaryAvatarStorage(unittest.TestCase):
+
+    @patch('cloudinary.CloudinaryImage.build_url', return_value="test_url")
+    @patch('cloudinary.uploader.upload', return_value={"version": 7})
+    @patch('cloudinary.config')
+    def test_configured_once(self, mocked_config, mocked_upload, mocked_build_url):
+        storage = CloudinaryAvatarStorage(size=250)
+        self.assertEqual(storage.save("test", b"jpeg"), "test_url")
+        storage.save("test", b"jpeg")
+        mocked_config.assert_called_once()
+        mocked_upload.assert_called_with(b"jpeg", public_id="ContactsApp/test", overwrite=True)
+        mocked_build_url.assert_called_with(width=250, height=250, crop='fill', version=7)
+
+
+class TestAvatarUploader(unittest.IsolatedAsyncioTestCase):
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            AvatarUploader(backend="ftp")
+
+    async def test_upload(self):
+        storage = MagicMock()
+        storage.save.return_value = "test_url"
+        uploader = AvatarUploader(backend="local", size=64, workers=1, queue_size=1)
+        await uploader.start(storage)
+        self.addAsyncCleanup(uploader.close)
+        self.assertEqual(await uploader.upload("test", make_image(300, 200)), "test_url")
+        key, data = storage.save.call_args.args
+        self.assertEqual(key, "test")
+        self.assertEqual(Image.open(io.BytesIO(data)).size, (64, 64))
+
+    def test_own_retry_after(self):
+        uploader = AvatarUploader(backend="local", workers=1, queue_size=1, retry_after=7)
+        self.assertEqual(uploader.executor.retry_after, 7)
+
+    async def test_upload_invalid_image(self):
+        uploader = AvatarUploader(backend="local", workers=1, queue_size=1)
+        await uploader.start(MagicMock())
+        self.addAsyncCleanup(uploader.close)
+        with self.assertRaises(ValueError):
+            await uploader.upload("test", b"not an image")
+
+
+class GravatarStub(BaseHTTPRequestHandler):
+    """
+    Local stand-in for the Gravatar image service: known hashes answer 200, others 404, "slow" ones time out.
+    """
+    known: set[str] = set()
+    slow: set[str] = set()
+    requests = 0
+
+    def do_GET(self):
+        GravatarStub.requests += 1
+        email_hash = self.path.split("?")[0].rsplit("/", 1)[-1]
+        if email_hash in self.slow:
+            time.sleep(0.5)
+        self.send_response(200 if email_hash in self.known else 404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestGravatarResolver(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), GravatarStub)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}/avatar/"
+        GravatarStub.known = {gravatar_hash("known@example.com")}
+        GravatarStub.slow = {gravatar_hash("slow@example.com")}
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    async def asyncSetUp(self):
+        self.resolver = GravatarResolver(base_url=self.base_url, check=True, timeout=0.1)
+        self.addAsyncCleanup(self.resolver.close)
+        GravatarStub.requests = 0
+
+    async def test_without_check(self):
+        resolver = GravatarResolver(check=False, cache_size=1)
+        self.assertEqual(await resolver.resolve(" Test@Example.com "),
+                         "https://www.gravatar.com/avatar/55502f40dc8b7c769880b10874abc9d0")
+        self.assertIsNone(resolver.client)
+        with patch('src.services.avatars.gravatar_hash') as mocked_gravatar_hash:
+            await resolver.resolve("test@example.com")
+            mocked_gravatar_hash.assert_not_called()
+            await resolver.resolve("other@example.com")
+        self.assertEqual(list(resolver._local), ["other@example.com"])
+
+    async def test_known(self):
+        url = await self.resolver.resolve("known@example.com")
+        self.assertEqual(url, self.base_url + gravatar_hash("known@example.com"))
+        self.assertEqual(await self.resolver.resolve("known@example.com"), url)
+        self.assertEqual(GravatarStub.requests, 1)
+
+    async def test_unknown(self):
+        self.assertIsNone(await self.resolver.resolve("unknown@example.com"))
+        self.assertIsNone(await self.resolver.resolve("unknown@example.com"))
+        self.assertEqual(GravatarStub.requests, 1)
+
+    async def test_timeout_not_cached(self):
+        started = time.perf_counter()
+        self.assertIsNone(await self.resolver.resolve("slow@example.com"))
+        self.assertLess(time.perf_counter() - started, 0.4)
+        self.assertNotIn("slow@example.com", self.resolver._local)
+
+    async def test_cache_bounded(self):
+        self.resolver.cache_size = 1
+        await self.resolver.resolve("known@example.com")
+        await self.resolver.resolve("unknown@example.com")
+        self.assertEqual(list(self.resolver._local), ["unknown@example.com"])
+
+
+class TestAssignDefaultAvatar(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.session = MagicMock()
+        self.session_factory = MagicMock()
+        self.session_factory.return_value.__aenter__ = AsyncMock(return_value=self.session)
+        self.session_factory.return_value.__aexit__ = AsyncMock(return_value=None)
+
+    @patch('src.repository.users.set_default_avatar')
+    async def test_assign(self, mocked_set_default_avatar):
+        resolver = MagicMock()
+        resolver.resolve = AsyncMock(return_value="test_url")
+        await assign_default_avatar("test@example.com", self.session_factory, resolver)
+        mocked_set_default_avatar.assert_awaited_once_with("test@example.com", "test_url", self.session)
+
+    @patch('src.repository.users.set_default_avatar')
+    async def test_nothing_to_assign(self, mocked_set_default_avatar):
+        await assign_default_avatar("test@example.com", self.session_factory, NoAvatarResolver())
+        mocked_set_default_avatar.assert_not_called()
+        self.session_factory.assert_not_called()
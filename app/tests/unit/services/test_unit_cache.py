@@ -0,0 +1,191 @@
+import json
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import HTTPException
+from jose import jwt
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import User
+from src.services.auth import auth_service
+from src.services.cache import ContactListCache, TokenCache, UserCache
+
+
+class TestUserCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.cache = UserCache(maxsize=2, ttl=60)
+        self.user = User(id=1, username="test", email="test@example.com", password="hash",
+                         refresh_token="token", created_at=datetime(2024, 5, 1, 12, 0), avatar="url", confirmed=True)
+
+    async def test_get_miss(self):
+        result = await self.cache.get("test@example.com")
+        self.assertIsNone(result)
+
+    async def test_set_get(self):
+        await self.cache.set(self.user)
+        result = await self.cache.get("test@example.com")
+        self.assertIsNot(result, self.user)
+        self.assertEqual(result.id, 1)
+        self.assertEqual(result.created_at, self.user.created_at)
+        self.assertIsNone(result.password)
+        self.assertIsNone(result.refresh_token)
+
+    async def test_ttl_expired(self):
+        await self.cache.set(self.user)
+        with patch("src.services.cache.time.monotonic", return_value=10 ** 9):
+            result = await self.cache.get("test@example.com")
+        self.assertIsNone(result)
+
+    async def test_lru_eviction(self):
+        for i in range(3):
+            await self.cache.set(User(id=i, email=f"{i}@example.com", created_at=None))
+        self.assertIsNone(await self.cache.get("0@example.com"))
+        self.assertIsNotNone(await self.cache.get("2@example.com"))
+
+    async def test_invalidate(self):
+        await self.cache.set(self.user)
+        await self.cache.invalidate("test@example.com")
+        result = await self.cache.get("test@example.com")
+        self.assertIsNone(result)
+
+    async def test_redis_tier(self):
+        redis = AsyncMock()
+        await self.cache.init(redis)
+        await self.cache.set(self.user)
+        key, raw = redis.set.call_args.args
+        self.assertEqual(key, "user:test@example.com")
+        self.assertNotIn("password", json.loads(raw))
+        self.assertEqual(redis.set.call_args.kwargs["ex"], 60)
+        self.cache._local.clear()
+        redis.get.return_value = raw
+        result = await self.cache.get("test@example.com")
+        self.assertEqual(result.email, "test@example.com")
+        await self.cache.invalidate("test@example.com")
+        redis.delete.assert_awaited_with("user:test@example.com")
+
+    async def test_local_tier_short_lived_with_redis(self):
+        redis = AsyncMock()
+        await self.cache.init(redis)
+        self.cache.local_ttl = 5
+        with patch("src.services.cache.time.monotonic", return_value=1000):
+            await self.cache.set(self.user)
+        redis.get.return_value = None
+        with patch("src.services.cache.time.monotonic", return_value=1006):
+            self.assertIsNone(await self.cache.get("test@example.com"))
+        redis.get.assert_awaited_once_with("user:test@example.com")
+
+    async def test_redis_error_is_a_miss(self):
+        redis = AsyncMock()
+        redis.get.side_effect = RedisError("down")
+        await self.cache.init(redis)
+        result = await self.cache.get("test@example.com")
+        self.assertIsNone(result)
+
+
+class TestContactListCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.cache = ContactListCache(ttl=30)
+
+    async def test_disabled_without_redis(self):
+        await self.cache.set(1, 5, (None, 0, 10, None), "[]", None)
+        self.assertIsNone(await self.cache.get(1, 5, None, 0, 10, None))
+        self.assertFalse(self.cache.enabled)
+
+    async def test_set_get(self):
+        store = {}
+        redis = AsyncMock()
+        redis.set.side_effect = lambda key, value, ex: store.__setitem__(key, value)
+        redis.get.side_effect = lambda key: store.get(key)
+        await self.cache.init(redis)
+        await self.cache.set(1, 5, (None, 0, 10, ""), '[{"id": 1}]', "next")
+        self.assertEqual(redis.set.call_args.kwargs["ex"], 30)
+        self.assertTrue(redis.set.call_args.args[0].startswith("contacts:list:1:5:"))
+        self.assertEqual(await self.cache.get(1, 5, None, 0, 10, ""), ('[{"id": 1}]', "next"))
+        self.assertIsNone(await self.cache.get(1, 6, None, 0, 10, ""))
+        self.assertIsNone(await self.cache.get(1, 5, None, 10, 10, ""))
+        await self.cache.set(1, 5, (None, 0, 10, None), "[]", None)
+        self.assertEqual(await self.cache.get(1, 5, None, 0, 10, None), ("[]", None))
+
+    async def test_redis_error_is_a_miss(self):
+        redis = AsyncMock()
+        redis.get.side_effect = RedisError("down")
+        redis.set.side_effect = RedisError("down")
+        await self.cache.init(redis)
+        await self.cache.set(1, 5, (None, 0, 10, None), "[]", None)
+        self.assertIsNone(await self.cache.get(1, 5, None, 0, 10, None))
+
+
+class TestTokenCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = TokenCache(maxsize=2)
+        self.payload = {"sub": "test@example.com", "scope": "access_token", "exp": time.time() + 60}
+
+    def test_set_get(self):
+        self.assertIsNone(self.cache.get("token"))
+        self.cache.set("token", self.payload)
+        self.assertEqual(self.cache.get("token"), self.payload)
+        self.assertNotIn(b"token", b"".join(self.cache._local))
+
+    def test_expired(self):
+        self.cache.set("token", {**self.payload, "exp": time.time() - 1})
+        self.assertIsNone(self.cache.get("token"))
+        self.assertEqual(len(self.cache._local), 0)
+
+    def test_without_exp_not_cached(self):
+        self.cache.set("token", {"sub": "test@example.com", "scope": "access_token"})
+        self.assertIsNone(self.cache.get("token"))
+
+    def test_lru_eviction(self):
+        self.cache.set("a", self.payload)
+        self.cache.set("b", self.payload)
+        self.cache.get("a")
+        self.cache.set("c", self.payload)
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+
+    def test_disabled(self):
+        cache = TokenCache(maxsize=0)
+        cache.set("token", self.payload)
+        self.assertIsNone(cache.get("token"))
+
+
+class TestGetCurrentUserCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.session = MagicMock(spec=AsyncSession)
+        self.user = User(id=1, username="test", email="test@example.com", created_at=None)
+
+    async def asyncSetUp(self):
+        self.token = await auth_service.create_access_token(data={"sub": self.user.email})
+
+    @patch('src.repository.users.get_user_by_email')
+    async def test_get_current_user_hits_cache(self, mocked_get_user_by_email):
+        mocked_get_user_by_email.return_value = self.user
+        with patch.object(auth_service, "user_cache", UserCache(maxsize=10, ttl=60)):
+            first = await auth_service.get_current_user(token=self.token, db=self.session)
+            second = await auth_service.get_current_user(token=self.token, db=self.session)
+        self.assertIs(first, self.user)
+        self.assertEqual(second.id, self.user.id)
+        mocked_get_user_by_email.assert_called_once()
+
+    @patch('src.repository.users.get_user_by_email')
+    async def test_get_current_user_skips_decode_for_cached_token(self, mocked_get_user_by_email):
+        mocked_get_user_by_email.return_value = self.user
+        with patch.object(auth_service, "token_cache", TokenCache(maxsize=10)), \
+                patch('src.services.auth.jwt.decode', wraps=jwt.decode) as decode:
+            await auth_service.get_current_user(token=self.token, db=self.session)
+            await auth_service.get_current_user(token=self.token, db=self.session)
+        decode.assert_called_once()
+
+    async def test_get_current_user_rejects_cached_refresh_token(self):
+        token = await auth_service.create_refresh_token(data={"sub": self.user.email})
+        with patch.object(auth_service, "token_cache", TokenCache(maxsize=10)):
+            for _ in range(2):
+                with self.assertRaises(HTTPException):
+                    await auth_service.get_current_user(token=token, db=self.session)
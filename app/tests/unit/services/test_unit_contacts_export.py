@@ -0,0 +1,40 @@
+import json
+import unittest
+from datetime import date, datetime
+
+from src.database.models import Contact
+from src.services.contacts_export import FIELDS, encode
+
+
+async def partitions(*batches):
+    for batch in batches:
+        yield batch
+
+
+class TestContactsExport(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.contacts = [Contact(id=i, name=f"name{i}", surname="test", email=f"test{i}@example.com",
+                                 phone="+380999999999", birthday=date(2000, 1, 1), address="Kyiv, Ukraine",
+                                 created_at=datetime(2024, 1, 1, 12), updated_at=datetime(2024, 1, 1, 12))
+                         for i in range(3)]
+
+    async def test_encode_ndjson(self):
+        chunks = [chunk async for chunk in encode("ndjson", partitions(self.contacts[:2], self.contacts[2:]))]
+        self.assertEqual(len(chunks), 2)
+        rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+        self.assertEqual([row["id"] for row in rows], [0, 1, 2])
+        self.assertEqual(rows[0]["birthday"], "2000-01-01")
+        self.assertEqual(rows[0]["created_at"], "2024-01-01T12:00:00")
+
+    async def test_encode_csv(self):
+        chunks = [chunk async for chunk in encode("csv", partitions(self.contacts[:2], self.contacts[2:]))]
+        self.assertEqual(len(chunks), 3)
+        lines = "".join(chunks).splitlines()
+        self.assertEqual(lines[0], ",".join(FIELDS))
+        self.assertEqual(len(lines), 4)
+        self.assertIn('"Kyiv, Ukraine"', lines[3])
+
+    async def test_encode_csv_empty(self):
+        chunks = [chunk async for chunk in encode("csv", partitions())]
+        self.assertEqual(chunks, [",".join(FIELDS) + "\r\n"])
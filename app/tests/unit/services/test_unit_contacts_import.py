@@ -0,0 +1,39 @@
+import unittest
+
+from src.services.contacts_import import detect_format, read_rows, validate_rows
+
+
+class TestContactsImport(unittest.TestCase):
+
+    def setUp(self):
+        self.row = {"name": "test", "surname": "test", "email": "test@example.com", "phone": "+380999999999",
+                    "birthday": "2000-01-01", "address": None}
+
+    def test_detect_format(self):
+        self.assertEqual(detect_format("application/json; charset=utf-8"), "json")
+        self.assertEqual(detect_format("application/x-ndjson"), "ndjson")
+        self.assertEqual(detect_format("application/octet-stream", "book.CSV"), "csv")
+        self.assertIsNone(detect_format("text/plain", "book.txt"))
+        self.assertIsNone(detect_format(None))
+
+    def test_read_rows_json(self):
+        self.assertEqual(read_rows(b'[{"name": "test"}]', "json"), [{"name": "test"}])
+        with self.assertRaises(ValueError):
+            read_rows(b'{"name": "test"}', "json")
+
+    def test_read_rows_ndjson(self):
+        self.assertEqual(read_rows(b'{"name": "a"}\n\n{"name": "b"}\n', "ndjson"), [{"name": "a"}, {"name": "b"}])
+        with self.assertRaises(ValueError):
+            read_rows(b'{"name": "a"}\n{', "ndjson")
+
+    def test_read_rows_csv(self):
+        rows = read_rows("﻿name,address\ntest,\n".encode(), "csv")
+        self.assertEqual(rows, [{"name": "test", "address": None}])
+
+    def test_validate_rows(self):
+        contacts, errors = validate_rows([self.row, {"name": "test"}, dict(self.row), "row"])
+        self.assertEqual([index for index, _ in contacts], [0])
+        self.assertEqual(contacts[0][1].email, "test@example.com")
+        self.assertEqual([error["index"] for error in errors], [1, 2, 3])
+        self.assertIn("surname: Field required", errors[0]["detail"])
+        self.assertEqual(errors[1]["detail"], "Duplicate email in upload")
@@ -0,0 +1,98 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiosmtplib
+
+from src.services.email import MailSender, conf, send_email
+
+
+def make_smtp():
+    smtp = MagicMock()
+    smtp.is_connected = True
+    smtp.connect = AsyncMock()
+    smtp.login = AsyncMock()
+    smtp.send_message = AsyncMock()
+    smtp.quit = AsyncMock()
+    return smtp
+
+
+class TestMailSender(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.sender = MailSender(conf, pool_size=1, batch_size=10, idle_timeout=60)
+        self.smtp = make_smtp()
+        patcher = patch('src.services.email.aiosmtplib.SMTP', return_value=self.smtp)
+        self.SMTP = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def message(self, recipient="test@example.com"):
+        return self.sender.build(recipient, "Subject", "<p>Hi</p>")
+
+    def test_build(self):
+        message = self.message()
+        self.assertEqual(message["To"], "test@example.com")
+        self.assertEqual(message.get_content_type(), "text/html")
+
+    def test_render_compiles_once(self):
+        first = self.sender.render("email_template.html", host="http://test/", username="test", token="abc")
+        environment = self.sender._environment
+        with patch.object(environment, "compile", wraps=environment.compile) as compile:
+            self.sender.render("email_template.html", host="http://test/", username="test", token="abc")
+        compile.assert_not_called()
+        self.assertIs(self.sender._environment, environment)
+        self.assertIn("http://test/api/auth/confirmed_email/abc", first)
+
+    async def test_send_without_workers(self):
+        await self.sender.send(self.message())
+        self.smtp.send_message.assert_awaited_once()
+        self.smtp.quit.assert_awaited_once()
+
+    async def test_workers_reuse_connection(self):
+        await self.sender.start()
+        for i in range(5):
+            await self.sender.send(self.message(f"user{i}@example.com"))
+        await self.sender.close()
+        self.SMTP.assert_called_once()
+        self.smtp.login.assert_awaited_once()
+        self.assertEqual(self.smtp.send_message.await_count, 5)
+        self.smtp.close.assert_called_once()
+
+    async def test_deliver_reports_outcome(self):
+        await self.sender.start()
+        self.smtp.send_message.side_effect = [None, aiosmtplib.SMTPRecipientsRefused([])]
+        self.assertTrue(await self.sender.deliver(self.message()))
+        self.assertFalse(await self.sender.deliver(self.message("bad@example.com")))
+        await self.sender.close()
+
+    async def test_worker_survives_unexpected_error(self):
+        await self.sender.start()
+        self.smtp.send_message.side_effect = [ValueError("bad message"), None]
+        self.assertFalse(await self.sender.deliver(self.message()))
+        self.smtp.close.assert_called_once()
+        self.assertTrue(await asyncio.wait_for(self.sender.deliver(self.message()), 1))
+        self.assertEqual(self.SMTP.call_count, 2)
+        await self.sender.close()
+
+    async def test_reconnects_after_disconnect(self):
+        self.smtp.send_message.side_effect = [aiosmtplib.SMTPServerDisconnected("gone"), None]
+        smtp, results = await self.sender._deliver(self.smtp, [self.message()])
+        self.assertIs(smtp, self.smtp)
+        self.assertEqual(results, [True])
+        self.SMTP.assert_called_once()
+        self.assertEqual(self.smtp.send_message.await_count, 2)
+
+    async def test_refused_message_keeps_connection(self):
+        self.smtp.send_message.side_effect = [aiosmtplib.SMTPRecipientsRefused([]), None]
+        smtp, results = await self.sender._deliver(self.smtp, [self.message("bad@example.com"), self.message()])
+        self.assertIs(smtp, self.smtp)
+        self.assertEqual(results, [False, True])
+        self.SMTP.assert_not_called()
+        self.assertEqual(self.smtp.send_message.await_count, 2)
+
+    async def test_send_email(self):
+        with patch('src.services.email.mail_sender', self.sender):
+            await send_email("test@example.com", "test", "http://test/")
+        message = self.smtp.send_message.call_args.args[0]
+        self.assertEqual(message["To"], "test@example.com")
+        self.assertIn("http://test/api/auth/confirmed_email/", message.get_payload(decode=True).decode())
@@ -0,0 +1,62 @@
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+from redis.exceptions import RedisError
+
+from src.database.models import Contact
+from src.services.etag import CollectionVersions, collection_etag, contact_etag, etag_matches
+
+
+class TestCollectionVersions(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.versions = CollectionVersions()
+
+    async def test_local_bump(self):
+        version = await self.versions.get(1)
+        self.assertEqual(await self.versions.get(1), version)
+        await self.versions.bump(1)
+        self.assertGreater(await self.versions.get(1), version)
+
+    async def test_redis_initialises_missing_key(self):
+        redis = MagicMock()
+        redis.get = AsyncMock(side_effect=[None, "42"])
+        redis.set = AsyncMock()
+        await self.versions.init(redis)
+        self.assertEqual(await self.versions.get(1), 42)
+        redis.set.assert_awaited_once()
+        self.assertEqual(redis.set.call_args.args[0], "contacts:version:1")
+        self.assertTrue(redis.set.call_args.kwargs["nx"])
+
+    async def test_redis_error_disables_versions(self):
+        redis = MagicMock()
+        redis.get = AsyncMock(side_effect=RedisError("down"))
+        await self.versions.init(redis)
+        self.assertIsNone(await self.versions.get(1))
+
+    async def test_close(self):
+        await self.versions.init(MagicMock())
+        await self.versions.close()
+        self.assertIsNone(self.versions.redis)
+
+
+class TestEtags(unittest.TestCase):
+
+    def test_contact_etag(self):
+        contact = Contact(id=1, updated_at=datetime(2024, 5, 1, 12, 0))
+        self.assertEqual(contact_etag(contact), '"1-2024-05-01T12:00:00"')
+        contact.updated_at = datetime(2024, 5, 1, 12, 1)
+        self.assertNotEqual(contact_etag(contact), '"1-2024-05-01T12:00:00"')
+
+    def test_collection_etag(self):
+        self.assertEqual(collection_etag(1, None, 0, 10), collection_etag(1, None, 0, 10))
+        self.assertNotEqual(collection_etag(1, None, 0, 10), collection_etag(1, None, 10, 10))
+        self.assertNotEqual(collection_etag(1, None, 0, 10), collection_etag(2, None, 0, 10))
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"a"', '"a"'))
+        self.assertTrue(etag_matches('"b", W/"a"', '"a"'))
+        self.assertTrue(etag_matches('*', '"a"'))
+        self.assertFalse(etag_matches('"b"', '"a"'))
+        self.assertFalse(etag_matches(None, '"a"'))
@@ -0,0 +1,35 @@
+import asyncio
+import threading
+import unittest
+
+from fastapi import HTTPException
+
+from src.services.executor import BoundedExecutor
+
+
+def wait_for(event: threading.Event) -> bool:
+    return event.wait(5)
+
+
+class TestBoundedExecutor(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncTearDown(self):
+        await self.executor.close()
+
+    async def test_saturated_queue_returns_503(self):
+        self.executor = BoundedExecutor(kind="thread", workers=1, queue_size=1, retry_after=3)
+        release = threading.Event()
+        running = [asyncio.create_task(self.executor.run(wait_for, release)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with self.assertRaises(HTTPException) as context:
+            await self.executor.run(wait_for, release)
+        self.assertEqual(context.exception.status_code, 503)
+        self.assertEqual(context.exception.headers["Retry-After"], "3")
+        release.set()
+        self.assertEqual(await asyncio.gather(*running), [True, True])
+        self.assertEqual(self.executor.pending, 0)
+
+    async def test_unknown_kind(self):
+        self.executor = BoundedExecutor(kind="thread")
+        with self.assertRaises(ValueError):
+            BoundedExecutor(kind="fiber")
@@ -0,0 +1,40 @@
+import json
+import unittest
+from datetime import date, datetime
+from typing import List
+
+from pydantic import TypeAdapter
+
+from src.database.models import Contact
+from src.schemas import ContactResponse
+from src.services.fast_json import FastJSONResponse, dumps
+
+
+class TestFastJson(unittest.TestCase):
+
+    def setUp(self):
+        self.contacts = [Contact(id=i, name=f"name{i}", surname="test", email=f"test{i}@example.com",
+                                 phone="tel:+380-99-999-9999", birthday=date(2000, 1, 1), address=None,
+                                 created_at=datetime(2024, 1, 1, 12, 0, 0, 5), updated_at=datetime(2024, 1, 1, 12))
+                         for i in range(3)]
+
+    def test_dumps_matches_response_model(self):
+        adapter = TypeAdapter(List[ContactResponse])
+        expected = adapter.dump_json(adapter.validate_python(self.contacts, from_attributes=True))
+        self.assertEqual(json.loads(dumps(self.contacts)), json.loads(expected))
+
+    def test_dumps_nested(self):
+        result = json.loads(dumps({"updated": self.contacts[:1], "deleted": [4]}))
+        self.assertEqual(result["updated"][0]["birthday"], "2000-01-01")
+        self.assertEqual(result["deleted"], [4])
+
+    def test_dumps_rejects_unknown_types(self):
+        with self.assertRaises(TypeError):
+            dumps(object())
+
+    def test_response(self):
+        response = FastJSONResponse(self.contacts[0], status_code=201, headers={"ETag": '"1"'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.headers["content-type"], "application/json")
+        self.assertEqual(json.loads(response.body)["id"], 0)
+        self.assertEqual(FastJSONResponse(b"[]").body, b"[]")
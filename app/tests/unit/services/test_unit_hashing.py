@@ -0,0 +1,27 @@
+import unittest
+
+from src.conf.config import settings
+from src.services.hashing import HashingExecutor, hash_password, verify_password
+
+
+class TestHashingExecutor(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncTearDown(self):
+        await self.executor.close()
+
+    async def test_hash_and_verify(self):
+        self.executor = HashingExecutor(kind="thread", workers=2, queue_size=2)
+        hashed = await self.executor.run(hash_password, "secret")
+        self.assertTrue(await self.executor.run(verify_password, "secret", hashed))
+        self.assertFalse(await self.executor.run(verify_password, "wrong", hashed))
+        self.assertEqual(self.executor.pending, 0)
+
+    async def test_process_pool(self):
+        self.executor = HashingExecutor(kind="process", workers=1, queue_size=1)
+        hashed = await self.executor.run(hash_password, "secret")
+        self.assertTrue(verify_password("secret", hashed))
+
+    async def test_settings_defaults(self):
+        self.executor = HashingExecutor()
+        self.assertEqual((self.executor.kind, self.executor.queue_size, self.executor.retry_after),
+                         (settings.hash_executor, settings.hash_queue_size, settings.hash_retry_after))
@@ -0,0 +1,140 @@
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from redis.exceptions import RedisError
+
+from src.services.mail_queue import DEAD, GROUP, RETRY, STREAM, MailQueue, MailWorker, dedupe_key
+
+
+class TestMailQueue(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.queue = MailQueue()
+        self.redis = MagicMock()
+        self.redis.xadd = AsyncMock()
+
+    async def test_without_redis(self):
+        self.assertFalse(await self.queue.enqueue_confirmation("test@example.com", "test", "http://test/"))
+
+    async def test_enqueue(self):
+        await self.queue.init(self.redis)
+        self.assertTrue(await self.queue.enqueue_confirmation("test@example.com", "test", "http://test/"))
+        stream, fields = self.redis.xadd.call_args.args
+        job = json.loads(fields["job"])
+        self.assertEqual(stream, STREAM)
+        self.assertEqual((job["kind"], job["recipient"], job["host"], job["attempt"]),
+                         ("confirmation", "test@example.com", "http://test/", 0))
+        self.assertTrue(job["token"])
+
+    async def test_redis_error(self):
+        self.redis.xadd.side_effect = RedisError("down")
+        await self.queue.init(self.redis)
+        self.assertFalse(await self.queue.enqueue_confirmation("test@example.com", "test", "http://test/"))
+
+
+class TestMailWorker(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.redis = MagicMock()
+        self.redis.set = AsyncMock(return_value=True)
+        self.pipe = MagicMock()
+        self.pipe.execute = AsyncMock()
+        self.redis.pipeline.return_value.__aenter__.return_value = self.pipe
+        self.sender = MagicMock()
+        self.sender.deliver = AsyncMock(return_value=True)
+        self.worker = MailWorker(self.redis, self.sender, max_attempts=3, backoff=10)
+
+    def entry(self, entry_id, recipient="test@example.com", attempt=0, kind="confirmation"):
+        job = {"kind": kind, "recipient": recipient, "username": "test", "host": "http://test/", "token": "abc",
+               "attempt": attempt}
+        return entry_id, {"job": json.dumps(job)}
+
+    async def test_sent(self):
+        await self.worker.process([self.entry("1-0")])
+        message = self.sender.deliver.call_args.args[0]
+        self.assertEqual(message["To"], "test@example.com")
+        self.assertIn("http://test/api/auth/confirmed_email/abc", message.get_payload(decode=True).decode())
+        self.pipe.set.assert_called_once()
+        self.assertEqual(self.pipe.set.call_args.args[1], "sent")
+        self.pipe.xack.assert_called_once_with(STREAM, GROUP, "1-0")
+        self.pipe.xdel.assert_called_once_with(STREAM, "1-0")
+
+    async def test_duplicate_not_sent(self):
+        self.redis.set.return_value = None
+        await self.worker.process([self.entry("1-0")])
+        self.sender.deliver.assert_not_awaited()
+        self.pipe.xack.assert_called_once_with(STREAM, GROUP, "1-0")
+
+    @patch('src.services.mail_queue.time.time', return_value=1000)
+    async def test_failure_retried_with_backoff(self, _):
+        self.sender.deliver.return_value = False
+        await self.worker.process([self.entry("1-0", attempt=1)])
+        self.pipe.delete.assert_called_once_with(dedupe_key(json.loads(self.entry("1-0")[1]["job"])))
+        key, members = self.pipe.zadd.call_args.args
+        (job, due), = members.items()
+        self.assertEqual(key, RETRY)
+        self.assertEqual(json.loads(job)["attempt"], 2)
+        self.assertEqual(due, (1000 + 20) * 1000)
+        self.pipe.lpush.assert_not_called()
+
+    async def test_failure_dead_lettered(self):
+        self.sender.deliver.return_value = False
+        await self.worker.process([self.entry("1-0", attempt=2)])
+        key, job = self.pipe.lpush.call_args.args
+        self.assertEqual(key, DEAD)
+        self.assertEqual(json.loads(job)["attempt"], 3)
+        self.pipe.zadd.assert_not_called()
+
+    async def test_unknown_kind_dead_lettered(self):
+        await self.worker.process([self.entry("1-0", kind="newsletter")])
+        self.sender.deliver.assert_not_awaited()
+        self.pipe.lpush.assert_called_once()
+
+    async def test_malformed_entries_dead_lettered(self):
+        await self.worker.process([("1-0", {"job": "{not json"}), ("2-0", {"job": json.dumps({"kind": "x"})}),
+                                   ("3-0", {"other": "field"}), self.entry("4-0")])
+        self.assertEqual(self.redis.set.await_count, 1)
+        self.sender.deliver.assert_awaited_once()
+        dead = [json.loads(call.args[1]) for call in self.pipe.lpush.call_args_list]
+        self.assertEqual([job["entry"] for job in dead], [{"job": "{not json"}, {"job": json.dumps({"kind": "x"})},
+                                                          {"other": "field"}])
+        self.pipe.xack.assert_called_once_with(STREAM, GROUP, "1-0", "2-0", "3-0", "4-0")
+
+    async def test_send_error_fails_only_its_job(self):
+        self.sender.deliver.side_effect = [RuntimeError("template"), True]
+        await self.worker.process([self.entry("1-0", recipient="a@example.com"),
+                                   self.entry("2-0", recipient="b@example.com")])
+        (job, _), = self.pipe.zadd.call_args.args[1].items()
+        self.assertEqual(json.loads(job)["recipient"], "a@example.com")
+        self.assertIn("template", json.loads(job)["error"])
+        self.assertEqual(self.pipe.set.call_args.args[1], "sent")
+        self.pipe.xack.assert_called_once_with(STREAM, GROUP, "1-0", "2-0")
+
+    async def test_run_survives_unexpected_errors(self):
+        self.redis.xgroup_create = AsyncMock()
+        self.worker.block = 0
+
+        async def run_once():
+            if self.worker.run_once.await_count == 2:
+                self.worker.stop()
+            raise RuntimeError("boom")
+
+        self.worker.run_once = AsyncMock(side_effect=run_once)
+        await self.worker.run()
+        self.assertEqual(self.worker.run_once.await_count, 2)
+
+    async def test_run_once_reads_new_entries(self):
+        self.worker.promote = AsyncMock()
+        self.redis.xautoclaim = AsyncMock(return_value=["0-0", [], []])
+        self.redis.xreadgroup = AsyncMock(return_value=[[STREAM, [self.entry("1-0")]]])
+        self.assertEqual(await self.worker.run_once(), 1)
+        self.worker.promote.assert_awaited_once()
+        self.sender.deliver.assert_awaited_once()
+
+    async def test_run_once_claims_abandoned_entries(self):
+        self.worker.promote = AsyncMock()
+        self.redis.xautoclaim = AsyncMock(return_value=["0-0", [self.entry("1-0"), ("2-0", None)], []])
+        self.redis.xreadgroup = AsyncMock()
+        self.assertEqual(await self.worker.run_once(), 1)
+        self.redis.xreadgroup.assert_not_awaited()
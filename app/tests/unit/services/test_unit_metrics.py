@@ -0,0 +1,66 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.services.metrics import UNMATCHED, PrometheusMiddleware, track_queries
+
+
+class TestPrometheusMiddleware(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{Path(self.tmp.name) / 'metrics.db'}")
+        track_queries(self.engine)
+        self.app = FastAPI()
+        self.app.add_middleware(PrometheusMiddleware)
+
+        @self.app.get("/metrics-test/{item_id}")
+        async def read_item(item_id: int):
+            async with self.engine.connect() as conn:
+                await conn.execute(text("select 1"))
+                await conn.execute(text("select 2"))
+            return {"id": item_id}
+
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        await self.engine.dispose()
+        self.tmp.cleanup()
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    async def test_route_template(self):
+        labels = {"method": "GET", "route": "/metrics-test/{item_id}"}
+        before = self.sample("http_requests_total", status="200", **labels)
+        queries = self.sample("http_request_db_queries_sum", **labels)
+        response = await self.client.get("/metrics-test/1")
+        await self.client.get("/metrics-test/2")
+        self.assertEqual(self.sample("http_requests_total", status="200", **labels), before + 2)
+        self.assertEqual(self.sample("http_request_db_queries_sum", **labels), queries + 4)
+        self.assertEqual(self.sample("http_requests_in_progress", **labels), 0)
+        self.assertGreater(self.sample("http_request_duration_seconds_count", **labels), 0)
+        self.assertNotIn("server-timing", response.headers)
+
+    async def test_server_timing(self):
+        self.app.user_middleware.clear()
+        self.app.add_middleware(PrometheusMiddleware, server_timing=True)
+        response = await self.client.get("/metrics-test/1")
+        self.assertIn('desc="2 queries"', response.headers["server-timing"])
+
+    async def test_unmatched(self):
+        before = self.sample("http_requests_total", method="GET", route=UNMATCHED, status="404")
+        await self.client.get("/missing/1")
+        self.assertEqual(self.sample("http_requests_total", method="GET", route=UNMATCHED, status="404"), before + 1)
+
+    async def test_queries_outside_request(self):
+        async with self.engine.connect() as conn:
+            result = await conn.execute(text("select 1"))
+        self.assertEqual(result.scalar(), 1)
@@ -0,0 +1,107 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+
+from src.database.models import User
+from src.services.rate_limit import SLIDING_WINDOW, TOKEN_BUCKET, LocalLimiter, RateLimiter, weight
+
+
+class TestLocalLimiter(unittest.TestCase):
+
+    def test_sliding_window(self):
+        limiter = LocalLimiter(SLIDING_WINDOW, limit=10, window=1000)
+        self.assertEqual([limiter.hit("a", 1, now=100) for _ in range(10)], [0] * 10)
+        self.assertEqual(limiter.hit("a", 1, now=100), 900)
+        self.assertEqual(limiter.hit("b", 1, now=100), 0)
+        # Half way through the next window half of the previous one still counts.
+        self.assertEqual(limiter.hit("a", 5, now=1500), 0)
+        self.assertGreater(limiter.hit("a", 1, now=1500), 0)
+        self.assertEqual(limiter.hit("a", 1, now=3000), 0)
+
+    def test_sliding_window_weight(self):
+        limiter = LocalLimiter(SLIDING_WINDOW, limit=10, window=1000)
+        self.assertEqual(limiter.hit("a", 8, now=0), 0)
+        self.assertGreater(limiter.hit("a", 3, now=0), 0)
+        self.assertEqual(limiter.hit("a", 2, now=0), 0)
+
+    def test_token_bucket(self):
+        limiter = LocalLimiter(TOKEN_BUCKET, limit=10, window=1000)
+        self.assertEqual(limiter.hit("a", 10, now=0), 0)
+        self.assertEqual(limiter.hit("a", 1, now=0), 100)
+        self.assertEqual(limiter.hit("a", 1, now=100), 0)
+        self.assertEqual(limiter.hit("a", 5, now=100), 500)
+
+    def test_prune(self):
+        limiter = LocalLimiter(TOKEN_BUCKET, limit=10, window=1000)
+        limiter.MAX_KEYS = 2
+        limiter.hit("a", 1, now=0)
+        limiter.hit("b", 1, now=0)
+        limiter.hit("c", 1, now=5000)
+        self.assertEqual(set(limiter._state), {"c"})
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.limiter = RateLimiter(times=2, seconds=1, timeout=0.01, cooldown=60)
+        self.redis = MagicMock()
+        self.script = AsyncMock(return_value=[1, 0])
+        self.redis.register_script.return_value = self.script
+
+    def test_unknown_algorithm(self):
+        with self.assertRaises(ValueError):
+            RateLimiter(algorithm="leaky")
+
+    async def test_redis(self):
+        await self.limiter.init(self.redis)
+        self.assertEqual(await self.limiter.hit("user:1", 3), 0)
+        self.assertEqual(self.script.call_args.kwargs, {"keys": ["ratelimit:user:1"], "args": [2, 1000, 3]})
+        self.script.return_value = [0, 1500]
+        self.assertEqual(await self.limiter.hit("user:1"), 1500)
+
+    async def test_redis_error_falls_back(self):
+        self.script.side_effect = RedisError("down")
+        await self.limiter.init(self.redis)
+        self.assertEqual([await self.limiter.hit("user:1") for _ in range(2)], [0, 0])
+        self.assertGreater(await self.limiter.hit("user:1"), 0)
+        self.script.assert_awaited_once()
+
+    async def test_slow_redis_falls_back(self):
+        async def slow(**kwargs):
+            await asyncio.sleep(1)
+            return [1, 0]
+
+        await self.limiter.init(self.redis)
+        self.limiter.script = slow
+        self.assertEqual(await self.limiter.hit("user:1"), 0)
+        self.assertEqual(self.limiter.local._state["user:1"][1], 1)
+
+    async def test_dependency(self):
+        async def endpoint():
+            pass
+
+        request = MagicMock()
+        request.scope = {"endpoint": weight(2)(endpoint)}
+        await self.limiter(request, User(id=1))
+        with self.assertRaises(HTTPException) as context:
+            await self.limiter(request, User(id=1))
+        self.assertEqual(context.exception.status_code, 429)
+        self.assertEqual(context.exception.headers["Retry-After"], "1")
+        await self.limiter(request, User(id=2))
+
+    def test_describe(self):
+        self.assertEqual(self.limiter.describe(),
+                         "No more than 2 requests per 1 seconds per user, shared by the contacts routes")
+        self.assertTrue(self.limiter.describe(5).startswith("Counts as 2 requests against the limit of 2 requests"))
+
+    async def test_weight_capped_at_budget(self):
+        async def endpoint():
+            pass
+
+        request = MagicMock()
+        request.scope = {"endpoint": weight(self.limiter.times + 5)(endpoint)}
+        await self.limiter(request, User(id=1))
+        self.assertEqual(self.limiter.local._state["user:1"][1], self.limiter.times)